@@ -1,24 +1,14 @@
-import os
-from dotenv import load_dotenv, find_dotenv
-from langchain_openai import ChatOpenAI
+from agents.arithmetic_fast_path import make_fast_path_node, route_fast_path
+from agents.parallel_tools import make_tool_node, parallel_tool_calls_enabled
+from ai_agents_playground.llm_client import get_chat_model
 from langgraph.graph import MessagesState
 from langchain_core.messages import HumanMessage, SystemMessage
-from langgraph.graph import START, StateGraph
-from langgraph.prebuilt import ToolNode
+from langgraph.graph import END, START, StateGraph
 from langgraph.prebuilt import tools_condition
-from PIL import Image
-import io
+from logger_config import instrument
 
-_ = load_dotenv(find_dotenv())
-
-openai_api_key = os.environ["OPENAI_API_KEY"]
-base_url = os.environ["ORCHESTATOR_BASE_URL"]
-model_name = os.environ["ORCHESTATOR_MODEL"]
-
-model = ChatOpenAI(
-    base_url=base_url, 
-    model=model_name
-    )
+# Shared connection pool and "assistant" model profile, see ai_agents_playground/llm_client.py
+model = get_chat_model(node="assistant")
 
 def multiply(a: int, b:int) -> int:
     """
@@ -49,7 +39,10 @@ def divide(a: int, b:int) -> int:
 
 tools = [add, multiply, divide]
 
-llm_with_tools = model.bind_tools(tools, parallel_tool_calls=False)
+# Several tool calls per message only in parallel-tool mode (PARALLEL_TOOL_CALLS)
+llm_with_tools = model.bind_tools(
+    tools, parallel_tool_calls=parallel_tool_calls_enabled()
+)
 
 class MessagesState(MessagesState):
     # Add any keys needed beyond messages, which is pre-built 
@@ -65,11 +58,16 @@ def assistant(state: MessagesState):
 def build_agent_graph():
     # Build graph
     builder = StateGraph(MessagesState)
+    builder.add_node("arithmetic_fast_path", make_fast_path_node(tools))
     builder.add_node("assistant", assistant)
-    builder.add_node("tools", ToolNode(tools))
+    builder.add_node("tools", make_tool_node(tools))
 
     # Add logic graph (edges)
-    builder.add_edge(START, "assistant")
+    # Plain arithmetic is answered locally, anything else goes to the LLM
+    builder.add_edge(START, "arithmetic_fast_path")
+    builder.add_conditional_edges(
+        "arithmetic_fast_path", route_fast_path("assistant"), ["assistant", END]
+    )
     builder.add_conditional_edges(
         "assistant",
         tools_condition,
@@ -77,6 +75,6 @@ def build_agent_graph():
     builder.add_edge("tools", "assistant")
 
     # Compile the graph
-    react_graph = builder.compile()
+    react_graph = instrument(builder.compile())
     
     return react_graph
\ No newline at end of file
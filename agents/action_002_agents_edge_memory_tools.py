@@ -1,25 +1,18 @@
-import os
-from dotenv import load_dotenv, find_dotenv
-from langchain_openai import ChatOpenAI
-from langgraph.graph import MessagesState
+from agents.arithmetic_fast_path import make_fast_path_node, route_fast_path
+from agents.history_manager import HistoryState, history_messages, make_history_node
+from agents.parallel_tools import make_tool_node, parallel_tool_calls_enabled
+from ai_agents_playground.checkpointer import get_checkpointer
+from ai_agents_playground.llm_client import get_chat_model
 from langchain_core.messages import HumanMessage, SystemMessage
-from langgraph.graph import START, StateGraph
-from langgraph.prebuilt import ToolNode
+from langgraph.graph import END, START, StateGraph
 from langgraph.prebuilt import tools_condition
-from langgraph.checkpoint.memory import MemorySaver
+from logger_config import instrument
 
-_ = load_dotenv(find_dotenv())
+# MemorySaver, or SQLite when CHECKPOINT_DB is set
+memory = get_checkpointer()
 
-openai_api_key = os.environ["OPENAI_API_KEY"]
-base_url = os.environ["ORCHESTATOR_BASE_URL"]
-model_name = os.environ["ORCHESTATOR_MODEL"]
-
-memory = MemorySaver()
-
-model = ChatOpenAI(
-    base_url=base_url, 
-    model=model_name
-    )
+# Shared connection pool and "assistant" model profile, see ai_agents_playground/llm_client.py
+model = get_chat_model(node="assistant")
 
 def multiply(a: int, b:int) -> int:
     """Multiply a and b.
@@ -47,10 +40,13 @@ def divide(a: int, b:int) -> int:
 
 tools = [add, multiply, divide]
 
-llm_with_tools = model.bind_tools(tools, parallel_tool_calls=False)
+# Several tool calls per message only in parallel-tool mode (PARALLEL_TOOL_CALLS)
+llm_with_tools = model.bind_tools(
+    tools, parallel_tool_calls=parallel_tool_calls_enabled()
+)
 
-class MessagesState(MessagesState):
-    # Add any keys needed beyond messages, which is pre-built 
+class MessagesState(HistoryState):
+    # Add any keys needed beyond messages and summary, which are pre-built
     pass
 
 # System message
@@ -58,16 +54,28 @@ sys_msg = SystemMessage(content="You are a helpful assistant tasked with perform
 
 # Node
 def assistant(state: MessagesState):
-   return {"messages": [llm_with_tools.invoke([sys_msg] + state["messages"])]}
+    # Summary + recent turns instead of the full thread history
+    return {"messages": [llm_with_tools.invoke(history_messages(state, sys_msg))]}
 
 def build_agent_graph():
     # Build graph
     builder = StateGraph(MessagesState)
+    builder.add_node("arithmetic_fast_path", make_fast_path_node(tools))
+    builder.add_node(
+        "manage_history", make_history_node(get_chat_model(node="manage_history"))
+    )
     builder.add_node("assistant", assistant)
-    builder.add_node("tools", ToolNode(tools))
+    builder.add_node("tools", make_tool_node(tools))
 
     # Add logic graph (edges)
-    builder.add_edge(START, "assistant")
+    # Plain arithmetic is answered locally, anything else goes to the LLM
+    builder.add_edge(START, "arithmetic_fast_path")
+    builder.add_conditional_edges(
+        "arithmetic_fast_path",
+        route_fast_path("manage_history"),
+        ["manage_history", END],
+    )
+    builder.add_edge("manage_history", "assistant")
     builder.add_conditional_edges(
         "assistant",
         tools_condition,
@@ -75,6 +83,6 @@ def build_agent_graph():
     builder.add_edge("tools", "assistant")
 
     # Compile the graph
-    react_graph_memory = builder.compile(checkpointer=memory)
+    react_graph_memory = instrument(builder.compile(checkpointer=memory))
     
     return react_graph_memory
\ No newline at end of file
@@ -1,27 +1,23 @@
-import os
-
 import numexpr
 import requests
-from dotenv import find_dotenv, load_dotenv
+from agents.history_manager import HistoryState, history_messages, make_history_node
+from agents.parallel_tools import make_tool_node, parallel_tool_calls_enabled
+from ai_agents_playground.checkpointer import get_checkpointer
+from ai_agents_playground.llm_client import get_chat_model
 from langchain_core.messages import SystemMessage
-from langchain_openai import ChatOpenAI
-from langgraph.checkpoint.memory import MemorySaver
-from langgraph.graph import START, MessagesState, StateGraph
-from langgraph.prebuilt import ToolNode, tools_condition
-
-_ = load_dotenv(find_dotenv())
-
-openai_api_key = os.environ["OPENAI_API_KEY"]
-base_url = os.environ["ORCHESTATOR_BASE_URL"]
-model_name = os.environ["ORCHESTATOR_MODEL"]
+from langgraph.graph import START, StateGraph
+from langgraph.prebuilt import tools_condition
+from logger_config import instrument
 
-memory = MemorySaver()
+# MemorySaver, or SQLite when CHECKPOINT_DB is set
+memory = get_checkpointer()
 
-model = ChatOpenAI(base_url=base_url, model=model_name)
+# Shared connection pool and "assistant" model profile, see ai_agents_playground/llm_client.py
+model = get_chat_model(node="assistant")
 
 
-class MessagesState(MessagesState):
-    # Add any keys needed beyond messages, which is pre-built
+class MessagesState(HistoryState):
+    # Add any keys needed beyond messages and summary, which are pre-built
     pass
 
 
@@ -59,21 +55,29 @@ def calculate(expression: str):
 # Herramienta 2: Informacion del clima
 tools = [calculate]
 
-llm_with_tools = model.bind_tools(tools, parallel_tool_calls=False)
+# Several tool calls per message only in parallel-tool mode (PARALLEL_TOOL_CALLS)
+llm_with_tools = model.bind_tools(
+    tools, parallel_tool_calls=parallel_tool_calls_enabled()
+)
 
 
 def assistant(state: MessagesState):
-    return {"messages": [llm_with_tools.invoke([sys_msg] + state["messages"])]}
+    # Summary + recent turns instead of the full thread history
+    return {"messages": [llm_with_tools.invoke(history_messages(state, sys_msg))]}
 
 
 def build_agent_graph():
     # Build graph
     builder = StateGraph(MessagesState)
+    builder.add_node(
+        "manage_history", make_history_node(get_chat_model(node="manage_history"))
+    )
     builder.add_node("assistant", assistant)
-    builder.add_node("tools", ToolNode(tools))
+    builder.add_node("tools", make_tool_node(tools))
 
     # Add logic graph (edges)
-    builder.add_edge(START, "assistant")
+    builder.add_edge(START, "manage_history")
+    builder.add_edge("manage_history", "assistant")
     builder.add_conditional_edges(
         "assistant",
         tools_condition,
@@ -81,5 +85,5 @@ def build_agent_graph():
     builder.add_edge("tools", "assistant")
 
     # Compile the graph
-    react_graph_memory = builder.compile(checkpointer=memory)
+    react_graph_memory = instrument(builder.compile(checkpointer=memory))
     return react_graph_memory
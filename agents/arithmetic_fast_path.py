@@ -0,0 +1,134 @@
+import ast
+import operator
+import os
+import re
+from typing import Callable, Optional
+
+from langchain_core.messages import AIMessage, HumanMessage
+from langgraph.graph import END
+
+# Atajo local para aritmética simple.
+# "Add 3 and 4" necesita al menos dos llamadas al LLM (elegir la herramienta y
+# redactar la respuesta). Cuando el último mensaje es una operación sin
+# ambigüedad se resuelve aquí con las mismas herramientas del agente y se
+# responde sin llamar al modelo. Cualquier otra cosa sigue al LLM.
+
+NUMBER = r"(-?\d+(?:\.\d+)?)"
+
+# (pattern, tool name); the text is lower-cased and stripped of final punctuation
+VERB_PATTERNS = [
+    (rf"(?:add|sum|suma)\s+{NUMBER}\s+(?:and|to|plus|y|con|más|mas)\s+{NUMBER}", "add"),
+    (
+        rf"(?:multiply|multiplica)\s+{NUMBER}\s+(?:by|and|times|por|y)\s+{NUMBER}",
+        "multiply",
+    ),
+    (rf"(?:divide)\s+{NUMBER}\s+(?:by|entre|por)\s+{NUMBER}", "divide"),
+]
+EXPRESSION_PREFIX = (
+    r"(?:what\s+is|what's|calculate|compute|cuánto\s+es|cuanto\s+es|calcula)\s+"
+)
+EXPRESSION = re.compile(r"[\d\s.+\-*/()]*\d[\d\s.+\-*/()]*")
+# Binary operator: after a number or ")"; unary minus is not matched
+BINARY_OPERATOR = re.compile(r"[\d)](\s*)[-+*/](\s*)")
+# Dates (2024-10-18) and phone numbers (555-1234) are not subtractions
+DASHED_DIGITS = re.compile(r"\d-\d")
+
+OPERATORS = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: operator.truediv,
+}
+
+
+def fast_path_enabled() -> bool:
+    flag = os.environ.get("ARITHMETIC_FAST_PATH", "1")
+    return flag.lower() in ("1", "on", "true", "yes")
+
+
+def _number(text: str):
+    return float(text) if "." in text else int(text)
+
+
+def _format(value) -> str:
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+def _evaluate(node):
+    """Evaluate +, -, *, / and parentheses over number literals only."""
+    if isinstance(node, ast.Expression):
+        return _evaluate(node.body)
+    if isinstance(node, ast.Constant) and type(node.value) in (int, float):
+        return node.value
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, (ast.USub, ast.UAdd)):
+        value = _evaluate(node.operand)
+        return -value if isinstance(node.op, ast.USub) else value
+    if isinstance(node, ast.BinOp) and type(node.op) in OPERATORS:
+        return OPERATORS[type(node.op)](_evaluate(node.left), _evaluate(node.right))
+    raise ValueError(f"Unsupported expression: {ast.dump(node)}")
+
+
+def solve(text: str, tools_by_name: dict[str, Callable]) -> Optional[str]:
+    """Answer for a plain arithmetic request, or None to let the LLM handle it."""
+    text = " ".join(text.lower().split()).rstrip(".?!¿¡ ").lstrip("¿¡ ")
+    text = re.sub(r"^(?:please|por favor)\s+", "", text)
+
+    for pattern, name in VERB_PATTERNS:
+        match = re.fullmatch(pattern, text)
+        if match and name in tools_by_name:
+            a, b = (_number(group) for group in match.groups())
+            try:
+                result = tools_by_name[name](a, b)
+            except ArithmeticError:
+                return None
+            symbol = {"add": "+", "multiply": "*", "divide": "/"}[name]
+            return f"{_format(a)} {symbol} {_format(b)} = {_format(result)}"
+
+    expression = re.sub(rf"^{EXPRESSION_PREFIX}", "", text)
+    operators = BINARY_OPERATOR.findall(expression)
+    if (
+        not EXPRESSION.fullmatch(expression)
+        or not operators
+        or DASHED_DIGITS.search(expression)
+    ):
+        return None
+    # Without "what is", "calculate"... only unambiguous input: every operator
+    # between spaces ("3 + 4", not "3+4")
+    if expression == text and not all(before and after for before, after in operators):
+        return None
+    try:
+        result = _evaluate(ast.parse(expression, mode="eval"))
+    except (SyntaxError, ValueError, ArithmeticError, RecursionError):
+        return None
+    return f"{' '.join(expression.split())} = {_format(result)}"
+
+
+def make_fast_path_node(tools):
+    """Build the pre-router node that answers plain arithmetic locally."""
+    tools_by_name = {tool.__name__: tool for tool in tools}
+
+    def arithmetic_fast_path(state):
+        message = state["messages"][-1]
+        if not fast_path_enabled() or not isinstance(message, HumanMessage):
+            return {}
+        if not isinstance(message.content, str):
+            return {}
+        answer = solve(message.content, tools_by_name)
+        if answer is None:
+            return {}
+        return {"messages": [AIMessage(content=answer)]}
+
+    return arithmetic_fast_path
+
+
+def route_fast_path(next_node: str):
+    """Conditional edge: END when the fast path answered, ``next_node`` otherwise."""
+
+    def route(state):
+        if isinstance(state["messages"][-1], AIMessage):
+            return END
+        return next_node
+
+    return route
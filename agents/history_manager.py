@@ -0,0 +1,108 @@
+import os
+
+from langchain_core.messages import (
+    AIMessage,
+    HumanMessage,
+    RemoveMessage,
+    SystemMessage,
+    ToolMessage,
+)
+from langchain_core.messages.utils import count_tokens_approximately
+from langgraph.constants import TAG_NOSTREAM
+from langgraph.graph import MessagesState
+
+# Gestión del historial de los agentes con memoria.
+# Antes de cada turno:
+#   1. Los intercambios de herramientas de turnos ya respondidos (AIMessage con
+#      tool_calls + ToolMessage) se eliminan: la respuesta final ya los resume.
+#   2. Si el historial supera HISTORY_MAX_TOKENS, los turnos más antiguos se
+#      condensan en un resumen y se eliminan del estado, dejando los últimos
+#      HISTORY_KEEP_TURNS turnos intactos.
+# Así el tamaño del prompt se mantiene acotado en conversaciones largas.
+
+
+class HistoryState(MessagesState):
+    # Running summary of the turns removed from `messages`
+    summary: str
+
+
+def _max_tokens() -> int:
+    return int(os.environ.get("HISTORY_MAX_TOKENS", 2000))
+
+
+def _keep_turns() -> int:
+    return max(1, int(os.environ.get("HISTORY_KEEP_TURNS", 2)))
+
+
+def _is_tool_exchange(message) -> bool:
+    return isinstance(message, ToolMessage) or (
+        isinstance(message, AIMessage) and bool(message.tool_calls)
+    )
+
+
+def _turn_starts(messages):
+    return [i for i, m in enumerate(messages) if isinstance(m, HumanMessage)]
+
+
+def consumed_tool_exchanges(messages):
+    """Tool calls and results of the turns before the current one."""
+    starts = _turn_starts(messages)
+    if not starts:
+        return []
+    return [m for m in messages[: starts[-1]] if _is_tool_exchange(m)]
+
+
+summary_instructions = """Summarize the conversation so far for an assistant that will continue it.
+Keep the facts the user gave, the results already computed and any open request. Be concise.
+
+Current summary (may be empty):
+{summary}"""
+
+
+def make_history_node(model):
+    """Build the node that prunes and summarizes the history with ``model``."""
+
+    def manage_history(state: HistoryState):
+        messages = state["messages"]
+        pruned = [m.id for m in consumed_tool_exchanges(messages)]
+        kept = [m for m in messages if m.id not in pruned]
+        removed = [RemoveMessage(id=m_id) for m_id in pruned]
+        update = {}
+
+        starts = _turn_starts(kept)
+        if (
+            len(starts) > _keep_turns()
+            and count_tokens_approximately(kept) > _max_tokens()
+        ):
+            cut = starts[-_keep_turns()]
+            old = kept[:cut]
+            summary = model.with_config(tags=[TAG_NOSTREAM]).invoke(
+                [
+                    SystemMessage(
+                        content=summary_instructions.format(
+                            summary=state.get("summary", "")
+                        )
+                    )
+                ]
+                + old
+            )
+            update["summary"] = summary.content
+            removed += [RemoveMessage(id=m.id) for m in old]
+
+        if removed:
+            update["messages"] = removed
+        return update
+
+    return manage_history
+
+
+def history_messages(state: HistoryState, sys_msg: SystemMessage):
+    """Prompt for the assistant: instructions, running summary and recent turns."""
+    prompt = [sys_msg]
+    if state.get("summary"):
+        prompt.append(
+            SystemMessage(
+                content=f"Summary of the earlier conversation: {state['summary']}"
+            )
+        )
+    return prompt + state["messages"]
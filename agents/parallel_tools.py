@@ -0,0 +1,97 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from functools import lru_cache
+
+from langchain_core.messages import AIMessage, ToolMessage
+from langchain_core.tools import BaseTool, tool
+from langgraph.prebuilt import ToolNode
+
+# Llamadas a herramientas en paralelo.
+# Con PARALLEL_TOOL_CALLS=1 el modelo puede pedir varias herramientas en un
+# mismo mensaje ("suma 3 y 4, multiplica 5 por 6, divide 8 entre 2") y el nodo
+# de herramientas las ejecuta a la vez en un pool de hilos compartido, con un
+# timeout por llamada y los resultados en el mismo orden que las llamadas.
+
+
+def parallel_tool_calls_enabled() -> bool:
+    return os.environ.get("PARALLEL_TOOL_CALLS", "0").lower() in ("1", "on", "true")
+
+
+@lru_cache(maxsize=None)
+def get_tool_executor() -> ThreadPoolExecutor:
+    """Process-wide worker pool for tool calls, sized with TOOL_WORKERS (default 8)."""
+    return ThreadPoolExecutor(
+        max_workers=int(os.environ.get("TOOL_WORKERS", 8)),
+        thread_name_prefix="tool-call",
+    )
+
+
+def _error_message(tool_call: dict, content: str) -> ToolMessage:
+    return ToolMessage(
+        content=content,
+        name=tool_call["name"],
+        tool_call_id=tool_call["id"],
+        status="error",
+    )
+
+
+class ParallelToolNode:
+    """Tool node that runs the tool calls of the last AI message concurrently.
+
+    Args:
+        tools: Functions or LangChain tools, as for ToolNode.
+        timeout: Seconds each call may take (TOOL_CALL_TIMEOUT, default 30).
+            A call that times out is answered with an error ToolMessage; its
+            thread cannot be interrupted and finishes in the background.
+    """
+
+    def __init__(self, tools, timeout: float = None):
+        self.tools_by_name = {}
+        for t in tools:
+            t = t if isinstance(t, BaseTool) else tool(t)
+            self.tools_by_name[t.name] = t
+        self.timeout = timeout or float(os.environ.get("TOOL_CALL_TIMEOUT", 30))
+
+    def _run(self, tool_call: dict) -> ToolMessage:
+        if tool_call["name"] not in self.tools_by_name:
+            return _error_message(
+                tool_call,
+                f"Error: {tool_call['name']} is not a valid tool, "
+                f"try one of [{', '.join(self.tools_by_name)}].",
+            )
+        try:
+            return self.tools_by_name[tool_call["name"]].invoke(
+                {**tool_call, "type": "tool_call"}
+            )
+        except Exception as e:
+            return _error_message(
+                tool_call, f"Error: {e!r}\n Please fix your mistakes."
+            )
+
+    def __call__(self, state: dict):
+        message = state["messages"][-1]
+        if not isinstance(message, AIMessage) or not message.tool_calls:
+            return {"messages": []}
+
+        executor = get_tool_executor()
+        futures = [executor.submit(self._run, call) for call in message.tool_calls]
+        results = []
+        # Results keep the order of the calls, whatever order they finish in
+        for tool_call, future in zip(message.tool_calls, futures):
+            try:
+                results.append(future.result(timeout=self.timeout))
+            except FutureTimeoutError:
+                results.append(
+                    _error_message(
+                        tool_call, f"Error: the tool timed out after {self.timeout}s."
+                    )
+                )
+        return {"messages": results}
+
+
+def make_tool_node(tools):
+    """ParallelToolNode when PARALLEL_TOOL_CALLS is on, the prebuilt ToolNode otherwise."""
+    if parallel_tool_calls_enabled():
+        return ParallelToolNode(tools)
+    return ToolNode(tools)
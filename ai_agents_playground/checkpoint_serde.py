@@ -0,0 +1,101 @@
+import importlib.util
+import os
+import zlib
+from typing import Any, Optional
+
+from langgraph.checkpoint.base import SerializerProtocol
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+
+# Serialización compacta de checkpoints.
+# JsonPlusSerializer ya produce msgpack (binario); aquí se comprime el
+# resultado con zstd (paquete opcional `zstandard`) o, si no está instalado,
+# con zlib. El tipo guardado lleva el códec delante ("zstd+msgpack"), así que
+# los checkpoints sin comprimir de antes se siguen leyendo.
+
+# Payloads smaller than this are stored as they are
+COMPRESS_MIN_BYTES = 512
+
+
+def _resolve_codec(codec: str) -> Optional[str]:
+    codec = codec.lower()
+    if codec in ("off", "none", "0", "false"):
+        return None
+    zstd_available = importlib.util.find_spec("zstandard") is not None
+    if codec == "auto":
+        return "zstd" if zstd_available else "zlib"
+    if codec == "zstd" and not zstd_available:
+        raise ImportError("CHECKPOINT_COMPRESSION=zstd needs the zstandard package")
+    if codec not in ("zstd", "zlib"):
+        raise ValueError(f"Unknown checkpoint compression: {codec!r}")
+    return codec
+
+
+def _compress(codec: str, data: bytes, level: int) -> bytes:
+    if codec == "zstd":
+        import zstandard
+
+        return zstandard.ZstdCompressor(level=level).compress(data)
+    return zlib.compress(data, level)
+
+
+def _decompress(codec: str, data: bytes) -> bytes:
+    if codec == "zstd":
+        import zstandard
+
+        return zstandard.ZstdDecompressor().decompress(data)
+    if codec == "zlib":
+        return zlib.decompress(data)
+    # Corrupt data or written by another serializer
+    raise ValueError(f"Unknown checkpoint compression in stored data: {codec!r}")
+
+
+class CompressedSerializer(SerializerProtocol):
+    """Checkpoint serializer that compresses the output of another one.
+
+    Args:
+        serde: Wrapped serializer, the LangGraph JsonPlusSerializer by default.
+        codec: "auto" (zstd when installed, zlib otherwise), "zstd", "zlib"
+            or "off".
+        level: Compression level.
+        min_bytes: Payloads below this size are not compressed.
+    """
+
+    def __init__(
+        self,
+        serde: Optional[SerializerProtocol] = None,
+        codec: str = "auto",
+        level: int = 3,
+        min_bytes: int = COMPRESS_MIN_BYTES,
+    ):
+        self.serde = serde or JsonPlusSerializer()
+        self.codec = _resolve_codec(codec)
+        self.level = level
+        self.min_bytes = min_bytes
+
+    def dumps(self, obj: Any) -> bytes:
+        return self.serde.dumps(obj)
+
+    def loads(self, data: bytes) -> Any:
+        return self.serde.loads(data)
+
+    def dumps_typed(self, obj: Any) -> tuple[str, bytes]:
+        type_, data = self.serde.dumps_typed(obj)
+        if self.codec is None or data is None or len(data) < self.min_bytes:
+            return type_, data
+        compressed = _compress(self.codec, bytes(data), self.level)
+        if len(compressed) >= len(data):
+            return type_, data
+        return f"{self.codec}+{type_}", compressed
+
+    def loads_typed(self, data: tuple[str, bytes]) -> Any:
+        type_, payload = data
+        if "+" in type_:
+            codec, type_ = type_.split("+", 1)
+            payload = _decompress(codec, payload)
+        return self.serde.loads_typed((type_, payload))
+
+
+def get_checkpoint_serde() -> CompressedSerializer:
+    """Serializer of the checkpointers, configured with CHECKPOINT_COMPRESSION
+    ("auto" by default, "zstd", "zlib" or "off")."""
+    return CompressedSerializer(codec=os.environ.get("CHECKPOINT_COMPRESSION", "auto"))
@@ -0,0 +1,662 @@
+import atexit
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import AsyncIterator, Iterator, Sequence
+from functools import lru_cache
+from typing import Any, Optional
+
+from ai_agents_playground.checkpoint_serde import get_checkpoint_serde
+from ai_agents_playground.llm_client import load_env
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    SerializerProtocol,
+    get_checkpoint_id,
+    get_checkpoint_metadata,
+)
+from langgraph.checkpoint.memory import MemorySaver
+from langgraph.checkpoint.serde.types import TASKS
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS checkpoints (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL DEFAULT '',
+    checkpoint_id TEXT NOT NULL,
+    parent_checkpoint_id TEXT,
+    type TEXT NOT NULL,
+    checkpoint BLOB NOT NULL,
+    metadata_type TEXT NOT NULL,
+    metadata BLOB NOT NULL,
+    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id)
+);
+CREATE TABLE IF NOT EXISTS blobs (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL DEFAULT '',
+    channel TEXT NOT NULL,
+    version TEXT NOT NULL,
+    type TEXT NOT NULL,
+    blob BLOB,
+    base TEXT,
+    PRIMARY KEY (thread_id, checkpoint_ns, channel, version)
+);
+CREATE TABLE IF NOT EXISTS writes (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL DEFAULT '',
+    checkpoint_id TEXT NOT NULL,
+    task_id TEXT NOT NULL,
+    idx INTEGER NOT NULL,
+    channel TEXT NOT NULL,
+    type TEXT NOT NULL,
+    value BLOB,
+    task_path TEXT NOT NULL DEFAULT '',
+    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id, task_id, idx)
+);
+"""
+
+
+def _stored_metadata(config: RunnableConfig, metadata: CheckpointMetadata) -> dict:
+    # "writes" repeats the task outputs already kept in the writes table and in
+    # the channel blobs; it is informative only and the largest part of it
+    metadata = get_checkpoint_metadata(config, metadata)
+    return {key: value for key, value in metadata.items() if key != "writes"}
+
+
+# List channels remembered for delta encoding (one per thread, namespace and
+# channel); older ones just get a full copy on their next version
+RECENT_LISTS = 1024
+
+
+class SqliteCheckpointSaver(BaseCheckpointSaver[str]):
+    """File-backed checkpoint saver, a drop-in replacement for MemorySaver.
+
+    Same storage layout as MemorySaver (checkpoints, channel blobs stored once
+    per version, pending writes) but in a SQLite file, so conversations and
+    research runs survive restarts and memory does not grow with them.
+
+    - WAL mode: readers never block the writer.
+    - Batched writes: statements are committed every ``flush_interval``
+      seconds or every ``batch_size`` statements, whichever comes first,
+      instead of once per checkpoint. A crash loses at most that window,
+      except for the task results of the root graph, committed right away.
+    - Retention: only the last ``keep_last`` checkpoints of every thread (and
+      subgraph namespace) are kept, with their writes and channel blobs.
+    - Delta encoding: a list channel that only grew (messages, context,
+      sections) is stored as the new items plus a reference to its previous
+      version, with a full copy every ``full_every`` versions, so the
+      checkpoints of a run no longer grow quadratically with its length.
+    - Compaction: a background thread applies the retention policy every
+      ``compact_interval`` seconds and gives the freed pages back to the OS.
+
+    Args:
+        path: Location of the SQLite file. Parent folders are created.
+        keep_last: Checkpoints kept per thread (None: keep everything).
+        batch_size: Statements buffered before a commit.
+        flush_interval: Maximum seconds a write stays uncommitted.
+        compact_interval: Seconds between compactions (None: never).
+        full_every: Versions of a list channel between full copies (None:
+            always full copies).
+        serde: Serializer, defaults to the LangGraph one.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        keep_last: Optional[int] = 20,
+        batch_size: int = 100,
+        flush_interval: float = 1.0,
+        compact_interval: Optional[float] = 300.0,
+        full_every: Optional[int] = 8,
+        *,
+        serde: Optional[SerializerProtocol] = None,
+    ):
+        super().__init__(serde=serde)
+        if path != ":memory:":
+            directory = os.path.dirname(os.path.abspath(path))
+            os.makedirs(directory, exist_ok=True)
+
+        self.path = path
+        self.keep_last = keep_last
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.compact_interval = compact_interval
+        self.full_every = full_every
+        # Last stored version of every list channel: (version, items, depth)
+        self._recent_lists = OrderedDict()
+
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        # auto_vacuum only applies to new files, it must come before the tables
+        self._conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        columns = [row[1] for row in self._conn.execute("PRAGMA table_info(blobs)")]
+        if "base" not in columns:
+            # Files created before delta encoding
+            self._conn.execute("ALTER TABLE blobs ADD COLUMN base TEXT")
+        self._conn.commit()
+        self._pending = 0
+        self._last_commit = time.monotonic()
+
+        self._stop = threading.Event()
+        self._worker = threading.Thread(
+            target=self._background, name="checkpoint-compaction", daemon=True
+        )
+        self._worker.start()
+        atexit.register(self.close)
+
+    # ===================== Write batching =====================
+    def _execute(self, sql: str, params: Sequence = ()) -> None:
+        self._conn.execute(sql, params)
+        self._pending += 1
+
+    def _maybe_commit(self) -> None:
+        if self._pending >= self.batch_size or (
+            self._pending
+            and time.monotonic() - self._last_commit >= self.flush_interval
+        ):
+            self._commit()
+
+    def _commit(self) -> None:
+        self._conn.commit()
+        self._pending = 0
+        self._last_commit = time.monotonic()
+
+    def flush(self) -> None:
+        """Commit the buffered writes now."""
+        with self._lock:
+            if self._pending:
+                self._commit()
+
+    def close(self) -> None:
+        """Stop the background thread, commit and close the file."""
+        if self._stop.is_set():
+            return
+        self._stop.set()
+        self._worker.join(timeout=5)
+        with self._lock:
+            self._commit()
+            self._conn.close()
+
+    def _background(self) -> None:
+        last_compaction = time.monotonic()
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self.flush()
+                if (
+                    self.compact_interval is not None
+                    and time.monotonic() - last_compaction >= self.compact_interval
+                ):
+                    self.compact()
+                    last_compaction = time.monotonic()
+            except sqlite3.Error as e:
+                logger.warning(f"Checkpoint maintenance failed: {e}")
+
+    # ===================== Retention and compaction =====================
+    def compact(self) -> dict:
+        """Apply the retention policy and reclaim the freed space.
+
+        Returns:
+            dict: Number of checkpoints, writes and blobs deleted.
+        """
+        deleted = {"checkpoints": 0, "writes": 0, "blobs": 0}
+        if self.keep_last is None:
+            return deleted
+        with self._lock:
+            namespaces = self._conn.execute(
+                "SELECT thread_id, checkpoint_ns FROM checkpoints "
+                "GROUP BY thread_id, checkpoint_ns HAVING COUNT(*) > ?",
+                (self.keep_last,),
+            ).fetchall()
+            for thread_id, checkpoint_ns in namespaces:
+                for table, count in self._trim(thread_id, checkpoint_ns).items():
+                    deleted[table] += count
+            self._commit()
+            if any(deleted.values()):
+                self._conn.execute("PRAGMA incremental_vacuum")
+                self._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        if any(deleted.values()):
+            logger.info(f"Checkpoint compaction: {deleted}")
+        return deleted
+
+    def _trim(self, thread_id: str, checkpoint_ns: str) -> dict:
+        key = (thread_id, checkpoint_ns)
+        rows = self._conn.execute(
+            "SELECT checkpoint_id, parent_checkpoint_id, type, checkpoint "
+            "FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? "
+            "ORDER BY checkpoint_id DESC",
+            key,
+        ).fetchall()
+        kept, dropped = rows[: self.keep_last], rows[self.keep_last :]
+
+        # Writes of the parent of a kept checkpoint hold its pending sends
+        kept_ids = {row[0] for row in kept} | {row[1] for row in kept if row[1]}
+        referenced = set()
+        for _, _, type_, checkpoint in kept:
+            versions = self.serde.loads_typed((type_, checkpoint))["channel_versions"]
+            referenced.update((channel, str(v)) for channel, v in versions.items())
+
+        counts = {"checkpoints": len(dropped), "writes": 0, "blobs": 0}
+        self._conn.executemany(
+            "DELETE FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? "
+            "AND checkpoint_id = ?",
+            [(*key, row[0]) for row in dropped],
+        )
+        for (checkpoint_id,) in self._conn.execute(
+            "SELECT DISTINCT checkpoint_id FROM writes "
+            "WHERE thread_id = ? AND checkpoint_ns = ?",
+            key,
+        ).fetchall():
+            if checkpoint_id not in kept_ids:
+                counts["writes"] += self._conn.execute(
+                    "DELETE FROM writes WHERE thread_id = ? AND checkpoint_ns = ? "
+                    "AND checkpoint_id = ?",
+                    (*key, checkpoint_id),
+                ).rowcount
+        blobs = self._conn.execute(
+            "SELECT channel, version, base FROM blobs "
+            "WHERE thread_id = ? AND checkpoint_ns = ?",
+            key,
+        ).fetchall()
+        # Deltas need every version down to their last full copy
+        bases = {(channel, version): base for channel, version, base in blobs}
+        for channel, version in list(referenced):
+            while base := bases.get((channel, version)):
+                referenced.add((channel, base))
+                version = base
+        stale = [
+            (*key, channel, version)
+            for channel, version, _ in blobs
+            if (channel, version) not in referenced
+        ]
+        self._conn.executemany(
+            "DELETE FROM blobs WHERE thread_id = ? AND checkpoint_ns = ? "
+            "AND channel = ? AND version = ?",
+            stale,
+        )
+        counts["blobs"] = len(stale)
+        return counts
+
+    # ===================== Reads =====================
+    def _load_blob(
+        self, thread_id: str, checkpoint_ns: str, channel: str, version: str
+    ) -> Optional[tuple]:
+        """(value,) of a channel version, or None when missing or empty."""
+        row = self._conn.execute(
+            "SELECT type, blob, base FROM blobs WHERE thread_id = ? "
+            "AND checkpoint_ns = ? AND channel = ? AND version = ?",
+            (thread_id, checkpoint_ns, channel, version),
+        ).fetchone()
+        if row is None or row[0] == "empty":
+            return None
+        value = self.serde.loads_typed(row[:2])
+        if row[2] is None:
+            return (value,)
+        # Delta: the items added since the base version
+        (base,) = self._load_blob(thread_id, checkpoint_ns, channel, row[2])
+        return (base + value,)
+
+    def _load_blobs(
+        self, thread_id: str, checkpoint_ns: str, versions: ChannelVersions
+    ) -> dict[str, Any]:
+        channel_values = {}
+        for channel, version in versions.items():
+            loaded = self._load_blob(thread_id, checkpoint_ns, channel, str(version))
+            if loaded is not None:
+                channel_values[channel] = loaded[0]
+        return channel_values
+
+    def _load_writes(self, thread_id: str, checkpoint_ns: str, checkpoint_id: str):
+        return self._conn.execute(
+            "SELECT task_id, channel, type, value, task_path, idx FROM writes "
+            "WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ? "
+            "ORDER BY task_id, idx",
+            (thread_id, checkpoint_ns, checkpoint_id),
+        ).fetchall()
+
+    def _to_tuple(self, thread_id: str, checkpoint_ns: str, row) -> CheckpointTuple:
+        checkpoint_id, parent_checkpoint_id, type_, checkpoint, metadata = row
+        if parent_checkpoint_id:
+            sends = sorted(
+                (
+                    w
+                    for w in self._load_writes(
+                        thread_id, checkpoint_ns, parent_checkpoint_id
+                    )
+                    if w[1] == TASKS
+                ),
+                key=lambda w: (w[4], w[0], w[5]),
+            )
+        else:
+            sends = []
+        checkpoint_: Checkpoint = self.serde.loads_typed((type_, checkpoint))
+        return CheckpointTuple(
+            config={
+                "configurable": {
+                    "thread_id": thread_id,
+                    "checkpoint_ns": checkpoint_ns,
+                    "checkpoint_id": checkpoint_id,
+                }
+            },
+            checkpoint={
+                **checkpoint_,
+                "channel_values": self._load_blobs(
+                    thread_id, checkpoint_ns, checkpoint_["channel_versions"]
+                ),
+                "pending_sends": [self.serde.loads_typed(s[2:4]) for s in sends],
+            },
+            metadata=metadata,
+            pending_writes=[
+                (task_id, channel, self.serde.loads_typed((t, value)))
+                for task_id, channel, t, value, _, _ in self._load_writes(
+                    thread_id, checkpoint_ns, checkpoint_id
+                )
+            ],
+            parent_config=(
+                {
+                    "configurable": {
+                        "thread_id": thread_id,
+                        "checkpoint_ns": checkpoint_ns,
+                        "checkpoint_id": parent_checkpoint_id,
+                    }
+                }
+                if parent_checkpoint_id
+                else None
+            ),
+        )
+
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        """Checkpoint with the config's checkpoint_id, or the latest of the thread."""
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        query = (
+            "SELECT checkpoint_id, parent_checkpoint_id, type, checkpoint, "
+            "metadata_type, metadata FROM checkpoints "
+            "WHERE thread_id = ? AND checkpoint_ns = ?"
+        )
+        params = [thread_id, checkpoint_ns]
+        if checkpoint_id := get_checkpoint_id(config):
+            query += " AND checkpoint_id = ?"
+            params.append(checkpoint_id)
+        query += " ORDER BY checkpoint_id DESC LIMIT 1"
+        with self._lock:
+            row = self._conn.execute(query, params).fetchone()
+            if row is None:
+                return None
+            metadata = self.serde.loads_typed(row[4:6])
+            return self._to_tuple(thread_id, checkpoint_ns, (*row[:4], metadata))
+
+    def list(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> Iterator[CheckpointTuple]:
+        """Checkpoints matching the criteria, newest first (see MemorySaver.list)."""
+        query = (
+            "SELECT thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id, "
+            "type, checkpoint, metadata_type, metadata FROM checkpoints WHERE 1 = 1"
+        )
+        params = []
+        if config:
+            query += " AND thread_id = ?"
+            params.append(config["configurable"]["thread_id"])
+            if (
+                checkpoint_ns := config["configurable"].get("checkpoint_ns")
+            ) is not None:
+                query += " AND checkpoint_ns = ?"
+                params.append(checkpoint_ns)
+            if checkpoint_id := get_checkpoint_id(config):
+                query += " AND checkpoint_id = ?"
+                params.append(checkpoint_id)
+        if before and (before_checkpoint_id := get_checkpoint_id(before)):
+            query += " AND checkpoint_id < ?"
+            params.append(before_checkpoint_id)
+        query += " ORDER BY thread_id, checkpoint_ns, checkpoint_id DESC"
+
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        for thread_id, checkpoint_ns, *row in rows:
+            if limit is not None and limit <= 0:
+                break
+            metadata = self.serde.loads_typed(row[4:6])
+            if filter and not all(
+                value == metadata.get(key) for key, value in filter.items()
+            ):
+                continue
+            if limit is not None:
+                limit -= 1
+            with self._lock:
+                item = self._to_tuple(thread_id, checkpoint_ns, (*row[:4], metadata))
+            yield item
+
+    # ===================== Writes =====================
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        """Save a checkpoint; channel values are stored once per new version."""
+        c = checkpoint.copy()
+        c.pop("pending_sends")
+        values = c.pop("channel_values")
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"]["checkpoint_ns"]
+        with self._lock:
+            for channel, version in new_versions.items():
+                if channel in values:
+                    base, type_, blob = self._encode(
+                        thread_id, checkpoint_ns, channel, str(version), values[channel]
+                    )
+                else:
+                    base, type_, blob = None, "empty", None
+                self._execute(
+                    "INSERT OR REPLACE INTO blobs VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        thread_id,
+                        checkpoint_ns,
+                        channel,
+                        str(version),
+                        type_,
+                        blob,
+                        base,
+                    ),
+                )
+            self._execute(
+                "INSERT OR REPLACE INTO checkpoints VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    thread_id,
+                    checkpoint_ns,
+                    checkpoint["id"],
+                    config["configurable"].get("checkpoint_id"),  # parent
+                    *self.serde.dumps_typed(c),
+                    *self.serde.dumps_typed(_stored_metadata(config, metadata)),
+                ),
+            )
+            self._maybe_commit()
+        return {
+            "configurable": {
+                "thread_id": thread_id,
+                "checkpoint_ns": checkpoint_ns,
+                "checkpoint_id": checkpoint["id"],
+            }
+        }
+
+    def _encode(
+        self, thread_id: str, checkpoint_ns: str, channel: str, version: str, value
+    ) -> tuple[Optional[str], str, bytes]:
+        """(base version, type, payload) of a channel value; caller holds the lock."""
+        if not self.full_every or not isinstance(value, list):
+            return (None, *self.serde.dumps_typed(value))
+
+        key = (thread_id, checkpoint_ns, channel)
+        previous = self._recent_lists.pop(key, None)
+        depth = 0
+        base = None
+        payload = value
+        if previous is not None:
+            base_version, items, base_depth = previous
+            # Only when the list grew: the new items go after the stored ones
+            if (
+                base_depth + 1 < self.full_every
+                and len(value) >= len(items)
+                and value[: len(items)] == items
+            ):
+                base, depth, payload = base_version, base_depth + 1, value[len(items) :]
+
+        self._recent_lists[key] = (version, list(value), depth)
+        if len(self._recent_lists) > RECENT_LISTS:
+            self._recent_lists.popitem(last=False)
+        return (base, *self.serde.dumps_typed(payload))
+
+    def put_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        """Save the pending writes of a task."""
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = config["configurable"]["checkpoint_id"]
+        with self._lock:
+            for idx, (channel, value) in enumerate(writes):
+                idx = WRITES_IDX_MAP.get(channel, idx)
+                # Special writes (errors, interrupts...) are replaced, the
+                # regular ones are written only once
+                verb = "INSERT OR REPLACE" if idx < 0 else "INSERT OR IGNORE"
+                self._execute(
+                    f"{verb} INTO writes VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        thread_id,
+                        checkpoint_ns,
+                        checkpoint_id,
+                        task_id,
+                        idx,
+                        channel,
+                        *self.serde.dumps_typed(value),
+                        task_path,
+                    ),
+                )
+            # Results of the root graph tasks (a finished interview, a report
+            # section) are committed right away: they are the costly part to
+            # redo after a crash. Sub-graph steps stay batched.
+            if checkpoint_ns:
+                self._maybe_commit()
+            else:
+                self._commit()
+
+    def delete_thread(self, thread_id: str) -> None:
+        """Delete all checkpoints, writes and blobs of a thread."""
+        with self._lock:
+            for table in ("checkpoints", "writes", "blobs"):
+                self._execute(f"DELETE FROM {table} WHERE thread_id = ?", (thread_id,))
+            self._commit()
+            # A new run on the same thread must not use deleted versions as base
+            for key in [k for k in self._recent_lists if k[0] == thread_id]:
+                del self._recent_lists[key]
+
+    # SQLite calls take microseconds with batched commits, so the async API
+    # runs them inline, like MemorySaver does.
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        return self.get_tuple(config)
+
+    async def alist(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> AsyncIterator[CheckpointTuple]:
+        for item in self.list(config, filter=filter, before=before, limit=limit):
+            yield item
+
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        return self.put(config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        return self.put_writes(config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        return self.delete_thread(thread_id)
+
+    def get_next_version(self, current: Optional[str], channel) -> str:
+        return MemorySaver.get_next_version(self, current, channel)
+
+
+def _env_float(name: str, default: float) -> Optional[float]:
+    value = float(os.environ.get(name) or default)
+    return value if value > 0 else None
+
+
+@lru_cache(maxsize=None)
+def _sqlite_saver(path: str) -> SqliteCheckpointSaver:
+    keep_last = _env_float("CHECKPOINT_KEEP_LAST", 20)
+    return SqliteCheckpointSaver(
+        path,
+        keep_last=int(keep_last) if keep_last else None,
+        batch_size=int(os.environ.get("CHECKPOINT_BATCH_SIZE", 100)),
+        flush_interval=float(os.environ.get("CHECKPOINT_FLUSH_INTERVAL", 1.0)),
+        compact_interval=_env_float("CHECKPOINT_COMPACT_INTERVAL", 300),
+        full_every=int(_env_float("CHECKPOINT_FULL_EVERY", 8) or 0) or None,
+        serde=get_checkpoint_serde(),
+    )
+
+
+def get_checkpointer(path: Optional[str] = None) -> BaseCheckpointSaver:
+    """Checkpointer for a graph, configured from the environment.
+
+    Without CHECKPOINT_DB every call returns a new in-process MemorySaver, as
+    before. With CHECKPOINT_DB set, every graph of the process shares one
+    SqliteCheckpointSaver on that file. ``path`` overrides CHECKPOINT_DB.
+    Both store their payloads compressed (see checkpoint_serde.py).
+
+    Variables:
+        CHECKPOINT_DB: SQLite file, e.g. .cache/checkpoints.sqlite, or
+            ":memory:" for an in-process saver with delta encoding.
+        CHECKPOINT_KEEP_LAST: checkpoints kept per thread (default 20, 0 keeps all).
+        CHECKPOINT_BATCH_SIZE: writes buffered before a commit (default 100).
+        CHECKPOINT_FLUSH_INTERVAL: max seconds before a commit (default 1).
+        CHECKPOINT_COMPACT_INTERVAL: seconds between compactions (default 300,
+            0 disables the background compaction).
+        CHECKPOINT_FULL_EVERY: versions of a list channel between full copies
+            (default 8, 0 always stores full copies).
+        CHECKPOINT_COMPRESSION: "auto" (zstd if installed, else zlib), "zstd",
+            "zlib" or "off".
+    """
+    load_env()
+    path = path or os.environ.get("CHECKPOINT_DB")
+    if not path:
+        return MemorySaver(serde=get_checkpoint_serde())
+    if path == ":memory:":
+        return _sqlite_saver(path)
+    return _sqlite_saver(os.path.abspath(path))
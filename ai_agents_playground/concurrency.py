@@ -0,0 +1,366 @@
+import asyncio
+import logging
+import os
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Awaitable, Callable, Optional, TypeVar
+
+from logger_config import emit_event
+
+# Control de concurrencia adaptativo (AIMD).
+# El fan-out de Send() lanza todas las entrevistas a la vez; con muchos
+# analistas el endpoint responde 429 a todas juntas. Cada endpoint (LLM,
+# Tavily, Wikipedia) tiene un limitador que sube el número de llamadas en
+# vuelo de uno en uno mientras todo va bien y lo reduce a la mitad ante un 429
+# o una latencia por encima del objetivo, respetando Retry-After. Así el
+# throughput se queda en la capacidad real del endpoint.
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+def adaptive_concurrency_enabled() -> bool:
+    flag = os.environ.get("ADAPTIVE_CONCURRENCY", "0")
+    return flag.lower() in ("1", "on", "true", "yes")
+
+
+def client_retries() -> dict:
+    """ChatOpenAI keywords for the models called through ``call_limited``.
+
+    With adaptive concurrency on, 429s go back to the limiter instead of the
+    client's own retries.
+    """
+    return {"max_retries": 0} if adaptive_concurrency_enabled() else {}
+
+
+def _status_code(error: BaseException) -> Optional[int]:
+    # openai.APIStatusError and httpx errors expose it directly or on .response;
+    # aiohttp.ClientResponseError calls it .status
+    for source in (error, getattr(error, "response", None)):
+        for attribute in ("status_code", "status"):
+            status = getattr(source, attribute, None)
+            if isinstance(status, int):
+                return status
+    return None
+
+
+def _retry_after(error: BaseException) -> Optional[float]:
+    """Seconds requested by the Retry-After(-ms) header of a 429, if any."""
+    headers = getattr(error, "headers", None)
+    if headers is None:
+        headers = getattr(getattr(error, "response", None), "headers", None)
+    if not headers:
+        return None
+    try:
+        if headers.get("retry-after-ms"):
+            return float(headers["retry-after-ms"]) / 1000
+        value = headers.get("retry-after")
+        if not value:
+            return None
+        try:
+            return float(value)
+        except ValueError:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def is_rate_limited(error: BaseException) -> bool:
+    return _status_code(error) == 429
+
+
+class AdaptiveLimiter:
+    """Concurrency limit that adapts to the endpoint with AIMD.
+
+    Every successful call adds ``increase / limit`` to the limit (about one
+    more slot per full window of calls), or ``increase`` until the first
+    congestion so that a cold start reaches capacity quickly. A 429, or a call slower than
+    ``latency_target``, multiplies it by ``decrease``; calls started before the
+    last decrease do not decrease it again. A Retry-After header blocks new
+    calls until it expires. Works from threads and event loops at the same time.
+
+    Args:
+        name: Endpoint name, used in the metrics.
+        initial: Starting limit.
+        min_limit, max_limit: Bounds of the limit.
+        increase: Additive increase per window.
+        decrease: Multiplicative decrease factor.
+        latency_target: Seconds; slower calls count as congestion (0: off).
+        max_retries: Retries of a call answered with a 429.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        initial: float = 4,
+        min_limit: float = 1,
+        max_limit: float = 64,
+        increase: float = 1.0,
+        decrease: float = 0.5,
+        latency_target: float = 0.0,
+        max_retries: int = 6,
+    ):
+        self.name = name
+        self.limit = float(initial)
+        self.min_limit = float(min_limit)
+        self.max_limit = float(max_limit)
+        self.increase = increase
+        self.decrease = decrease
+        self.latency_target = latency_target
+        self.max_retries = max_retries
+
+        self._lock = threading.Lock()
+        self._condition = threading.Condition(self._lock)
+        self._async_waiters = []
+        self._blocked_until = 0.0
+        self._last_decrease = 0.0
+
+        self.in_flight = 0
+        self.waiting = 0
+        self.max_waiting = 0
+        self.completed = 0
+        self.throttled = 0
+        self.retries = 0
+
+    # --------------------------- slots ---------------------------
+    def _admit(self) -> Optional[float]:
+        """Take a slot (returns 0), or the seconds to wait (None: until a release)."""
+        blocked_for = self._blocked_until - time.monotonic()
+        if blocked_for > 0:
+            return blocked_for
+        if self.in_flight < max(1, int(self.limit)):
+            self.in_flight += 1
+            return 0
+        return None
+
+    def _queue(self, delta: int) -> None:
+        self.waiting += delta
+        self.max_waiting = max(self.max_waiting, self.waiting)
+
+    def _notify(self) -> None:
+        self._condition.notify_all()
+        waiters, self._async_waiters = self._async_waiters, []
+        for loop, future in waiters:
+            loop.call_soon_threadsafe(_wake, future)
+
+    def acquire(self) -> float:
+        """Wait for a slot; returns its start time."""
+        with self._condition:
+            wait = self._admit()
+            if wait != 0:
+                self._queue(1)
+                try:
+                    while wait != 0:
+                        self._condition.wait(wait)
+                        wait = self._admit()
+                finally:
+                    self._queue(-1)
+        return time.monotonic()
+
+    async def aacquire(self) -> float:
+        """Async version of acquire, never blocks the event loop."""
+        loop = asyncio.get_running_loop()
+        queued = False
+        try:
+            while True:
+                with self._lock:
+                    wait = self._admit()
+                    if wait == 0:
+                        return time.monotonic()
+                    if not queued:
+                        self._queue(1)
+                        queued = True
+                    future = loop.create_future()
+                    self._async_waiters.append((loop, future))
+                try:
+                    await asyncio.wait_for(future, wait)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            if queued:
+                with self._lock:
+                    self._queue(-1)
+
+    def release(
+        self,
+        started: float,
+        congested: bool = False,
+        retry_after: Optional[float] = None,
+    ) -> None:
+        """Free the slot taken at ``started`` and adapt the limit.
+
+        Args:
+            started: Value returned by acquire.
+            congested: The call got a 429 (or exceeded the latency target).
+            retry_after: Seconds every caller must wait before the next call.
+        """
+        now = time.monotonic()
+        latency = now - started
+        with self._condition:
+            self.in_flight -= 1
+            if self.latency_target and latency > self.latency_target:
+                congested = True
+            if retry_after:
+                self._blocked_until = max(self._blocked_until, now + retry_after)
+            if congested:
+                if started >= self._last_decrease:
+                    self.limit = max(self.min_limit, self.limit * self.decrease)
+                    self._last_decrease = now
+                    self._report("decrease", latency=latency, retry_after=retry_after)
+            else:
+                self.completed += 1
+                if self._last_decrease:
+                    step = self.increase / self.limit
+                else:
+                    # Slow start (doubling per window) until the first congestion
+                    step = self.increase
+                self.limit = min(self.max_limit, self.limit + step)
+            self._notify()
+
+    # --------------------------- calls ---------------------------
+    def _backoff(self, attempt: int, retry_after: Optional[float]) -> float:
+        if retry_after is not None:
+            return retry_after
+        # No Retry-After: exponential backoff with jitter, this caller only
+        return min(60.0, 2**attempt) * (0.5 + random.random() / 2)
+
+    def _throttled(self, started: float, error: BaseException, attempt: int) -> float:
+        """Release a slot answered with a 429; returns the wait before retrying."""
+        retry_after = _retry_after(error)
+        with self._lock:
+            self.throttled += 1
+            if attempt < self.max_retries:
+                self.retries += 1
+        self.release(started, congested=True, retry_after=retry_after)
+        return self._backoff(attempt, retry_after)
+
+    def call(self, fn: Callable[..., T], *args, **kwargs) -> T:
+        """Run ``fn`` inside a slot, retrying it on 429."""
+        for attempt in range(self.max_retries + 1):
+            started = self.acquire()
+            try:
+                result = fn(*args, **kwargs)
+            except Exception as e:
+                if not is_rate_limited(e):
+                    self.release(started)
+                    raise
+                delay = self._throttled(started, e, attempt)
+                if attempt == self.max_retries:
+                    raise
+                time.sleep(delay)
+            except BaseException:
+                self.release(started)
+                raise
+            else:
+                self.release(started)
+                return result
+
+    async def acall(self, fn: Callable[..., Awaitable[T]], *args, **kwargs) -> T:
+        """Async version of call, ``fn`` returns an awaitable."""
+        for attempt in range(self.max_retries + 1):
+            started = await self.aacquire()
+            try:
+                result = await fn(*args, **kwargs)
+            except Exception as e:
+                if not is_rate_limited(e):
+                    self.release(started)
+                    raise
+                delay = self._throttled(started, e, attempt)
+                if attempt == self.max_retries:
+                    raise
+                await asyncio.sleep(delay)
+            except BaseException:
+                # Cancelled while in flight
+                self.release(started)
+                raise
+            else:
+                self.release(started)
+                return result
+
+    # -------------------------- metrics --------------------------
+    def metrics(self) -> dict:
+        """Limit, calls in flight and queue depth of the endpoint."""
+        return {
+            "limiter": self.name,
+            "limit": round(self.limit, 2),
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "max_waiting": self.max_waiting,
+            "completed": self.completed,
+            "throttled": self.throttled,
+            "retries": self.retries,
+            "blocked_s": round(max(0.0, self._blocked_until - time.monotonic()), 3),
+        }
+
+    def _report(self, reason: str, **fields) -> None:
+        metrics = self.metrics()
+        logger.info(
+            f"{self.name}: limit {metrics['limit']}, {metrics['in_flight']} in flight, "
+            f"{metrics['waiting']} waiting ({reason})"
+        )
+        emit_event({"type": "concurrency", "reason": reason, **metrics, **fields})
+
+
+def _wake(future: asyncio.Future) -> None:
+    if not future.done():
+        future.set_result(None)
+
+
+def _env_float(name: str, limiter: str, default: float) -> float:
+    # ADAPTIVE_CONCURRENCY_MAX_TAVILY overrides ADAPTIVE_CONCURRENCY_MAX
+    value = os.environ.get(f"{name}_{limiter.upper()}", os.environ.get(name))
+    return float(value) if value else default
+
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+def get_limiter(name: str) -> AdaptiveLimiter:
+    """Process-wide limiter of an endpoint ("llm", "tavily", "wikipedia"...).
+
+    Variables (a ``_<NAME>`` suffix overrides them for one endpoint):
+        ADAPTIVE_CONCURRENCY_INITIAL: starting limit (default 4).
+        ADAPTIVE_CONCURRENCY_MAX: highest limit (default 64).
+        ADAPTIVE_CONCURRENCY_DECREASE: factor applied on congestion (default 0.5).
+        ADAPTIVE_LATENCY_TARGET: seconds above which a call counts as
+            congestion (default 0, only 429s count).
+        ADAPTIVE_MAX_RETRIES: retries of a call answered with a 429 (default 6).
+    """
+    with _limiters_lock:
+        if name not in _limiters:
+            _limiters[name] = AdaptiveLimiter(
+                name,
+                initial=_env_float("ADAPTIVE_CONCURRENCY_INITIAL", name, 4),
+                max_limit=_env_float("ADAPTIVE_CONCURRENCY_MAX", name, 64),
+                decrease=_env_float("ADAPTIVE_CONCURRENCY_DECREASE", name, 0.5),
+                latency_target=_env_float("ADAPTIVE_LATENCY_TARGET", name, 0),
+                max_retries=int(_env_float("ADAPTIVE_MAX_RETRIES", name, 6)),
+            )
+        return _limiters[name]
+
+
+def call_limited(name: str, fn: Callable[..., T], *args, **kwargs) -> T:
+    """``fn(*args, **kwargs)`` through the ``name`` limiter when ADAPTIVE_CONCURRENCY is on."""
+    if not adaptive_concurrency_enabled():
+        return fn(*args, **kwargs)
+    return get_limiter(name).call(fn, *args, **kwargs)
+
+
+async def acall_limited(
+    name: str, fn: Callable[..., Awaitable[T]], *args, **kwargs
+) -> T:
+    """Async version of call_limited."""
+    if not adaptive_concurrency_enabled():
+        return await fn(*args, **kwargs)
+    return await get_limiter(name).acall(fn, *args, **kwargs)
+
+
+def limiter_metrics() -> list:
+    """Metrics of every limiter in use, one dict per endpoint."""
+    with _limiters_lock:
+        limiters = list(_limiters.values())
+    return [limiter.metrics() for limiter in limiters]
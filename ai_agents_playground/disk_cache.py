@@ -0,0 +1,153 @@
+import os
+import sqlite3
+import threading
+import time
+from typing import Optional
+
+
+class DiskCache:
+    """SQLite-backed key/value store with size- and age-based eviction.
+
+    Entries are evicted least-recently-used first once ``max_entries`` or
+    ``max_bytes`` is exceeded, and are treated as missing once they are older
+    than ``max_age`` seconds. The store is safe to share between threads.
+
+    Args:
+        path: Location of the SQLite file. Parent folders are created.
+        table: Table name, so several caches can share one file.
+        max_entries: Maximum number of entries kept (None: unbounded).
+        max_bytes: Maximum total size of the stored values (None: unbounded).
+        max_age: Default time to live in seconds (None: never expires).
+    """
+
+    def __init__(
+        self,
+        path: str,
+        table: str = "entries",
+        max_entries: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+        max_age: Optional[float] = None,
+    ):
+        if not table.isidentifier():
+            raise ValueError(f"Invalid cache table name: {table!r}")
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+
+        self.path = path
+        self.table = table
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.hits = 0
+        self.misses = 0
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(f"""CREATE TABLE IF NOT EXISTS {table} (
+                key TEXT PRIMARY KEY,
+                value BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )""")
+        self._conn.execute(
+            f"CREATE INDEX IF NOT EXISTS {table}_accessed_at ON {table} (accessed_at)"
+        )
+        self._conn.commit()
+
+    def get(self, key: str, max_age: Optional[float] = None) -> Optional[bytes]:
+        """Return the value stored under ``key`` or None on a miss.
+
+        Args:
+            key: Cache key.
+            max_age: Overrides the default time to live for this lookup.
+        """
+        max_age = self.max_age if max_age is None else max_age
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT value, created_at FROM {self.table} WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None and max_age is not None and now - row[1] > max_age:
+                self._conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+                self._conn.commit()
+                row = None
+            if row is None:
+                self.misses += 1
+                return None
+            self._conn.execute(
+                f"UPDATE {self.table} SET accessed_at = ? WHERE key = ?", (now, key)
+            )
+            self._conn.commit()
+            self.hits += 1
+            return row[0]
+
+    def set(self, key: str, value: bytes) -> None:
+        """Store ``value`` under ``key`` and evict entries over the limits."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                f"""INSERT OR REPLACE INTO {self.table}
+                (key, value, size, created_at, accessed_at) VALUES (?, ?, ?, ?, ?)""",
+                (key, value, len(value), now, now),
+            )
+            self._evict(now)
+            self._conn.commit()
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+            self._conn.commit()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute(f"DELETE FROM {self.table}")
+            self._conn.commit()
+
+    def stats(self) -> dict:
+        """Return hit/miss counters together with the current size of the store."""
+        with self._lock:
+            entries, total_bytes = self._conn.execute(
+                f"SELECT COUNT(*), COALESCE(SUM(size), 0) FROM {self.table}"
+            ).fetchone()
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": entries,
+            "bytes": total_bytes,
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def _evict(self, now: float) -> None:
+        # Caller holds the lock and commits
+        if self.max_age is not None:
+            self._conn.execute(
+                f"DELETE FROM {self.table} WHERE created_at < ?", (now - self.max_age,)
+            )
+        if self.max_entries is None and self.max_bytes is None:
+            return
+
+        entries, total_bytes = self._conn.execute(
+            f"SELECT COUNT(*), COALESCE(SUM(size), 0) FROM {self.table}"
+        ).fetchone()
+        over_entries = entries - self.max_entries if self.max_entries is not None else 0
+        over_bytes = total_bytes - self.max_bytes if self.max_bytes is not None else 0
+        if over_entries <= 0 and over_bytes <= 0:
+            return
+
+        # Least recently used first
+        victims = []
+        for key, size in self._conn.execute(
+            f"SELECT key, size FROM {self.table} ORDER BY accessed_at ASC"
+        ):
+            if over_entries <= 0 and over_bytes <= 0:
+                break
+            victims.append((key,))
+            over_entries -= 1
+            over_bytes -= size
+        self._conn.executemany(f"DELETE FROM {self.table} WHERE key = ?", victims)
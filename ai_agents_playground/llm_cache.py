@@ -0,0 +1,139 @@
+import hashlib
+import json
+import os
+import warnings
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import lru_cache
+from typing import Any, Optional
+
+from langchain_core._api import LangChainBetaWarning
+from langchain_core.caches import RETURN_VAL_TYPE, BaseCache
+from langchain_core.load import dumps, loads
+
+from ai_agents_playground.disk_cache import DiskCache
+
+# Per-run switch: set through `bypass_llm_cache()` so it follows the current
+# context (LangGraph copies it into the worker threads of every node).
+_bypass: ContextVar[bool] = ContextVar("llm_cache_bypass", default=False)
+
+# Message fields that change between runs without changing the prompt
+_VOLATILE_MESSAGE_FIELDS = ("id", "response_metadata", "usage_metadata")
+
+
+def _normalize(value: Any) -> Any:
+    """Drop run-specific fields (message ids, usage, ...) from a serialized prompt."""
+    if isinstance(value, list):
+        return [_normalize(item) for item in value]
+    if isinstance(value, dict):
+        normalized = {k: _normalize(v) for k, v in value.items()}
+        if value.get("type") == "constructor" and isinstance(
+            normalized.get("kwargs"), dict
+        ):
+            for field in _VOLATILE_MESSAGE_FIELDS:
+                normalized["kwargs"].pop(field, None)
+        return normalized
+    return value
+
+
+def cache_key(prompt: str, llm_string: str) -> str:
+    """Content address of a chat call.
+
+    ``prompt`` is the serialized message list and ``llm_string`` the serialized
+    model (model name, base URL) plus the call parameters, which include the
+    structured-output schema and bound tools.
+    """
+    try:
+        normalized = json.dumps(_normalize(json.loads(prompt)), sort_keys=True)
+    except ValueError:
+        normalized = prompt
+    digest = hashlib.sha256()
+    digest.update(normalized.encode("utf-8"))
+    digest.update(b"\x00")
+    digest.update(llm_string.encode("utf-8"))
+    return digest.hexdigest()
+
+
+class PersistentLLMCache(BaseCache):
+    """LangChain cache that keeps chat generations on disk between runs.
+
+    Pass it as ``ChatOpenAI(cache=...)`` and every ``invoke``/``ainvoke``,
+    including ``with_structured_output`` calls, is looked up before reaching
+    the endpoint.
+    """
+
+    def __init__(self, store: DiskCache, bypass: bool = False):
+        self.store = store
+        self.bypass = bypass
+        self.bypassed = 0
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[RETURN_VAL_TYPE]:
+        if self.bypass or _bypass.get():
+            self.bypassed += 1
+            return None
+        raw = self.store.get(cache_key(prompt, llm_string))
+        if raw is None:
+            return None
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", LangChainBetaWarning)
+            return [loads(generation) for generation in json.loads(raw)]
+
+    def update(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE) -> None:
+        # Bypassed runs still refresh the stored answer
+        payload = json.dumps([dumps(generation) for generation in return_val])
+        self.store.set(cache_key(prompt, llm_string), payload.encode("utf-8"))
+
+    def clear(self, **kwargs: Any) -> None:
+        self.store.clear()
+
+    def stats(self) -> dict:
+        return {**self.store.stats(), "bypassed": self.bypassed}
+
+
+@contextmanager
+def bypass_llm_cache(enabled: bool = True):
+    """Skip cache lookups for every LLM call made inside the block.
+
+    Fresh answers are still written back, so a bypassed run refreshes the cache.
+    """
+    token = _bypass.set(enabled)
+    try:
+        yield
+    finally:
+        _bypass.reset(token)
+
+
+def _env_number(name: str, default: Optional[float]) -> Optional[float]:
+    value = os.environ.get(name)
+    if value is None or value == "":
+        return default
+    number = float(value)
+    return number if number > 0 else None
+
+
+@lru_cache(maxsize=None)
+def get_llm_cache() -> Optional[PersistentLLMCache]:
+    """Process-wide LLM cache configured from the environment.
+
+    Variables:
+        LLM_CACHE: "off" disables the cache.
+        LLM_CACHE_PATH: SQLite file (default .cache/llm_cache.sqlite).
+        LLM_CACHE_MAX_ENTRIES: default 10000, 0 for unbounded.
+        LLM_CACHE_MAX_BYTES: default 512 MB, 0 for unbounded.
+        LLM_CACHE_MAX_AGE: seconds, default 7 days, 0 for no expiry.
+        LLM_CACHE_BYPASS: "1" skips lookups for the whole process.
+    """
+    if os.environ.get("LLM_CACHE", "on").lower() in ("0", "off", "false"):
+        return None
+
+    max_entries = _env_number("LLM_CACHE_MAX_ENTRIES", 10_000)
+    max_bytes = _env_number("LLM_CACHE_MAX_BYTES", 512 * 1024 * 1024)
+    store = DiskCache(
+        os.environ.get("LLM_CACHE_PATH", os.path.join(".cache", "llm_cache.sqlite")),
+        table="llm_responses",
+        max_entries=int(max_entries) if max_entries else None,
+        max_bytes=int(max_bytes) if max_bytes else None,
+        max_age=_env_number("LLM_CACHE_MAX_AGE", 7 * 24 * 3600),
+    )
+    bypass = os.environ.get("LLM_CACHE_BYPASS", "").lower() in ("1", "on", "true")
+    return PersistentLLMCache(store, bypass=bypass)
@@ -0,0 +1,323 @@
+import asyncio
+import gzip
+import importlib.util
+import json
+import logging
+import os
+import threading
+import weakref
+from functools import lru_cache
+from typing import TYPE_CHECKING, Optional
+
+import httpx
+from dotenv import find_dotenv, load_dotenv
+
+if TYPE_CHECKING:
+    from langchain_openai import ChatOpenAI
+
+# langchain_openai and openai are imported inside the factories: they are the
+# heaviest imports of the project and only needed once a model is built.
+
+logger = logging.getLogger(__name__)
+
+
+def _env_flag(name: str, default: str = "0") -> bool:
+    return os.environ.get(name, default).lower() in ("1", "on", "true", "yes")
+
+
+def _pool_settings() -> dict:
+    """Connection pool settings shared by every chat model.
+
+    Variables:
+        LLM_MAX_CONNECTIONS: open connections per client (default 100).
+        LLM_MAX_KEEPALIVE: idle connections kept alive (default 20).
+        LLM_KEEPALIVE_EXPIRY: seconds an idle connection is kept (default 120).
+        LLM_HTTP2: "auto" (default, on when the h2 package is installed), on, off.
+        LLM_COMPRESS_REQUESTS: gzip request bodies (default off, the endpoint
+            must accept Content-Encoding: gzip).
+        LLM_TIMEOUT: request timeout in seconds (default 600).
+    """
+    http2 = os.environ.get("LLM_HTTP2", "auto").lower()
+    h2_available = importlib.util.find_spec("h2") is not None
+    if http2 == "auto":
+        http2_enabled = h2_available
+    else:
+        http2_enabled = http2 in ("1", "on", "true", "yes")
+        if http2_enabled and not h2_available:
+            logger.warning(
+                "LLM_HTTP2 is on but the h2 package is missing, using HTTP/1.1"
+            )
+            http2_enabled = False
+
+    return {
+        "limits": httpx.Limits(
+            max_connections=int(os.environ.get("LLM_MAX_CONNECTIONS", 100)),
+            max_keepalive_connections=int(os.environ.get("LLM_MAX_KEEPALIVE", 20)),
+            keepalive_expiry=float(os.environ.get("LLM_KEEPALIVE_EXPIRY", 120)),
+        ),
+        "http2": http2_enabled,
+        "compress": _env_flag("LLM_COMPRESS_REQUESTS"),
+        "timeout": float(os.environ.get("LLM_TIMEOUT", 600)),
+    }
+
+
+# Bodies smaller than this are not worth compressing
+COMPRESS_MIN_BYTES = 1024
+
+
+def _compressed(request: httpx.Request) -> httpx.Request:
+    body = request.content
+    if len(body) < COMPRESS_MIN_BYTES or "content-encoding" in request.headers:
+        return request
+    headers = httpx.Headers(request.headers)
+    payload = gzip.compress(body, compresslevel=5)
+    headers["Content-Encoding"] = "gzip"
+    headers["Content-Length"] = str(len(payload))
+    return httpx.Request(
+        request.method,
+        request.url,
+        headers=headers,
+        content=payload,
+        extensions=request.extensions,
+    )
+
+
+class GzipTransport(httpx.BaseTransport):
+    """Transport that gzips request bodies before handing them to the pool."""
+
+    def __init__(self, transport: httpx.BaseTransport):
+        self._transport = transport
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        request.read()
+        return self._transport.handle_request(_compressed(request))
+
+    def close(self) -> None:
+        self._transport.close()
+
+
+class AsyncGzipTransport(httpx.AsyncBaseTransport):
+    """Async version of GzipTransport."""
+
+    def __init__(self, transport: httpx.AsyncBaseTransport):
+        self._transport = transport
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        await request.aread()
+        return await self._transport.handle_async_request(_compressed(request))
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
+
+
+class LoopLocalTransport(httpx.AsyncBaseTransport):
+    """Async transport with one connection pool per event loop.
+
+    Async connections belong to the loop that opens them: reusing them from
+    another loop (a second ``asyncio.run``, a Streamlit rerun, a batch job)
+    fails with "Event loop is closed". Each loop gets its own pool, dropped
+    together with the loop.
+    """
+
+    def __init__(self, factory):
+        self._factory = factory
+        self._transports = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+
+    def _transport(self) -> httpx.AsyncBaseTransport:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            transport = self._transports.get(loop)
+            if transport is None:
+                transport = self._transports[loop] = self._factory()
+        return transport
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        return await self._transport().handle_async_request(request)
+
+    async def aclose(self) -> None:
+        with self._lock:
+            transport = self._transports.pop(asyncio.get_running_loop(), None)
+        if transport is not None:
+            await transport.aclose()
+
+
+@lru_cache(maxsize=None)
+def get_http_client() -> httpx.Client:
+    """Process-wide HTTP client (and connection pool) for sync LLM calls."""
+    from openai import DefaultHttpxClient
+
+    settings = _pool_settings()
+    transport = httpx.HTTPTransport(limits=settings["limits"], http2=settings["http2"])
+    if settings["compress"]:
+        transport = GzipTransport(transport)
+    return DefaultHttpxClient(transport=transport, timeout=settings["timeout"])
+
+
+@lru_cache(maxsize=None)
+def get_async_http_client() -> httpx.AsyncClient:
+    """Process-wide HTTP client for async LLM calls, one pool per event loop."""
+    from openai import DefaultAsyncHttpxClient
+
+    settings = _pool_settings()
+
+    def pool() -> httpx.AsyncBaseTransport:
+        transport = httpx.AsyncHTTPTransport(
+            limits=settings["limits"], http2=settings["http2"]
+        )
+        if settings["compress"]:
+            transport = AsyncGzipTransport(transport)
+        return transport
+
+    transport = LoopLocalTransport(pool)
+    return DefaultAsyncHttpxClient(transport=transport, timeout=settings["timeout"])
+
+
+def warm_up(base_url: str, timeout: float = 5.0) -> bool:
+    """Open a pooled connection to the endpoint (DNS, TCP and TLS handshake).
+
+    A cheap ``GET /models`` is enough: whatever the status code, the connection
+    stays in the keep-alive pool for the first real request.
+    """
+    api_key = os.environ.get("OPENAI_API_KEY", "")
+    try:
+        get_http_client().get(
+            f"{base_url.rstrip('/')}/models",
+            headers={"Authorization": f"Bearer {api_key}"},
+            timeout=timeout,
+        )
+    except httpx.HTTPError as e:
+        logger.warning(f"LLM warm-up request failed: {e}")
+        return False
+    return True
+
+
+_warmed_up = set()
+_warm_up_lock = threading.Lock()
+
+
+def _maybe_warm_up(base_url: str) -> None:
+    """Warm up every endpoint once, in the background, when LLM_WARMUP is on."""
+    if not base_url or not _env_flag("LLM_WARMUP"):
+        return
+    with _warm_up_lock:
+        if base_url in _warmed_up:
+            return
+        _warmed_up.add(base_url)
+    threading.Thread(target=warm_up, args=(base_url,), daemon=True).start()
+
+
+@lru_cache(maxsize=None)
+def load_env() -> None:
+    """Load the nearest .env file once per process."""
+    _ = load_dotenv(find_dotenv())
+
+
+# ===================== Model profiles per node =====================
+# Cada nodo puede usar su propio modelo: la extracción de consultas y el
+# enrutado en uno pequeño y rápido, la redacción larga en el grande. Un perfil
+# fija model, base_url, max_tokens, temperature y timeout; lo que no fija sale
+# de ORCHESTATOR_MODEL / ORCHESTATOR_BASE_URL y de los valores de ChatOpenAI.
+#
+#   LLM_PROFILES_FILE=profiles.json
+#       {"default": {"temperature": 0},
+#        "search_query": {"model": "gpt-4o-mini", "max_tokens": 64, "timeout": 10},
+#        "write_report": {"model": "gpt-4o", "max_tokens": 4000}}
+#
+#   LLM_MODEL_SEARCH_QUERY=gpt-4o-mini  (LLM_<KEY>_<NODE>, gana sobre el fichero)
+PROFILE_KEYS = {
+    "model": str,
+    "base_url": str,
+    "max_tokens": int,
+    "temperature": float,
+    "timeout": float,
+}
+
+
+def _profile_value(key: str, value, source: str):
+    """``value`` cast to the type of ``key``, for the file and the variables alike."""
+    cast = PROFILE_KEYS[key]
+    # Through str, as variables are: 64.5 is not an int, true is not a number
+    if value is not None and not isinstance(value, (bool, list, dict)):
+        try:
+            return cast(str(value))
+        except ValueError:
+            pass
+    raise ValueError(f"{source}: {key} must be {cast.__name__}, got {value!r}")
+
+
+@lru_cache(maxsize=None)
+def _profiles_file(path: str) -> dict:
+    with open(path, encoding="utf-8") as f:
+        profiles = json.load(f)
+    for node, profile in profiles.items():
+        unknown = set(profile) - set(PROFILE_KEYS)
+        if unknown:
+            raise ValueError(f"{path}: unknown keys {sorted(unknown)} for {node!r}")
+        profiles[node] = {
+            key: _profile_value(key, value, f"{path} ({node})")
+            for key, value in profile.items()
+        }
+    return profiles
+
+
+def model_profile(node: Optional[str] = None) -> dict:
+    """Chat model settings of ``node``: its profile over the "default" one.
+
+    Profiles come from the JSON file in LLM_PROFILES_FILE, keyed by node name,
+    and from LLM_<KEY>_<NODE> variables (LLM_MAX_TOKENS_WRITE_REPORT=4000),
+    which take precedence. Only the keys of PROFILE_KEYS are accepted, and
+    values from both are cast to their type (ValueError when they cannot be).
+    """
+    path = os.environ.get("LLM_PROFILES_FILE")
+    profiles = _profiles_file(path) if path else {}
+    profile = dict(profiles.get("default", {}))
+    if node:
+        profile.update(profiles.get(node, {}))
+        for key in PROFILE_KEYS:
+            name = f"LLM_{key.upper()}_{node.upper()}"
+            value = os.environ.get(name)
+            if value:
+                profile[key] = _profile_value(key, value, name)
+    return profile
+
+
+def get_chat_model(node: Optional[str] = None, **kwargs) -> "ChatOpenAI":
+    """Build a ChatOpenAI that shares the process-wide connection pool.
+
+    ``node`` selects its model profile (see ``model_profile``). ``base_url``
+    and ``model`` default to ORCHESTATOR_BASE_URL and ORCHESTATOR_MODEL. Any
+    other keyword (``cache``, ``temperature`` ...) is passed through to
+    ChatOpenAI and wins over the profile.
+    """
+    from langchain_openai import ChatOpenAI
+
+    load_env()
+
+    for key, value in model_profile(node).items():
+        kwargs.setdefault(key, value)
+    kwargs.setdefault("base_url", os.environ["ORCHESTATOR_BASE_URL"])
+    kwargs.setdefault("model", os.environ["ORCHESTATOR_MODEL"])
+    _maybe_warm_up(kwargs["base_url"])
+    return ChatOpenAI(
+        http_client=get_http_client(),
+        http_async_client=get_async_http_client(),
+        **kwargs,
+    )
+
+
+def get_llm(node: Optional[str] = None, **overrides) -> "ChatOpenAI":
+    """Chat model of ``node`` backed by the persistent LLM cache.
+
+    Built on first use, so importing a graph stays cheap, and then reused for
+    the same ``node`` and ``overrides``. ``overrides`` are ChatOpenAI keywords
+    (``max_retries=0`` ...) and win over the node profile.
+    """
+    return _get_llm(node, tuple(sorted(overrides.items())))
+
+
+@lru_cache(maxsize=None)
+def _get_llm(node: Optional[str], overrides: tuple) -> "ChatOpenAI":
+    from ai_agents_playground.llm_cache import get_llm_cache
+
+    return get_chat_model(node=node, cache=get_llm_cache(), **dict(overrides))
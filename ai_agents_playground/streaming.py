@@ -0,0 +1,48 @@
+from typing import Iterator, Optional, Tuple
+
+from langchain_core.messages import AIMessage, AIMessageChunk, ToolMessage
+
+# Events yielded by stream_agent_events:
+#   ("token", str)              text chunk of the assistant message being generated
+#   ("tool_call", dict)         complete tool call {"name", "args", "id"}
+#   ("tool_result", ToolMessage)
+#   ("message_end", AIMessage)  an assistant message is complete
+AgentEvent = Tuple[str, object]
+
+
+def stream_agent_events(
+    graph, inputs: dict, config: Optional[dict] = None
+) -> Iterator[AgentEvent]:
+    """Stream a ReAct graph run as tokens and tool steps, in arrival order.
+
+    Uses ``stream_mode=["messages", "updates"]``: "messages" carries the LLM
+    tokens as they are generated and "updates" the complete messages returned
+    by each node (tool calls, tool results). Models that do not stream still
+    produce their text, in one single "token" event.
+    """
+    streamed = False
+    for mode, payload in graph.stream(
+        inputs, config, stream_mode=["messages", "updates"]
+    ):
+        if mode == "messages":
+            chunk, _ = payload
+            if isinstance(chunk, AIMessageChunk) and isinstance(chunk.content, str):
+                if chunk.content:
+                    streamed = True
+                    yield "token", chunk.content
+            continue
+
+        for update in payload.values():
+            if not isinstance(update, dict):
+                continue  # interrupts
+            for message in update.get("messages", []):
+                if isinstance(message, AIMessage):
+                    if not streamed and isinstance(message.content, str):
+                        if message.content:
+                            yield "token", message.content
+                    for tool_call in message.tool_calls:
+                        yield "tool_call", tool_call
+                    yield "message_end", message
+                    streamed = False
+                elif isinstance(message, ToolMessage):
+                    yield "tool_result", message
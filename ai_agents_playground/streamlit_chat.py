@@ -0,0 +1,115 @@
+import os
+import threading
+import uuid
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import Callable, Optional
+
+import streamlit as st
+
+from ai_agents_playground.llm_client import load_env
+from ai_agents_playground.streaming import stream_agent_events
+
+
+def render_agent_reply(graph, inputs: dict, config=None) -> str:
+    """Render a ReAct graph run in the current chat message while it streams.
+
+    Assistant text is written token by token and every tool call shows up as
+    a status box that is completed when the tool returns.
+
+    Returns:
+        str: Text of the last assistant message (the final answer).
+    """
+    answer = ""
+    text = ""
+    placeholder = st.empty()
+    tool_steps = {}
+
+    for kind, value in stream_agent_events(graph, inputs, config):
+        if kind == "token":
+            text += value
+            placeholder.markdown(text + "▌")
+        elif kind == "message_end":
+            placeholder.markdown(text)
+            answer = text
+            if value.tool_calls:
+                # Text after the tools goes below their status boxes
+                text = ""
+                placeholder = st.empty()
+        elif kind == "tool_call":
+            status = st.status(f"🔧 {value['name']}", state="running")
+            status.write(value["args"])
+            tool_steps[value["id"]] = status
+        elif kind == "tool_result":
+            status = tool_steps.pop(value.tool_call_id, None)
+            if status is not None:
+                status.write(value.content)
+                status.update(state="error" if value.status == "error" else "complete")
+
+    return answer
+
+
+# ===================== Multi-user serving =====================
+# Streamlit runs every browser session in its own thread of the same process,
+# so the compiled graph and the run limiter are shared process-wide while the
+# conversation (thread id) belongs to the session.
+
+
+class RunLimiter:
+    """Bounded number of concurrent graph runs; the rest wait in line."""
+
+    def __init__(self, max_runs: int):
+        self.max_runs = max_runs
+        self._semaphore = threading.BoundedSemaphore(max_runs)
+        self._lock = threading.Lock()
+        self.waiting = 0
+
+    @contextmanager
+    def slot(self, on_wait: Optional[Callable[[int], None]] = None):
+        """Hold a run slot for the duration of the block.
+
+        Args:
+            on_wait: called with the number of queued runs when no slot is
+                free right away.
+        """
+        if not self._semaphore.acquire(blocking=False):
+            with self._lock:
+                self.waiting += 1
+                position = self.waiting
+            if on_wait is not None:
+                on_wait(position)
+            try:
+                self._semaphore.acquire()
+            finally:
+                with self._lock:
+                    self.waiting -= 1
+        try:
+            yield
+        finally:
+            self._semaphore.release()
+
+
+@lru_cache(maxsize=None)
+def get_run_limiter() -> RunLimiter:
+    """Process-wide limiter, sized with MAX_CONCURRENT_AGENT_RUNS (default 4)."""
+    load_env()
+    return RunLimiter(int(os.environ.get("MAX_CONCURRENT_AGENT_RUNS", 4)))
+
+
+def session_thread_id() -> str:
+    """Checkpointer thread id of the current browser session."""
+    if "thread_id" not in st.session_state:
+        st.session_state.thread_id = uuid.uuid4().hex
+    return st.session_state.thread_id
+
+
+def run_agent_turn(graph, inputs: dict, config=None) -> str:
+    """render_agent_reply inside a run slot, showing the queue while waiting."""
+    notice = st.empty()
+
+    def on_wait(position: int):
+        notice.info(f"⏳ Servidor ocupado, esperando turno ({position} en cola) ...")
+
+    with get_run_limiter().slot(on_wait):
+        notice.empty()
+        return render_agent_reply(graph, inputs, config)
@@ -1,10 +1,18 @@
 import streamlit as st
+
 # from agents.action_002_agents_edge_memory_tools import build_agent_graph
 from agents.action_003_agents_chat_math_weather import build_agent_graph
+from ai_agents_playground.streamlit_chat import run_agent_turn, session_thread_id
 from langchain_core.messages import HumanMessage
 
-# Init the agent
-react_graph = build_agent_graph()
+
+# Init the agent: compiled once per server process and shared by every session
+@st.cache_resource
+def get_agent_graph():
+    return build_agent_graph()
+
+
+react_graph = get_agent_graph()
 
 # Init chat session
 if "chat_history" not in st.session_state:
@@ -12,25 +20,26 @@ if "chat_history" not in st.session_state:
 
 st.title("🤖 Chat con Agente IA")
 
+# History chat
+for role, content in st.session_state.chat_history:
+    with st.chat_message(role):
+        st.markdown(content)
+
 # User input
 user_input = st.chat_input("Escribe tu mensaje")
 
-config = {"configurable": {"thread_id": "1"}}
+# One conversation (checkpointer thread) per browser session
+config = {"configurable": {"thread_id": session_thread_id()}}
 
 if user_input:
     st.session_state.chat_history.append(("user", user_input))
+    with st.chat_message("user"):
+        st.markdown(user_input)
+
     print("Invocando el agente ...")
-    # Invoke the agent
+    # Stream the agent once a run slot is free (MAX_CONCURRENT_AGENT_RUNS)
     messages = [HumanMessage(content=user_input)]
-    result = react_graph.invoke({"messages": messages},config)
-    print("... resuesta exitosa.")
-    print("Obteniendo respuesta ...")
-    # Get response
-    assistant_response = result["messages"][-1].content
+    with st.chat_message("assistant"):
+        assistant_response = run_agent_turn(react_graph, {"messages": messages}, config)
     print("... respuesta obtenida con exito.")
     st.session_state.chat_history.append(("assistant", assistant_response))
-
-# History chat
-for role, content in st.session_state.chat_history:
-    with st.chat_message(role):
-        st.markdown(content)
\ No newline at end of file
@@ -0,0 +1,100 @@
+"""Cold-start benchmark: how long does importing each entry module take?
+
+Every module is imported in a fresh interpreter with ``python -X importtime``
+so nothing is shared between measurements. Usage::
+
+    python -m benchmarks.import_time
+    python -m benchmarks.import_time --repeat 5 --max-ms 1500
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+MODULES = [
+    "agents.action_001_agents_edge_nonmemory_tools",
+    "agents.action_003_agents_chat_math_weather",
+    "projects.research_automation_multiagent.ai_analyst_generator",
+    "projects.research_automation_multiagent.ai_interview_generator",
+    "projects.research_automation_multiagent.ai_research_assistant",
+]
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Imports must not need real credentials
+DUMMY_ENV = {
+    "OPENAI_API_KEY": "benchmark",
+    "ORCHESTATOR_BASE_URL": "http://127.0.0.1:9/v1",
+    "ORCHESTATOR_MODEL": "benchmark",
+}
+
+
+def import_time_ms(module: str) -> tuple[float, list[tuple[float, str]]]:
+    """Cumulative import time of ``module`` and its heaviest direct imports."""
+    env = {**DUMMY_ENV, **os.environ}
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr[-2000:]}")
+
+    total = None
+    entries = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        try:
+            _, cumulative, name = line[len("import time:") :].split("|")
+            cumulative_ms = int(cumulative) / 1000
+        except ValueError:
+            continue  # header
+        # One space after the bar for top-level imports, more when nested
+        name = name[1:]
+        entries.append((cumulative_ms, name))
+        if name == module:
+            total = cumulative_ms
+    # Direct dependencies are indented by two spaces
+    direct = [
+        (ms, name.strip())
+        for ms, name in entries
+        if name.startswith("  ") and not name.startswith("   ")
+    ]
+    return total or 0.0, sorted(direct, reverse=True)[:6]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("modules", nargs="*", default=MODULES)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument(
+        "--max-ms", type=float, help="Exit with an error if any module is slower"
+    )
+    parser.add_argument("--verbose", action="store_true", help="Show heaviest imports")
+    args = parser.parse_args(argv)
+
+    slow = []
+    print(f"{'module':<70} {'median ms':>10}")
+    for module in args.modules:
+        runs = [import_time_ms(module) for _ in range(args.repeat)]
+        median = statistics.median(total for total, _ in runs)
+        print(f"{module:<70} {median:>10.1f}")
+        if args.verbose:
+            for ms, name in runs[-1][1]:
+                print(f"    {name:<66} {ms:>10.1f}")
+        if args.max_ms is not None and median > args.max_ms:
+            slow.append(module)
+
+    if slow:
+        print(f"Slower than {args.max_ms} ms: {', '.join(slow)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
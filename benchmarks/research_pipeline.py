@@ -0,0 +1,575 @@
+"""Offline end-to-end benchmark of the research pipeline.
+
+A local OpenAI-compatible server stands in for the LLM and Tavily/Wikipedia
+are stubbed, both with configurable latency and payload size, so the whole
+``ai_research_assistant`` graph runs without any external service. Every
+cell of the max_analysts x max_num_turns matrix runs in a fresh interpreter
+(clean caches, meaningful peak RSS). Usage::
+
+    python -m benchmarks.research_pipeline
+    python -m benchmarks.research_pipeline --analysts 2 4 8 --turns 1 2 \\
+        --llm-latency-ms 50 --search-latency-ms 100 --json results.json
+"""
+
+import argparse
+import asyncio
+import contextlib
+import hashlib
+import io
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+# ===================== Fake OpenAI-compatible server =====================
+def _instance(schema: dict, defs: dict, array_items: int, counter: list):
+    """Smallest valid instance of a JSON schema (the subset pydantic emits)."""
+    if "$ref" in schema:
+        return _instance(
+            defs[schema["$ref"].split("/")[-1]], defs, array_items, counter
+        )
+    if "anyOf" in schema:
+        return _instance(schema["anyOf"][0], defs, array_items, counter)
+    kind = schema.get("type")
+    if kind == "object":
+        return {
+            name: _instance(prop, defs, array_items, counter)
+            for name, prop in schema.get("properties", {}).items()
+        }
+    if kind == "array":
+        return [
+            _instance(schema["items"], defs, array_items, counter)
+            for _ in range(array_items)
+        ]
+    if kind in ("integer", "number"):
+        return 1
+    if kind == "boolean":
+        return True
+    if kind == "null":
+        return None
+    counter[0] += 1
+    return f"benchmark value {counter[0]}"
+
+
+class FakeOpenAIServer:
+    """Answers /v1/chat/completions with canned text or schema-valid JSON.
+
+    Args:
+        latency: Seconds every completion takes.
+        completion_words: Words of every free-text completion.
+        array_items: Items of every array in structured outputs (analysts).
+        capacity: Completions served at the same time; past it the server
+            answers 429 with a Retry-After header (0: unlimited).
+        model_latency: Seconds per completion of specific models, overriding
+            ``latency`` (model profiles, see llm_client.model_profile).
+
+    Prompt caching is simulated like OpenAI does it: prompts of at least
+    1024 tokens reuse the longest prefix already seen, in 128-token blocks,
+    reported as ``prompt_tokens_details.cached_tokens``.
+    """
+
+    # Prompt cache granularity and minimum prompt size, in characters (4 per token)
+    CACHE_BLOCK_CHARS = 128 * 4
+    CACHE_MIN_CHARS = 1024 * 4
+
+    def __init__(
+        self,
+        latency=0.0,
+        completion_words=200,
+        array_items=3,
+        capacity=0,
+        model_latency=None,
+    ):
+        self.latency = latency
+        self.model_latency = model_latency or {}
+        self.calls_by_model = defaultdict(int)
+        self.completion_words = completion_words
+        self.array_items = array_items
+        self.capacity = capacity
+        self.in_flight = 0
+        self.rate_limited = 0
+        self.calls = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.cached_tokens = 0
+        self._prefixes = set()
+        self._lock = threading.Lock()
+        self._counter = [0]
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_address[1]}/v1"
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def admit(self) -> bool:
+        with self._lock:
+            if self.capacity and self.in_flight >= self.capacity:
+                self.rate_limited += 1
+                return False
+            self.in_flight += 1
+            return True
+
+    def done(self) -> None:
+        with self._lock:
+            self.in_flight -= 1
+
+    def _cached_chars(self, prompt: str) -> int:
+        """Characters of ``prompt`` already cached, then cache its prefixes."""
+        if len(prompt) < self.CACHE_MIN_CHARS:
+            return 0
+        digest = hashlib.blake2b()
+        blocks = []
+        for end in range(
+            self.CACHE_BLOCK_CHARS, len(prompt) + 1, self.CACHE_BLOCK_CHARS
+        ):
+            digest.update(prompt[end - self.CACHE_BLOCK_CHARS : end].encode())
+            blocks.append((end, digest.copy().hexdigest()))
+        with self._lock:
+            cached = 0
+            for end, key in blocks:
+                if key not in self._prefixes:
+                    break
+                cached = end
+            self._prefixes.update(key for _, key in blocks)
+        return cached if cached >= self.CACHE_MIN_CHARS else 0
+
+    def completion(self, body: dict) -> dict:
+        response_format = body.get("response_format") or {}
+        if response_format.get("type") == "json_schema":
+            schema = response_format["json_schema"]["schema"]
+            with self._lock:
+                value = _instance(
+                    schema, schema.get("$defs", {}), self.array_items, self._counter
+                )
+            content = json.dumps(value)
+        else:
+            words = " ".join(["insight"] * max(self.completion_words - 4, 1))
+            content = f"## Benchmark section\n\n{words} [1]\n\n### Sources\n[1] https://example.com"
+
+        prompt = json.dumps(body.get("messages", []))
+        usage = {
+            "prompt_tokens": len(prompt) // 4,
+            "completion_tokens": len(content) // 4,
+            "prompt_tokens_details": {"cached_tokens": self._cached_chars(prompt) // 4},
+        }
+        usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+        with self._lock:
+            self.calls += 1
+            self.calls_by_model[body.get("model")] += 1
+            self.prompt_tokens += usage["prompt_tokens"]
+            self.completion_tokens += usage["completion_tokens"]
+            self.cached_tokens += usage["prompt_tokens_details"]["cached_tokens"]
+        return {
+            "id": f"chatcmpl-{uuid.uuid4().hex}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "benchmark"),
+            "choices": [
+                {
+                    "index": 0,
+                    "message": {"role": "assistant", "content": content},
+                    "finish_reason": "stop",
+                    "logprobs": None,
+                }
+            ],
+            "usage": usage,
+        }
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _send(self, status: int, payload: dict, headers=()):
+                data = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                for name, value in headers:
+                    self.send_header(name, value)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                self._send(200, {"object": "list", "data": [{"id": "benchmark"}]})
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                body = json.loads(self.rfile.read(length) or b"{}")
+                if not self.path.endswith("/chat/completions"):
+                    self._send(404, {"error": {"message": self.path}})
+                    return
+                if not server.admit():
+                    self._send(
+                        429,
+                        {"error": {"message": "Rate limit", "type": "rate_limit"}},
+                        headers=[("Retry-After", "0.2")],
+                    )
+                    return
+                try:
+                    time.sleep(
+                        server.model_latency.get(body.get("model"), server.latency)
+                    )
+                    completion = server.completion(body)
+                finally:
+                    server.done()
+                if not body.get("stream"):
+                    self._send(200, completion)
+                    return
+                # Server-sent events: the whole content in one chunk
+                choice = completion["choices"][0]
+                chunks = [
+                    {
+                        "delta": {
+                            "role": "assistant",
+                            "content": choice["message"]["content"],
+                        }
+                    },
+                    {"delta": {}, "finish_reason": "stop"},
+                ]
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Connection", "close")
+                self.end_headers()
+                for chunk in chunks:
+                    event = {
+                        **completion,
+                        "object": "chat.completion.chunk",
+                        "choices": [{"index": 0, "finish_reason": None, **chunk}],
+                    }
+                    self.wfile.write(f"data: {json.dumps(event)}\n\n".encode())
+                self.wfile.write(b"data: [DONE]\n\n")
+                self.close_connection = True
+
+        return Handler
+
+
+# ===================== Retrieval stubs =====================
+def stub_retrieval(interview_module, latency: float, payload_bytes: int) -> None:
+    """Replace Tavily and Wikipedia in the interview graph with local stubs."""
+    from langchain_core.documents import Document
+    from projects.research_automation_multiagent.retrieval import TAVILY_MAX_RESULTS
+
+    payload = ("benchmark payload " * (payload_bytes // 18 + 1))[:payload_bytes]
+
+    # Every query finds its own documents, as real searches do: the context of
+    # an interview grows turn after turn and prompts differ between analysts
+    def content(query, i):
+        return f"Result {i} for {query}. {payload}"[:payload_bytes]
+
+    def web_docs(query):
+        return [
+            {"url": f"https://example.com/{i}", "content": content(query, i)}
+            for i in range(TAVILY_MAX_RESULTS)
+        ]
+
+    def wikipedia_docs(query, load_max_docs):
+        return [
+            Document(page_content=content(query, i), metadata={"source": f"wiki/{i}"})
+            for i in range(load_max_docs)
+        ]
+
+    def web(query):
+        time.sleep(latency)
+        return web_docs(query)
+
+    def wikipedia(query, load_max_docs=2):
+        time.sleep(latency)
+        return wikipedia_docs(query, load_max_docs)
+
+    async def aweb(query):
+        await asyncio.sleep(latency)
+        return web_docs(query)
+
+    async def awikipedia(query, load_max_docs=2):
+        await asyncio.sleep(latency)
+        return wikipedia_docs(query, load_max_docs)
+
+    interview_module.search_web_docs = web
+    interview_module.asearch_web_docs = aweb
+    interview_module.load_wikipedia = wikipedia
+    interview_module.aload_wikipedia = awikipedia
+
+
+# ===================== Per-node timings =====================
+class NodeTimer(BaseCallbackHandler):
+    """Wall time of every graph node run, from the LangChain callbacks."""
+
+    run_inline = True
+
+    def __init__(self):
+        self.started = {}
+        self.durations = defaultdict(list)
+
+    def on_chain_start(self, serialized, inputs, *, run_id, metadata=None, **kwargs):
+        node = (metadata or {}).get("langgraph_node")
+        if node and kwargs.get("name") == node:
+            self.started[run_id] = (node, time.perf_counter())
+
+    def on_chain_end(self, outputs, *, run_id, **kwargs):
+        if run_id in self.started:
+            node, start = self.started.pop(run_id)
+            self.durations[node].append(time.perf_counter() - start)
+
+    def on_chain_error(self, error, *, run_id, **kwargs):
+        self.on_chain_end(None, run_id=run_id)
+
+
+# ===================== One cell, in the child process =====================
+def run_cell(args) -> dict:
+    with FakeOpenAIServer(
+        latency=args.llm_latency_ms / 1000,
+        completion_words=args.completion_words,
+        array_items=args.max_analysts,
+        capacity=args.llm_capacity,
+        model_latency={
+            model: float(ms) / 1000
+            for model, ms in (item.split("=", 1) for item in args.model_latency)
+        },
+    ) as server:
+        os.environ.update(
+            {
+                "OPENAI_API_KEY": "benchmark",
+                "ORCHESTATOR_BASE_URL": server.base_url,
+                "ORCHESTATOR_MODEL": "benchmark",
+                "LLM_CACHE": "off",
+                "RETRIEVAL_CACHE": "off",
+                "DOCUMENT_STORE_PATH": os.path.join(
+                    tempfile.mkdtemp(prefix="research-benchmark-"), "documents.sqlite"
+                ),
+            }
+        )
+        if args.adaptive_concurrency:
+            os.environ["ADAPTIVE_CONCURRENCY"] = "1"
+        os.environ["PROMPT_LAYOUT"] = args.prompt_layout
+        if args.profiles:
+            os.environ["LLM_PROFILES_FILE"] = os.path.abspath(args.profiles)
+        os.environ.pop("CHECKPOINT_DB", None)
+
+        import projects.research_automation_multiagent.ai_interview_generator as ig
+        import projects.research_automation_multiagent.ai_research_assistant as ra
+        from ai_agents_playground.llm_client import get_llm
+
+        # Build the model up front: import time is measured by import_time.py
+        get_llm()
+
+        stub_retrieval(ig, args.search_latency_ms / 1000, args.payload_bytes)
+        timer = NodeTimer()
+        thread = {
+            "configurable": {"thread_id": uuid.uuid4().hex},
+            "callbacks": [timer],
+        }
+        run_args = dict(
+            topic="Benchmark topic",
+            max_analysts=args.max_analysts,
+            thread=thread,
+            max_num_turns=args.max_num_turns,
+        )
+
+        start = time.perf_counter()
+        # The pipeline prints progress banners, keep stdout for the result
+        with contextlib.redirect_stdout(io.StringIO()):
+            graph = ra.build_research_graph(
+                asynchronous=args.asynchronous,
+                fused_queries=args.fused_queries,
+                hierarchical_reduce=args.hierarchical_reduce,
+                incremental_reduce=args.incremental_reduce,
+            )
+            if args.asynchronous:
+                report = asyncio.run(ra.arun_research(graph=graph, **run_args))
+            else:
+                report = ra.run_research(graph=graph, **run_args)
+        wall = time.perf_counter() - start
+
+    from ai_agents_playground.concurrency import limiter_metrics
+
+    return {
+        "max_analysts": args.max_analysts,
+        "max_num_turns": args.max_num_turns,
+        "wall_s": round(wall, 3),
+        "llm_calls": server.calls,
+        "prompt_tokens": server.prompt_tokens,
+        "completion_tokens": server.completion_tokens,
+        "cached_tokens": server.cached_tokens,
+        "rate_limited": server.rate_limited,
+        "calls_by_model": dict(server.calls_by_model),
+        "limiters": limiter_metrics(),
+        "peak_rss_mb": round(
+            resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1
+        ),
+        "report_chars": len(report or ""),
+        "nodes": {
+            node: {"count": len(times), "total_s": round(sum(times), 3)}
+            for node, times in timer.durations.items()
+        },
+    }
+
+
+# ===================== Matrix, in the parent process =====================
+def _cell_command(args, max_analysts: int, max_num_turns: int) -> list:
+    command = [
+        sys.executable,
+        "-m",
+        "benchmarks.research_pipeline",
+        "--cell",
+        str(max_analysts),
+        str(max_num_turns),
+        "--llm-latency-ms",
+        str(args.llm_latency_ms),
+        "--search-latency-ms",
+        str(args.search_latency_ms),
+        "--payload-bytes",
+        str(args.payload_bytes),
+        "--completion-words",
+        str(args.completion_words),
+        "--llm-capacity",
+        str(args.llm_capacity),
+    ]
+    if args.asynchronous:
+        command.append("--async")
+    if args.fused_queries:
+        command.append("--fused-queries")
+    if args.hierarchical_reduce:
+        command.append("--hierarchical-reduce")
+    if args.incremental_reduce:
+        command.append("--incremental-reduce")
+    command += ["--prompt-layout", args.prompt_layout]
+    if args.profiles:
+        command += ["--profiles", os.path.abspath(args.profiles)]
+    for item in args.model_latency:
+        command += ["--model-latency", item]
+    if args.adaptive_concurrency:
+        command.append("--adaptive-concurrency")
+    return command
+
+
+def _print_table(results: list, top_nodes: int) -> None:
+    columns = [
+        ("analysts", "max_analysts", "{:>8}"),
+        ("turns", "max_num_turns", "{:>5}"),
+        ("wall s", "wall_s", "{:>8.2f}"),
+        ("LLM calls", "llm_calls", "{:>9}"),
+        ("prompt tok", "prompt_tokens", "{:>10}"),
+        ("compl tok", "completion_tokens", "{:>9}"),
+        ("cached tok", "cached_tokens", "{:>10}"),
+        ("429s", "rate_limited", "{:>5}"),
+        ("peak RSS MB", "peak_rss_mb", "{:>11.1f}"),
+    ]
+    print("  ".join(f"{title:>{max(len(title), 5)}}" for title, _, _ in columns))
+    for result in results:
+        print("  ".join(fmt.format(result[key]) for _, key, fmt in columns))
+        nodes = sorted(
+            result["nodes"].items(), key=lambda item: item[1]["total_s"], reverse=True
+        )
+        for node, timing in nodes[:top_nodes]:
+            print(f"    {node:<30} x{timing['count']:<4} {timing['total_s']:>8.3f} s")
+        if len(result["calls_by_model"]) > 1:
+            print(
+                "    calls by model: "
+                + ", ".join(f"{m} {n}" for m, n in result["calls_by_model"].items())
+            )
+        for limiter in result["limiters"]:
+            print(
+                f"    limiter {limiter['limiter']:<22} limit {limiter['limit']:<6} "
+                f"max queue {limiter['max_waiting']:<4} 429s {limiter['throttled']}"
+            )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--analysts", type=int, nargs="+", default=[1, 3, 5])
+    parser.add_argument("--turns", type=int, nargs="+", default=[1, 2])
+    parser.add_argument("--llm-latency-ms", type=float, default=20)
+    parser.add_argument("--search-latency-ms", type=float, default=50)
+    parser.add_argument(
+        "--payload-bytes", type=int, default=2000, help="Size of every search result"
+    )
+    parser.add_argument(
+        "--completion-words", type=int, default=200, help="Words per text completion"
+    )
+    parser.add_argument("--async", dest="asynchronous", action="store_true")
+    parser.add_argument("--fused-queries", action="store_true")
+    parser.add_argument("--hierarchical-reduce", action="store_true")
+    parser.add_argument("--incremental-reduce", action="store_true")
+    parser.add_argument(
+        "--prompt-layout",
+        choices=["classic", "prefix"],
+        default="classic",
+        help="PROMPT_LAYOUT of the interview prompts",
+    )
+    parser.add_argument(
+        "--llm-capacity",
+        type=int,
+        default=0,
+        help="Concurrent completions before the fake LLM answers 429 (0: unlimited)",
+    )
+    parser.add_argument("--adaptive-concurrency", action="store_true")
+    parser.add_argument(
+        "--profiles", metavar="JSON", help="LLM_PROFILES_FILE with per-node models"
+    )
+    parser.add_argument(
+        "--model-latency",
+        metavar="MODEL=MS",
+        action="append",
+        default=[],
+        help="Latency of one model of the profiles (repeatable)",
+    )
+    parser.add_argument("--top-nodes", type=int, default=3, help="Slowest nodes shown")
+    parser.add_argument("--json", metavar="PATH", help="Also write the results here")
+    parser.add_argument("--cell", type=int, nargs=2, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.cell:
+        args.max_analysts, args.max_num_turns = args.cell
+        print(json.dumps(run_cell(args)))
+        return 0
+
+    results = []
+    for max_analysts in args.analysts:
+        for max_num_turns in args.turns:
+            completed = subprocess.run(
+                _cell_command(args, max_analysts, max_num_turns),
+                cwd=ROOT,
+                capture_output=True,
+                text=True,
+            )
+            if completed.returncode != 0:
+                print(completed.stderr[-2000:], file=sys.stderr)
+                return 1
+            results.append(json.loads(completed.stdout.strip().splitlines()[-1]))
+
+    _print_table(results, args.top_nodes)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,5 +1,17 @@
+import cProfile
+import json
 import logging
+import os
+import threading
+import time
+import uuid
+from contextvars import ContextVar
+from functools import lru_cache
+from typing import Optional
+
 from colorlog import ColoredFormatter
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.tracers.context import register_configure_hook
 
 def setup_logger():
     # Configura el logger raíz
@@ -32,4 +44,292 @@ def setup_logger():
 
     # Silencia los logs INFO/DEBUG de LangGraph internamente
     logging.getLogger("langgraph_api.worker").setLevel(logging.WARNING)
-    logging.getLogger("langgraph_api.worker").setLevel(logging.INFO)
\ No newline at end of file
+    logging.getLogger("langgraph_api.worker").setLevel(logging.INFO)
+
+
+# ===================== Instrumentación de nodos =====================
+# Registro estructurado (JSONL) de cada nodo de todos los grafos: inicio, fin,
+# duración, llamadas al LLM (latencia y tokens) y búsquedas, etiquetado con el
+# thread id y el analista. Se activa con INSTRUMENTATION_LOG=<ruta.jsonl>.
+#
+#   NODE_PROFILE=all | generate_answer,write_section
+#       perfila esos nodos con cProfile y guarda un .prof por ejecución en
+#       NODE_PROFILE_DIR (por defecto .cache/profiles)
+#
+# Para encontrar los nodos más lentos:
+#   jq -s 'map(select(.type=="node")) | sort_by(-.duration_ms) | .[:10]' run.jsonl
+#
+# Tokens servidos desde la caché de prompts del proveedor (PROMPT_LAYOUT):
+#   jq -s 'map(select(.type=="llm")) | [map(.cached_tokens), map(.prompt_tokens)] | map(add)' run.jsonl
+EVENT_LOGGER = "instrumentation"
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """One JSON object per record, taken from ``record.event``."""
+
+    def format(self, record):
+        event = getattr(record, "event", None) or {"message": record.getMessage()}
+        return json.dumps(event, default=str)
+
+
+@lru_cache(maxsize=None)
+def _event_logger() -> Optional[logging.Logger]:
+    path = os.environ.get("INSTRUMENTATION_LOG")
+    if not path:
+        return None
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    handler = logging.FileHandler(path, encoding="utf-8")
+    handler.setFormatter(JsonLinesFormatter())
+    logger = logging.getLogger(EVENT_LOGGER)
+    logger.setLevel(logging.INFO)
+    logger.addHandler(handler)
+    # Los eventos no van a la consola
+    logger.propagate = False
+    return logger
+
+
+def instrumentation_enabled() -> bool:
+    return _event_logger() is not None
+
+
+def emit_event(event: dict) -> None:
+    """Write an instrumentation event (a dict with a "type") if enabled."""
+    logger = _event_logger()
+    if logger is not None:
+        logger.info(
+            event.get("type", "event"), extra={"event": {"ts": time.time(), **event}}
+        )
+
+
+def _profiled_nodes() -> set:
+    value = os.environ.get("NODE_PROFILE", "")
+    return {name.strip() for name in value.split(",") if name.strip()}
+
+
+def _cached_tokens(usage: dict) -> int:
+    """Prompt tokens served from the provider's prompt cache.
+
+    OpenAI reports them in ``prompt_tokens_details.cached_tokens``; some
+    compatible servers (DeepSeek) use ``prompt_cache_hit_tokens``.
+    """
+    details = usage.get("prompt_tokens_details") or {}
+    return details.get("cached_tokens") or usage.get("prompt_cache_hit_tokens") or 0
+
+
+def _analyst_name(inputs) -> Optional[str]:
+    analyst = inputs.get("analyst") if isinstance(inputs, dict) else None
+    return getattr(analyst, "name", None)
+
+
+class NodeInstrumentation(BaseCallbackHandler):
+    """Callback handler that times every graph node and the LLM calls inside it.
+
+    A node run is a chain run whose name is its ``langgraph_node`` metadata.
+    Every nested run (LLM calls, tools, structured output parsers) is
+    attributed to the closest enclosing node.
+    """
+
+    run_inline = True
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._nodes = {}
+        # run id -> run id of the enclosing node
+        self._owner = {}
+        self._llm_started = {}
+        self._profiled = _profiled_nodes()
+
+    def _enclosing(self, parent_run_id):
+        return self._owner.get(parent_run_id) if parent_run_id else None
+
+    def on_chain_start(
+        self, serialized, inputs, *, run_id, parent_run_id=None, metadata=None, **kwargs
+    ):
+        metadata = metadata or {}
+        node = metadata.get("langgraph_node")
+        with self._lock:
+            owner = self._enclosing(parent_run_id)
+            if not node or kwargs.get("name") != node:
+                if owner:
+                    self._owner[run_id] = owner
+                return
+            parent = self._nodes.get(owner, {})
+            record = {
+                "type": "node",
+                "node": node,
+                "thread_id": metadata.get("thread_id"),
+                "checkpoint_ns": metadata.get("checkpoint_ns", ""),
+                "step": metadata.get("langgraph_step"),
+                "analyst": _analyst_name(inputs) or parent.get("analyst"),
+                "start": time.time(),
+                "llm_calls": 0,
+                "llm_ms": 0.0,
+                "prompt_tokens": 0,
+                "completion_tokens": 0,
+                "cached_tokens": 0,
+                "_t0": time.perf_counter(),
+            }
+            self._nodes[run_id] = record
+            self._owner[run_id] = run_id
+        if "all" in self._profiled or node in self._profiled:
+            profiler = cProfile.Profile()
+            try:
+                profiler.enable()
+                record["_profiler"] = profiler
+            except ValueError:
+                # Otro perfilador ya está activo en este hilo
+                pass
+
+    def _finish(self, run_id, error=None):
+        with self._lock:
+            self._owner.pop(run_id, None)
+            record = self._nodes.pop(run_id, None)
+        if record is None:
+            return
+        duration = time.perf_counter() - record.pop("_t0")
+        profiler = record.pop("_profiler", None)
+        if profiler is not None:
+            profiler.disable()
+            directory = os.environ.get(
+                "NODE_PROFILE_DIR", os.path.join(".cache", "profiles")
+            )
+            os.makedirs(directory, exist_ok=True)
+            record["profile"] = os.path.join(
+                directory, f"{record['node']}-{uuid.uuid4().hex[:8]}.prof"
+            )
+            profiler.dump_stats(record["profile"])
+        record["end"] = time.time()
+        record["duration_ms"] = round(duration * 1000, 3)
+        record["llm_ms"] = round(record["llm_ms"], 3)
+        if error is not None:
+            record["error"] = repr(error)
+        emit_event(record)
+
+    def on_chain_end(self, outputs, *, run_id, **kwargs):
+        if run_id in self._nodes:
+            self._finish(run_id)
+        else:
+            with self._lock:
+                self._owner.pop(run_id, None)
+
+    def on_chain_error(self, error, *, run_id, **kwargs):
+        if run_id in self._nodes:
+            self._finish(run_id, error)
+        else:
+            with self._lock:
+                self._owner.pop(run_id, None)
+
+    def on_chat_model_start(
+        self, serialized, messages, *, run_id, parent_run_id=None, **kwargs
+    ):
+        with self._lock:
+            self._llm_started[run_id] = (
+                self._enclosing(parent_run_id),
+                time.perf_counter(),
+            )
+
+    def on_llm_start(
+        self, serialized, prompts, *, run_id, parent_run_id=None, **kwargs
+    ):
+        self.on_chat_model_start(
+            serialized, prompts, run_id=run_id, parent_run_id=parent_run_id
+        )
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        with self._lock:
+            owner, start = self._llm_started.pop(run_id, (None, None))
+            if start is None:
+                return
+            latency_ms = (time.perf_counter() - start) * 1000
+            llm_output = response.llm_output or {}
+            usage = llm_output.get("token_usage") or {}
+            prompt_tokens = usage.get("prompt_tokens", 0)
+            completion_tokens = usage.get("completion_tokens", 0)
+            cached_tokens = _cached_tokens(usage)
+            record = self._nodes.get(owner)
+            if record is not None:
+                record["llm_calls"] += 1
+                record["llm_ms"] += latency_ms
+                record["prompt_tokens"] += prompt_tokens
+                record["completion_tokens"] += completion_tokens
+                record["cached_tokens"] += cached_tokens
+            node = record or {}
+        emit_event(
+            {
+                "type": "llm",
+                "node": node.get("node"),
+                "thread_id": node.get("thread_id"),
+                "analyst": node.get("analyst"),
+                "model": llm_output.get("model_name"),
+                "latency_ms": round(latency_ms, 3),
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "cached_tokens": cached_tokens,
+            }
+        )
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        with self._lock:
+            self._llm_started.pop(run_id, None)
+
+
+@lru_cache(maxsize=None)
+def get_instrumentation() -> Optional[NodeInstrumentation]:
+    """Process-wide handler, or None when INSTRUMENTATION_LOG is not set."""
+    return NodeInstrumentation() if instrumentation_enabled() else None
+
+
+@lru_cache(maxsize=None)
+def _install_handler(handler: NodeInstrumentation) -> None:
+    # Un hook de configuración añade el handler a todos los callback managers,
+    # también cuando quien invoca el grafo pasa sus propios callbacks
+    register_configure_hook(
+        ContextVar("node_instrumentation", default=handler), inheritable=True
+    )
+
+
+def instrument(graph):
+    """Enable the node instrumentation for ``graph`` (no-op when disabled).
+
+    The handler is installed process-wide, so subgraphs and nested runs are
+    covered and the same graph object is returned.
+    """
+    handler = get_instrumentation()
+    if handler is not None:
+        _install_handler(handler)
+    return graph
+
+
+class timed:
+    """Context manager that emits a ``type`` event with its duration.
+
+    Example:
+        with timed("retrieval", provider="tavily") as span:
+            docs = search(query)
+            span["results"] = len(docs)
+    """
+
+    def __init__(self, type: str, **fields):
+        self.event = {"type": type, **fields}
+        if not instrumentation_enabled():
+            return
+        try:
+            # Inside a graph node: tag the span with its node and thread
+            from langgraph.config import get_config
+
+            metadata = get_config().get("metadata", {})
+            self.event.setdefault("node", metadata.get("langgraph_node"))
+            self.event.setdefault("thread_id", metadata.get("thread_id"))
+        except RuntimeError:
+            pass
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self.event
+
+    def __exit__(self, exc_type, exc, tb):
+        self.event["duration_ms"] = round((time.perf_counter() - self._start) * 1000, 3)
+        if exc is not None:
+            self.event["error"] = repr(exc)
+        emit_event(self.event)
+        return False
@@ -1,27 +1,16 @@
-import io
-import os
+import hashlib
+import logging
 from typing import List
 
-from dotenv import find_dotenv, load_dotenv
-from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
-from langchain_openai import ChatOpenAI
-from langgraph.checkpoint.memory import MemorySaver
+from ai_agents_playground.checkpointer import get_checkpointer
+from ai_agents_playground.llm_client import get_llm
+from langchain_core.messages import HumanMessage, SystemMessage
 from langgraph.graph import END, START, StateGraph
-from PIL import Image
+from logger_config import instrument
 from pydantic import BaseModel, Field
 from typing_extensions import TypedDict
 
-_ = load_dotenv(find_dotenv())
-
-print("^^^^^^^^^^ 🏁🏁 START FIRST AGENT 🏁🏁 ^^^^^^^^^^^^")
-
-
-openai_api_key = os.environ["OPENAI_API_KEY"]
-base_url = os.environ["ORCHESTATOR_BASE_URL"]
-model_name = os.environ["ORCHESTATOR_MODEL"]
-
-
-llm = ChatOpenAI(base_url=base_url, model=model_name)
+logger = logging.getLogger(__name__)
 
 
 # Clase Analyst
@@ -47,6 +36,11 @@ class Analyst(BaseModel):
     def persona(self):
         return f"Name: {self.name}\nRole: {self.role}\nAffiliation: {self.affiliation}\nDescription: {self.description}\n"
 
+    # Identidad estable del analista: mismo persona, mismo id (y mismos prompts)
+    @property
+    def persona_id(self) -> str:
+        return hashlib.blake2b(self.persona.encode("utf-8"), digest_size=8).hexdigest()
+
 
 # Propósito: Contiene una lista de analistas y los describe como un grupo relacionado con un tema.
 class Perspectives(BaseModel):
@@ -55,6 +49,16 @@ class Perspectives(BaseModel):
     )
 
 
+# Propósito: Respuesta de la revisión incremental, solo lo que cambia.
+class AnalystRevision(BaseModel):
+    keep: List[int] = Field(
+        description="Numbers of the current analysts that the feedback does not affect.",
+    )
+    new_analysts: List[Analyst] = Field(
+        description="Analysts to add, or to replace the ones that are not kept.",
+    )
+
+
 # Propósito: Almacena el estado del proceso de generación de analistas.
 class GenerateAnalystsState(TypedDict):
     topic: str  # Research topic
@@ -75,41 +79,141 @@ analyst_instructions = """You are tasked with creating a set of AI analyst perso
 5. Assign one analyst to each theme."""
 
 
+# Prompt de la revisión incremental tras el feedback humano
+analyst_revision_instructions = """You are revising a set of AI analyst personas after editorial feedback.
+
+1. The research topic:
+{topic}
+2. The current analysts, numbered:
+{analysts}
+3. The editorial feedback:
+{human_analyst_feedback}
+
+In new_analysts write only the analysts the feedback asks to add or to change.
+List in keep the numbers of the analysts that the feedback does not ask to change; they stay exactly as they are.
+The team has at most {max_analysts} analysts: keep plus new_analysts must not exceed it. To add an analyst to a full team, leave out of keep the analyst least relevant to the feedback.
+Do not rewrite an analyst that is kept."""
+
+
 # ========== Definiendo los nodos ===============
 # Node: create_analysts
-def create_analysts(state: GenerateAnalystsState):
-    """Create analysts"""
-
+def _analysts_messages(state: GenerateAnalystsState):
     topic = state["topic"]
     max_analysts = state["max_analysts"]
     human_analyst_feedback = state.get("human_analyst_feedback", "")
 
-    # Enforce structured output
-    structured_llm = llm.with_structured_output(Perspectives)
-
     # System message
     system_message = analyst_instructions.format(
         topic=topic,
         human_analyst_feedback=human_analyst_feedback,
         max_analysts=max_analysts,
     )
+    return [SystemMessage(content=system_message)] + [
+        HumanMessage(content="Generate the set of analysts.")
+    ]
+
+
+def create_analysts(state: GenerateAnalystsState):
+    """Create analysts"""
+
+    # Enforce structured output
+    structured_llm = get_llm("create_analysts").with_structured_output(Perspectives)
 
     # Generate question
-    analysts = structured_llm.invoke(
-        [SystemMessage(content=system_message)]
-        + [HumanMessage(content="Generate the set of analysts.")]
-    )
+    analysts = structured_llm.invoke(_analysts_messages(state))
 
     # Write the list of analysis to state
     return {"analysts": analysts.analysts}
 
 
+async def acreate_analysts(state: GenerateAnalystsState):
+    """Async node to create analysts"""
+    structured_llm = get_llm("create_analysts").with_structured_output(Perspectives)
+    analysts = await structured_llm.ainvoke(_analysts_messages(state))
+    return {"analysts": analysts.analysts}
+
+
+# Node: create_analysts, incremental version
+# Tras el feedback solo se generan los analistas nuevos o cambiados; los demás
+# conservan su persona (y su persona_id), así que sus entrevistas repiten los
+# mismos prompts y se sirven desde la caché del LLM.
+def _revision_messages(state: GenerateAnalystsState):
+    analysts = "\n".join(
+        f"{number}. {analyst.persona}"
+        for number, analyst in enumerate(state["analysts"], 1)
+    )
+    system_message = analyst_revision_instructions.format(
+        topic=state["topic"],
+        analysts=analysts,
+        human_analyst_feedback=state["human_analyst_feedback"],
+        max_analysts=state["max_analysts"],
+    )
+    return [SystemMessage(content=system_message)] + [
+        HumanMessage(content="Revise the set of analysts.")
+    ]
+
+
+def _needs_revision(state: GenerateAnalystsState) -> bool:
+    return bool(state.get("analysts") and state.get("human_analyst_feedback"))
+
+
+def merge_revision(
+    analysts: List[Analyst], revision: AnalystRevision, max_analysts: int
+):
+    """Kept analysts, in their order, followed by the new ones.
+
+    The new analysts are what the feedback asked for: past ``max_analysts``
+    the last kept analysts make room for them.
+    """
+    kept = [
+        analysts[number - 1]
+        for number in dict.fromkeys(revision.keep)
+        if 1 <= number <= len(analysts)
+    ]
+    known = {analyst.persona_id for analyst in kept}
+    new = [a for a in revision.new_analysts if a.persona_id not in known]
+    new = new[:max_analysts]
+    kept = kept[: max_analysts - len(new)]
+    logger.info(
+        f"Analysts revised: {len(kept)} kept, {len(new)} generated, "
+        f"{len(analysts) - len(kept)} replaced"
+    )
+    return kept + new
+
+
+def revise_analysts(state: GenerateAnalystsState):
+    """Create the analysts, then revise only what the feedback changes"""
+    if not _needs_revision(state):
+        return create_analysts(state)
+    structured_llm = get_llm("create_analysts").with_structured_output(AnalystRevision)
+    revision = structured_llm.invoke(_revision_messages(state))
+    return {
+        "analysts": merge_revision(state["analysts"], revision, state["max_analysts"])
+    }
+
+
+async def arevise_analysts(state: GenerateAnalystsState):
+    """Async twin of revise_analysts"""
+    if not _needs_revision(state):
+        return await acreate_analysts(state)
+    structured_llm = get_llm("create_analysts").with_structured_output(AnalystRevision)
+    revision = await structured_llm.ainvoke(_revision_messages(state))
+    return {
+        "analysts": merge_revision(state["analysts"], revision, state["max_analysts"])
+    }
+
+
 # Node: human_feedback
 def human_feedback(state: GenerateAnalystsState):
     """No-op node that should be interrupted on"""
     pass
 
 
+async def ahuman_feedback(state: GenerateAnalystsState):
+    """Async no-op node that should be interrupted on"""
+    pass
+
+
 # Conditional edge
 def should_continue(state: GenerateAnalystsState):
     """Return the next node to execute"""
@@ -125,25 +229,35 @@ def should_continue(state: GenerateAnalystsState):
 
 
 # ==================== Construyendo el grafo ===================
-# Add nodes and edges
-# State of graph
-builder = StateGraph(GenerateAnalystsState)
-
-# Nodes
-builder.add_node("create_analysts", create_analysts)
-builder.add_node("human_feedback", human_feedback)
-
-# Edges
-builder.add_edge(START, "create_analysts")
-builder.add_edge("create_analysts", "human_feedback")
-builder.add_conditional_edges(
-    "human_feedback", should_continue, ["create_analysts", END]
-)
+def build_analyst_graph(incremental: bool = False):
+    """Build the analyst graph.
+
+    Args:
+        incremental: after human feedback keep the analysts it does not touch
+            and generate only the added or changed ones (``revise_analysts``).
+    """
+    # Add nodes and edges
+    # State of graph
+    builder = StateGraph(GenerateAnalystsState)
+
+    # Nodes
+    builder.add_node(
+        "create_analysts", revise_analysts if incremental else create_analysts
+    )
+    builder.add_node("human_feedback", human_feedback)
 
-# Memory
-memory = MemorySaver()
+    # Edges
+    builder.add_edge(START, "create_analysts")
+    builder.add_edge("create_analysts", "human_feedback")
+    builder.add_conditional_edges(
+        "human_feedback", should_continue, ["create_analysts", END]
+    )
 
-# Compile
-graph = builder.compile(interrupt_before=["human_feedback"], checkpointer=memory)
+    # Memory
+    memory = get_checkpointer()
 
-print("^^^^^^^^^^ 🚩🚩 END FIRST AGENT 🚩🚩 ^^^^^^^^^^^^")
+    # Compile
+    # Node timings to INSTRUMENTATION_LOG, see logger_config.py
+    return instrument(
+        builder.compile(interrupt_before=["human_feedback"], checkpointer=memory)
+    )
@@ -1,38 +1,39 @@
-import io
+import operator
 import os
-import pickle
-from ast import operator
 from typing import Annotated
 
-import cloudpickle as pickle
-from dotenv import find_dotenv, load_dotenv
-from langchain_community.document_loaders import WikipediaLoader
-from langchain_community.tools.tavily_search import TavilySearchResults
+from ai_agents_playground.checkpointer import get_checkpointer
+from ai_agents_playground.concurrency import (
+    acall_limited,
+    call_limited,
+    client_retries,
+)
+from ai_agents_playground.llm_client import get_llm
 from langchain_core.messages import (
     AIMessage,
     HumanMessage,
     SystemMessage,
     get_buffer_string,
 )
-from langchain_openai import ChatOpenAI
-from langgraph.checkpoint.memory import MemorySaver
 from langgraph.graph import END, START, MessagesState, StateGraph
-from langgraph.graph.message import add_messages
-from PIL import Image
+from logger_config import instrument
 from projects.research_automation_multiagent.ai_analyst_generator import Analyst
+from projects.research_automation_multiagent.context_assembly import (
+    assemble_context,
+    context_budget,
+)
+from projects.research_automation_multiagent.document_store import (
+    get_documents,
+    put_documents,
+)
+from projects.research_automation_multiagent.retrieval import (
+    aload_wikipedia,
+    asearch_web_docs,
+    load_wikipedia,
+    search_web_docs,
+)
 from pydantic import BaseModel, Field
 
-_ = load_dotenv(find_dotenv())
-
-print("^^^^^^^^^^ 🏁🏁 START SECOND AGENT 🏁🏁 ^^^^^^^^^^^^")
-
-openai_api_key = os.environ["OPENAI_API_KEY"]
-base_url = os.environ["ORCHESTATOR_BASE_URL"]
-model_name = os.environ["ORCHESTATOR_MODEL"]
-
-
-llm = ChatOpenAI(base_url=base_url, model=model_name)
-
 #  MessagesState: tipo de state especializado de LangGraph que almacena mensajes conversacionales (preguntas, respuestas ...)
 
 
@@ -40,13 +41,16 @@ llm = ChatOpenAI(base_url=base_url, model=model_name)
 class InterviewState(MessagesState):
     # Number turns of conversation. Número máximo de intercambios (preguntas y respuestas)
     max_num_turns: int
-    # Source docs. Almacena documentos de referencia o información de contexto necesaria durante la entrevista.
-    context: Annotated[list, add_messages]
+    # Source docs. Ids de los documentos de referencia en el document store (document_store.py); el texto se recupera al construir cada prompt.
+    context: Annotated[list, operator.add]
     # Analyst asking questions. Guarda los detalles del analista actual que realiza las preguntas.
     analyst: Analyst
     # Interview transcript. Mantiene una transcripción de toda la entrevista.
     interview: str
     sections: list  # Final key we duplicate in outer state for Send() API.  Almacena puntos clave o secciones importantes de la entrevista que podrían ser relevantes para el resultado final.
+    # Retrieval query written together with the last question (fused mode only)
+    search_query: str
+    report_fragments: list  # Section rewritten as a passage of the final report (incremental mode), also in the outer state
 
 
 # Representa una consulta de búsqueda que el analista puede generar durante la entrevista para recuperar información adicional (por ejemplo, datos externos).
@@ -55,6 +59,31 @@ class SearchQuery(BaseModel):
     search_query: str = Field(None, description="Search query for retrieval.")
 
 
+# Pregunta del analista y su consulta de búsqueda en una sola llamada (modo fused)
+class QuestionWithQuery(BaseModel):
+    question: str = Field(
+        description="Your next message to the expert, written in character."
+    )
+    search_query: str = Field(
+        description="Well-structured web search query to retrieve the information needed to answer your question."
+    )
+
+
+# ===================== Prompt layout =====================
+# Los endpoints compatibles con OpenAI cachean el prefijo común de los prompts
+# (tokens ya vistos a precio reducido y con menos latencia). Con
+# PROMPT_LAYOUT=prefix cada prompt se ordena de lo más estable a lo más
+# variable: primero las instrucciones estáticas (iguales para todos los
+# analistas), luego el persona del analista, luego el contexto recuperado (los
+# documentos más antiguos primero, así los de turnos anteriores siguen en el
+# prefijo) y al final la conversación. Con el layout clásico el persona y el
+# contexto van en mitad de las instrucciones y el prefijo común se corta
+# antes. Los tokens cacheados se registran como cached_tokens en
+# INSTRUMENTATION_LOG (logger_config.py).
+def prefix_stable_prompts() -> bool:
+    return os.environ.get("PROMPT_LAYOUT", "classic").lower() == "prefix"
+
+
 # ========================== Creando los nodos =====================
 # Nodo: generate_question
 
@@ -77,11 +106,23 @@ When you are satisfied with your understanding, complete the interview with: "Th
 Remember to stay in character throughout your response, reflecting the persona and goals provided to you."""
 
 
+# Las mismas instrucciones con el persona al final (PROMPT_LAYOUT=prefix)
+question_prefix_instructions = (
+    question_instructions.replace(
+        """Here is your topic of focus and set of goals: {goals}
+        
+""",
+        "",
+    )
+    + """{extra}
+
+Here is your topic of focus and set of goals: {goals}"""
+)
+
+
 # Funcionalidad para que el analista le haga las preguntas al experto
 # El analista le hace preguntas al experto y este hará las busquedas en internet y wikipedia, documentos indexados (RAG)
-def generate_question(state: InterviewState):
-    """Node to generate a question"""
-
+def _question_messages(state: InterviewState):
     # Get state
     analyst = state[
         "analyst"
@@ -90,22 +131,92 @@ def generate_question(state: InterviewState):
         "messages"
     ]  # Recupera el historial de conversación (preguntas y respuestas anteriores).
 
-    # Generate question
+    if prefix_stable_prompts():
+        system_message = question_prefix_instructions.format(
+            goals=analyst.persona, extra=""
+        )
+        return [SystemMessage(content=system_message)] + messages
+
     system_message = question_instructions.format(
         goals=analyst.persona
     )  # Formatea las instrucciones para incluir la personalidad y objetivos del analista.
-    question = llm.invoke([SystemMessage(content=system_message)] + messages)
+    return [SystemMessage(content=system_message)] + messages
+
+
+def generate_question(state: InterviewState):
+    """Node to generate a question"""
+
+    # Generate question
+    question = call_limited(
+        "llm",
+        get_llm("ask_question", **client_retries()).invoke,
+        _question_messages(state),
+    )
 
     # Write messages to state
     return {"messages": [question]}  # Actualiza el state
 
 
-# Web search tool
-tavily_api_key = os.environ["TAVILY_API_KEY"]
-tavily_search = TavilySearchResults(max_results=3)
+async def agenerate_question(state: InterviewState):
+    """Async node to generate a question"""
+    question = await acall_limited(
+        "llm",
+        get_llm("ask_question", **client_retries()).ainvoke,
+        _question_messages(state),
+    )
+    return {"messages": [question]}
+
 
-# Wikipedia search tool
+# Modo fused: la misma llamada devuelve la pregunta y la consulta de búsqueda,
+# así search_web y search_wikipedia no necesitan su propia llamada al LLM.
+question_with_query_instructions = """
 
+Alongside your message, write the web search query that would retrieve the information needed to answer the question you are asking."""
+
+
+def _question_with_query_messages(state: InterviewState):
+    if prefix_stable_prompts():
+        # The fused instructions are static too: before the persona
+        system_message = question_prefix_instructions.format(
+            goals=state["analyst"].persona, extra=question_with_query_instructions
+        )
+        return [SystemMessage(content=system_message)] + state["messages"]
+
+    system_message, *messages = _question_messages(state)
+    return [
+        SystemMessage(content=system_message.content + question_with_query_instructions)
+    ] + messages
+
+
+def generate_question_with_query(state: InterviewState):
+    """Node to generate a question and its search query in one call"""
+    structured_llm = get_llm("ask_question", **client_retries()).with_structured_output(
+        QuestionWithQuery
+    )
+    result = call_limited(
+        "llm", structured_llm.invoke, _question_with_query_messages(state)
+    )
+    return {
+        "messages": [AIMessage(content=result.question)],
+        "search_query": result.search_query,
+    }
+
+
+async def agenerate_question_with_query(state: InterviewState):
+    """Async node to generate a question and its search query in one call"""
+    structured_llm = get_llm("ask_question", **client_retries()).with_structured_output(
+        QuestionWithQuery
+    )
+    result = await acall_limited(
+        "llm", structured_llm.ainvoke, _question_with_query_messages(state)
+    )
+    return {
+        "messages": [AIMessage(content=result.question)],
+        "search_query": result.search_query,
+    }
+
+
+# Web search (Tavily) and Wikipedia clients live in retrieval.py
 
 # Search query writing
 search_instructions = SystemMessage(
@@ -121,48 +232,86 @@ Convert this final question into a well-structured web search query"""
 )
 
 
+# Every formatted document goes to the document store; the state keeps its id
+def _format_web_docs(search_docs):
+    return put_documents(
+        f'<Document href="{doc["url"]}"/>\n{doc["content"]}\n</Document>'
+        for doc in search_docs
+    )
+
+
+def _format_wikipedia_docs(search_docs):
+    return put_documents(
+        f'<Document source="{doc.metadata["source"]}" page="{doc.metadata.get("page", "")}"/>\n{doc.page_content}\n</Document>'
+        for doc in search_docs
+    )
+
+
+def _search_query(state: InterviewState) -> str:
+    # Reuse the query written with the question (fused mode)
+    if state.get("search_query"):
+        return state["search_query"]
+    structured_llm = get_llm("search_query", **client_retries()).with_structured_output(
+        SearchQuery
+    )
+    search_query = call_limited(
+        "llm", structured_llm.invoke, [search_instructions] + state["messages"]
+    )
+    return search_query.search_query
+
+
+async def _asearch_query(state: InterviewState) -> str:
+    if state.get("search_query"):
+        return state["search_query"]
+    structured_llm = get_llm("search_query", **client_retries()).with_structured_output(
+        SearchQuery
+    )
+    search_query = await acall_limited(
+        "llm", structured_llm.ainvoke, [search_instructions] + state["messages"]
+    )
+    return search_query.search_query
+
+
 def search_web(state: InterviewState):
     """Retrieve docs from web search"""
 
     # Search query
-    structured_llm = llm.with_structured_output(SearchQuery)
-    search_query = structured_llm.invoke([search_instructions] + state["messages"])
+    search_query = _search_query(state)
 
     # Search
-    search_docs = tavily_search.invoke(search_query.search_query)
+    search_docs = search_web_docs(search_query)
 
     # Format
-    formatted_search_docs = "\n\n---\n\n".join(
-        [
-            f'<Document href="{doc["url"]}"/>\n{doc["content"]}\n</Document>'
-            for doc in search_docs
-        ]
-    )
+    formatted_search_docs = _format_web_docs(search_docs)
+
+    return {"context": formatted_search_docs}
 
-    return {"context": [formatted_search_docs]}
+
+async def asearch_web(state: InterviewState):
+    """Async node to retrieve docs from web search"""
+    search_docs = await asearch_web_docs(await _asearch_query(state))
+    return {"context": _format_web_docs(search_docs)}
 
 
 def search_wikipedia(state: InterviewState):
     """Retrieve docs from wikipedia"""
 
     # Search query
-    structured_llm = llm.with_structured_output(SearchQuery)
-    search_query = structured_llm.invoke([search_instructions] + state["messages"])
+    search_query = _search_query(state)
 
     # Search
-    search_docs = WikipediaLoader(
-        query=search_query.search_query, load_max_docs=2
-    ).load()
+    search_docs = load_wikipedia(search_query, load_max_docs=2)
 
     # Format
-    formatted_search_docs = "\n\n---\n\n".join(
-        [
-            f'<Document source="{doc.metadata["source"]}" page="{doc.metadata.get("page", "")}"/>\n{doc.page_content}\n</Document>'
-            for doc in search_docs
-        ]
-    )
+    formatted_search_docs = _format_wikipedia_docs(search_docs)
+
+    return {"context": formatted_search_docs}
 
-    return {"context": [formatted_search_docs]}
+
+async def asearch_wikipedia(state: InterviewState):
+    """Async node to retrieve docs from wikipedia"""
+    search_docs = await aload_wikipedia(await _asearch_query(state), load_max_docs=2)
+    return {"context": _format_wikipedia_docs(search_docs)}
 
 
 # PAY ATTENTION: this defines the role of the AI Expert
@@ -195,17 +344,63 @@ When answering questions, follow these guidelines:
 And skip the addition of the brackets as well as the Document source preamble in your citation."""
 
 
-def generate_answer(state: InterviewState):
-    """Node to answer a question"""
+# PROMPT_LAYOUT=prefix: guidelines, then the persona, then the context
+answer_prefix_instructions = (
+    answer_instructions.replace(
+        """Here is analyst area of focus: {goals}. 
+        
+""",
+        "",
+    ).replace(
+        """To answer question, use this context:
+        
+{context}
+
+""",
+        "",
+    )
+    + """
+
+Here is analyst area of focus: {goals}.
 
+To answer question, use this context:
+
+{context}"""
+)
+
+
+def _answer_messages(state: InterviewState):
     # Get state
     analyst = state["analyst"]
     messages = state["messages"]
-    context = state["context"]
+    # Only the documents relevant to the last question that fit the budget
+    context = assemble_context(
+        get_documents(state["context"]),
+        query=messages[-1].content if messages else analyst.description,
+        budget=context_budget("generate_answer"),
+    )
+
+    if prefix_stable_prompts():
+        # The context keeps its oldest-first order: the documents of earlier
+        # turns stay in front, so the prefix of the previous answer is reused
+        system_message = answer_prefix_instructions.format(
+            goals=analyst.persona, context=context
+        )
+        return [SystemMessage(content=system_message)] + messages
 
-    # Answer question
     system_message = answer_instructions.format(goals=analyst.persona, context=context)
-    answer = llm.invoke([SystemMessage(content=system_message)] + messages)
+    return [SystemMessage(content=system_message)] + messages
+
+
+def generate_answer(state: InterviewState):
+    """Node to answer a question"""
+
+    # Answer question
+    answer = call_limited(
+        "llm",
+        get_llm("answer_question", **client_retries()).invoke,
+        _answer_messages(state),
+    )
 
     # Name the message as coming from the expert
     answer.name = "expert"
@@ -214,6 +409,17 @@ def generate_answer(state: InterviewState):
     return {"messages": [answer]}
 
 
+async def agenerate_answer(state: InterviewState):
+    """Async node to answer a question"""
+    answer = await acall_limited(
+        "llm",
+        get_llm("answer_question", **client_retries()).ainvoke,
+        _answer_messages(state),
+    )
+    answer.name = "expert"
+    return {"messages": [answer]}
+
+
 def save_interview(state: InterviewState):
     """Save interviews"""
 
@@ -227,6 +433,11 @@ def save_interview(state: InterviewState):
     return {"interview": interview}
 
 
+async def asave_interview(state: InterviewState):
+    """Async twin of save_interview, so the async graph never leaves the event loop"""
+    return save_interview(state)
+
+
 # PAY ATTENTION: this is the function that governs the conditional edge
 def route_messages(state: InterviewState, name: str = "expert"):
     """Route between question and answer"""
@@ -253,6 +464,11 @@ def route_messages(state: InterviewState, name: str = "expert"):
     return "ask_question"
 
 
+async def aroute_messages(state: InterviewState, name: str = "expert"):
+    """Async twin of route_messages"""
+    return route_messages(state, name)
+
+
 # PAY ATTENTION: this defines the rol of the Technical Writer that writes the final report
 section_writer_instructions = """You are an expert technical writer. 
             
@@ -306,36 +522,174 @@ There should be no redundant sources. It should simply be:
 - Check that all guidelines have been followed"""
 
 
-def write_section(state: InterviewState):
-    """Node to answer a question"""
+# PROMPT_LAYOUT=prefix: the analyst focus (item 4) moved after the static guidelines
+section_writer_prefix_instructions = (
+    section_writer_instructions.replace(
+        """4. Make your title engaging based upon the focus area of the analyst: 
+{focus}
+""",
+        """4. Make your title engaging based upon the focus area of the analyst, given at the end.
+""",
+    )
+    + """
+
+Focus area of the analyst: {focus}"""
+)
+
 
+def _section_messages(state: InterviewState):
     # Get state
     interview = state["interview"]
-    context = state["context"]
     analyst = state["analyst"]
+    context = assemble_context(
+        get_documents(state["context"]),
+        query=analyst.description,
+        budget=context_budget("write_section"),
+    )
 
     # Write section using either the gathered source docs from interview (context) or the interview itself (interview)
-    system_message = section_writer_instructions.format(focus=analyst.description)
-    section = llm.invoke(
-        [SystemMessage(content=system_message)]
-        + [HumanMessage(content=f"Use this source to write your section: {context}")]
+    if prefix_stable_prompts():
+        system_message = section_writer_prefix_instructions.format(
+            focus=analyst.description
+        )
+    else:
+        system_message = section_writer_instructions.format(focus=analyst.description)
+    return [SystemMessage(content=system_message)] + [
+        HumanMessage(content=f"Use this source to write your section: {context}")
+    ]
+
+
+def write_section(state: InterviewState):
+    """Node to answer a question"""
+
+    section = call_limited(
+        "llm",
+        get_llm("write_section", **client_retries()).invoke,
+        _section_messages(state),
     )
 
     # Append it to state
     return {"sections": [section.content]}
 
 
+async def awrite_section(state: InterviewState):
+    """Async node to write the section"""
+    section = await acall_limited(
+        "llm",
+        get_llm("write_section", **client_retries()).ainvoke,
+        _section_messages(state),
+    )
+    return {"sections": [section.content]}
+
+
+# Modo incremental: en cuanto termina la entrevista, su sección se reescribe
+# como un pasaje del informe final. Así el informe se va armando mientras las
+# entrevistas más lentas siguen en marcha y tras la última solo queda unir los
+# pasajes y escribir la introducción y la conclusión.
+report_fragment_instructions = """You are a technical writer drafting one passage of a report that will combine the memos of several analysts.
+
+Rewrite the memo below as that passage:
+
+1. Keep its central, surprising and specific insights; drop background that any reader of the report already knows.
+2. Write one or two paragraphs of plain markdown text, with no headers and no pre-amble.
+3. Do not mention any analyst or expert names.
+4. Preserve the citations, annotated in brackets, for example [1] or [2].
+5. End with a ### Sources section listing every source you cite, with the same numbers as in the memo:
+
+### Sources
+[1] Link or Document name
+[2] Link or Document name
+
+Here is the memo:
+
+{section}"""
+
+
+def _report_fragment_messages(state: InterviewState):
+    if prefix_stable_prompts():
+        # Static instructions as the system message, the memo after them
+        instructions = report_fragment_instructions.replace("{section}", "").rstrip()
+        return [
+            SystemMessage(content=instructions),
+            HumanMessage(content=state["sections"][-1]),
+        ]
+    return [
+        SystemMessage(
+            content=report_fragment_instructions.format(section=state["sections"][-1])
+        ),
+        HumanMessage(content="Write the report passage."),
+    ]
+
+
+def summarize_section(state: InterviewState):
+    """Node to fold the section into the report as soon as the interview ends"""
+    fragment = call_limited(
+        "llm",
+        get_llm("summarize_section", **client_retries()).invoke,
+        _report_fragment_messages(state),
+    )
+    return {"report_fragments": [fragment.content]}
+
+
+async def asummarize_section(state: InterviewState):
+    """Async twin of summarize_section"""
+    fragment = await acall_limited(
+        "llm",
+        get_llm("summarize_section", **client_retries()).ainvoke,
+        _report_fragment_messages(state),
+    )
+    return {"report_fragments": [fragment.content]}
+
+
 # ================== Constuyendo el grafo =================
-def build_interview_graph():
+def build_interview_graph(
+    asynchronous: bool = False,
+    fused_queries: bool = False,
+    subgraph: bool = False,
+    incremental: bool = False,
+):
+    """Build the interview sub-graph.
+
+    Args:
+        asynchronous: use the async nodes (``ainvoke``, async search clients).
+            The compiled graph must then be driven with ``ainvoke``/``astream``.
+        fused_queries: write the question and the search query in one
+            structured call, reused by both search nodes (one LLM call per
+            turn before the search instead of three).
+        subgraph: compile without a checkpointer, to be used as a node of
+            another graph. It then inherits the parent's checkpointer and its
+            progress is saved (and resumed) with the parent run.
+        incremental: add ``summarize_section`` after ``write_section``, which
+            rewrites the section as a passage of the final report
+            (``report_fragments``) while other interviews are still running.
+    """
     interview_builder = StateGraph(InterviewState)
 
     # Nodes
-    interview_builder.add_node("ask_question", generate_question)
-    interview_builder.add_node("search_web", search_web)
-    interview_builder.add_node("search_wikipedia", search_wikipedia)
-    interview_builder.add_node("answer_question", generate_answer)
-    interview_builder.add_node("save_interview", save_interview)
-    interview_builder.add_node("write_section", write_section)
+    if asynchronous:
+        interview_builder.add_node(
+            "ask_question",
+            agenerate_question_with_query if fused_queries else agenerate_question,
+        )
+        interview_builder.add_node("search_web", asearch_web)
+        interview_builder.add_node("search_wikipedia", asearch_wikipedia)
+        interview_builder.add_node("answer_question", agenerate_answer)
+        interview_builder.add_node("save_interview", asave_interview)
+        interview_builder.add_node("write_section", awrite_section)
+        if incremental:
+            interview_builder.add_node("summarize_section", asummarize_section)
+    else:
+        interview_builder.add_node(
+            "ask_question",
+            generate_question_with_query if fused_queries else generate_question,
+        )
+        interview_builder.add_node("search_web", search_web)
+        interview_builder.add_node("search_wikipedia", search_wikipedia)
+        interview_builder.add_node("answer_question", generate_answer)
+        interview_builder.add_node("save_interview", save_interview)
+        interview_builder.add_node("write_section", write_section)
+        if incremental:
+            interview_builder.add_node("summarize_section", summarize_section)
 
     # Edge
     interview_builder.add_edge(START, "ask_question")
@@ -346,19 +700,25 @@ def build_interview_graph():
 
     # PAY ATTENTION: see how we define the conditional edge
     interview_builder.add_conditional_edges(
-        "answer_question", route_messages, ["ask_question", "save_interview"]
+        "answer_question",
+        aroute_messages if asynchronous else route_messages,
+        ["ask_question", "save_interview"],
     )
 
     interview_builder.add_edge("save_interview", "write_section")
-    interview_builder.add_edge("write_section", END)
+    if incremental:
+        interview_builder.add_edge("write_section", "summarize_section")
+        interview_builder.add_edge("summarize_section", END)
+    else:
+        interview_builder.add_edge("write_section", END)
 
     # Interview
-    memory = MemorySaver()
+    memory = None if subgraph else get_checkpointer()
 
     # PAY ATTENTION: see how we use .with_config
-    return interview_builder.compile(checkpointer=memory).with_config(
-        run_name="Conduct Interviews"
+    # Node timings to INSTRUMENTATION_LOG, see logger_config.py
+    return instrument(
+        interview_builder.compile(checkpointer=memory).with_config(
+            run_name="Conduct Interviews"
+        )
     )
-
-
-print("^^^^^^^^^^ 🚩🚩 END SECOND AGENT 🚩🚩 ^^^^^^^^^^^^")
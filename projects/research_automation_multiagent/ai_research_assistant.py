@@ -1,45 +1,46 @@
+import argparse
+import asyncio
 import io
+import operator
 import os
-import pickle
-from typing import Annotated, List
-
-import cloudpickle as pickle
-from dotenv import find_dotenv, load_dotenv
-from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
-from langchain_openai import ChatOpenAI
-from langgraph.checkpoint.memory import MemorySaver
+import re
+import sys
+import uuid
+from typing import Annotated, List, Optional
+
+from ai_agents_playground.checkpointer import get_checkpointer
+from ai_agents_playground.llm_client import get_llm, load_env
+from langchain_core.messages import HumanMessage, SystemMessage
 from langgraph.constants import Send
 from langgraph.graph import END, START, StateGraph
 from langgraph.graph.message import add_messages
-from PIL import Image
+from logger_config import instrument
 from projects.research_automation_multiagent.ai_analyst_generator import (
     Analyst,
+    acreate_analysts,
+    ahuman_feedback,
+    arevise_analysts,
     create_analysts,
     human_feedback,
+    revise_analysts,
 )
 from projects.research_automation_multiagent.ai_interview_generator import (
     build_interview_graph,
 )
 from typing_extensions import TypedDict
 
-_ = load_dotenv(find_dotenv())
-
-print("^^^^^^^^^^ 🏁🏁 START PARENT AGENT 🏁🏁 ^^^^^^^^^^^^")
-
-openai_api_key = os.environ["OPENAI_API_KEY"]
-base_url = os.environ["ORCHESTATOR_BASE_URL"]
-model_name = os.environ["ORCHESTATOR_MODEL"]
-
-
-llm = ChatOpenAI(base_url=base_url, model=model_name)
-
 
 class ResearchGraphState(TypedDict):
     topic: str  # Research topic
     max_analysts: int  # Number of analysts
+    # Question / answer turns per interview. Not called max_num_turns, which the
+    # interview sub-graph would write back from every branch.
+    max_interview_turns: int
     human_analyst_feedback: str  # Human feedback
     analysts: List[Analyst]  # Analyst asking questions
     sections: Annotated[list, add_messages]  # Send() API key
+    reduced_sections: List[str]  # Sections merged by reduce_sections
+    report_fragments: Annotated[list, operator.add]  # Send() API key, incremental mode
     introduction: str  # Introduction for the final report
     content: str  # Content for the final report
     conclusion: str  # Conclusion for the final report
@@ -64,6 +65,7 @@ def initiate_all_interviews(state: ResearchGraphState):
                 "conduct_interview",
                 {
                     "analyst": analyst,
+                    "max_num_turns": state.get("max_interview_turns", 2),
                     "messages": [
                         HumanMessage(
                             content=f"So you said you were writing an article on {topic}?"
@@ -75,6 +77,80 @@ def initiate_all_interviews(state: ResearchGraphState):
         ]
 
 
+async def ainitiate_all_interviews(state: ResearchGraphState):
+    """Async twin of initiate_all_interviews"""
+    return initiate_all_interviews(state)
+
+
+# ===================== Hierarchical reduce =====================
+# Con decenas de analistas, unir todas las secciones en un único prompt
+# desborda la ventana de contexto. En modo jerárquico las secciones se
+# resumen por lotes en paralelo y los resúmenes se vuelven a agrupar (en
+# árbol) hasta que quedan como mucho REDUCE_BATCH_SIZE, que son los que usan
+# write_report, write_introduction y write_conclusion.
+reduce_instructions = """You are a technical editor preparing memos on this overall topic: {topic}
+
+Merge the memos below into a single memo that keeps every distinct insight and drops repetition.
+
+1. Use markdown formatting, starting with a single ## header.
+2. Preserve the citations, annotated in brackets, for example [1] or [2].
+3. End with a ### Sources section that lists every source cited, without repeats.
+
+Here are the memos:
+
+{memos}"""
+
+
+def _reduce_batch_size() -> int:
+    return max(2, int(os.environ.get("REDUCE_BATCH_SIZE", 5)))
+
+
+def _reduce_config() -> dict:
+    return {"max_concurrency": int(os.environ.get("REDUCE_MAX_CONCURRENCY", 8))}
+
+
+def _section_texts(state: ResearchGraphState) -> List[str]:
+    return [getattr(section, "content", section) for section in state["sections"]]
+
+
+def _reduce_prompts(topic: str, sections: List[str]) -> list:
+    batch_size = _reduce_batch_size()
+    return [
+        [
+            SystemMessage(
+                content=reduce_instructions.format(
+                    topic=topic,
+                    memos="\n\n---\n\n".join(sections[i : i + batch_size]),
+                )
+            ),
+            HumanMessage(content="Write the merged memo."),
+        ]
+        for i in range(0, len(sections), batch_size)
+    ]
+
+
+def reduce_sections(state: ResearchGraphState):
+    """Merge the sections batch by batch, level by level, in parallel"""
+    sections = _section_texts(state)
+    while len(sections) > _reduce_batch_size():
+        merged = get_llm("reduce_sections").batch(
+            _reduce_prompts(state["topic"], sections), config=_reduce_config()
+        )
+        sections = [memo.content for memo in merged]
+    return {"reduced_sections": sections}
+
+
+async def areduce_sections(state: ResearchGraphState):
+    """Async twin of reduce_sections"""
+    sections = _section_texts(state)
+    while len(sections) > _reduce_batch_size():
+        merged = await get_llm("reduce_sections").abatch(
+            _reduce_prompts(state["topic"], sections), config=_reduce_config()
+        )
+        sections = [memo.content for memo in merged]
+    return {"reduced_sections": sections}
+
+
 report_writer_instructions = """You are a technical writer creating a report on this overall topic: 
 
 {topic}
@@ -110,9 +186,18 @@ Here are the memos from your analysts to build your report from:
 {context}"""
 
 
-def write_report(state: ResearchGraphState):
-    # Full set of sections
-    sections = state["sections"]
+def _report_sections(state: ResearchGraphState) -> list:
+    # Full set of sections, the reduced set in hierarchical mode or the report
+    # passages in incremental mode
+    return (
+        state.get("reduced_sections")
+        or state.get("report_fragments")
+        or state["sections"]
+    )
+
+
+def _report_messages(state: ResearchGraphState):
+    sections = _report_sections(state)
     topic = state["topic"]
 
     # Concat all sections together
@@ -122,13 +207,75 @@ def write_report(state: ResearchGraphState):
     system_message = report_writer_instructions.format(
         topic=topic, context=formatted_str_sections
     )
-    report = llm.invoke(
-        [SystemMessage(content=system_message)]
-        + [HumanMessage(content=f"Write a report based upon these memos.")]
-    )
+    return [SystemMessage(content=system_message)] + [
+        HumanMessage(content=f"Write a report based upon these memos.")
+    ]
+
+
+def write_report(state: ResearchGraphState):
+    report = get_llm("write_report").invoke(_report_messages(state))
+    return {"content": report.content}
+
+
+async def awrite_report(state: ResearchGraphState):
+    report = await get_llm("write_report").ainvoke(_report_messages(state))
     return {"content": report.content}
 
 
+# ===================== Incremental reduce =====================
+# Cada rama de entrevista ya dejó su pasaje del informe (summarize_section), así
+# que el cuerpo del informe se arma sin LLM: se unen los pasajes y se
+# renumeran sus citas en una única lista de fuentes. Tras la última entrevista
+# solo quedan la introducción y la conclusión (~100 palabras cada una).
+_SOURCES_HEADER = re.compile(r"^#{2,3}\s*Sources\s*$", re.MULTILINE)
+_SOURCE_LINE = re.compile(r"^\s*\[(\d+)\]\s*(.+?)\s*$")
+_CITATION = re.compile(r"\[(\d+)\]")
+
+
+def merge_report_fragments(fragments: List[str]) -> str:
+    """Join report passages into the ``## Insights`` body with one ``## Sources`` list.
+
+    Every passage numbers its sources from [1]; they are renumbered in order of
+    appearance and a source cited by several passages keeps a single number.
+    """
+    numbers = {}  # source -> global number
+    passages = []
+    for fragment in fragments:
+        body, *sources = _SOURCES_HEADER.split(fragment, maxsplit=1)
+        sources = sources[0] if sources else ""
+        local = {}
+        for line in sources.splitlines():
+            match = _SOURCE_LINE.match(line)
+            if match:
+                source = match.group(2)
+                local[match.group(1)] = numbers.setdefault(source, len(numbers) + 1)
+        passages.append(
+            _CITATION.sub(
+                lambda m: (
+                    f"[{local[m.group(1)]}]" if m.group(1) in local else m.group(0)
+                ),
+                body.strip(),
+            )
+        )
+
+    content = "## Insights\n\n" + "\n\n".join(p for p in passages if p)
+    if numbers:
+        content += "\n\n## Sources\n" + "\n".join(
+            f"[{number}] {source}  " for source, number in numbers.items()
+        )
+    return content
+
+
+def assemble_report(state: ResearchGraphState):
+    """Report body from the passages written by every interview (no LLM call)"""
+    return {"content": merge_report_fragments(state["report_fragments"])}
+
+
+async def aassemble_report(state: ResearchGraphState):
+    """Async twin of assemble_report"""
+    return assemble_report(state)
+
+
 intro_conclusion_instructions = """You are a technical writer finishing a report on {topic}
 
 You will be given all of the sections of the report.
@@ -152,9 +299,8 @@ For your conclusion, use ## Conclusion as the section header.
 Here are the sections to reflect on for writing: {formatted_str_sections}"""
 
 
-def write_introduction(state: ResearchGraphState):
-    # Full set of sections
-    sections = state["sections"]
+def _intro_conclusion_messages(state: ResearchGraphState, request: str):
+    sections = _report_sections(state)
     topic = state["topic"]
 
     # Concat all sections together
@@ -165,27 +311,33 @@ def write_introduction(state: ResearchGraphState):
     instructions = intro_conclusion_instructions.format(
         topic=topic, formatted_str_sections=formatted_str_sections
     )
-    intro = llm.invoke(
-        [instructions] + [HumanMessage(content=f"Write the report introduction")]
+    return [instructions] + [HumanMessage(content=request)]
+
+
+def write_introduction(state: ResearchGraphState):
+    intro = get_llm("write_introduction").invoke(
+        _intro_conclusion_messages(state, "Write the report introduction")
     )
     return {"introduction": intro.content}
 
 
-def write_conclusion(state: ResearchGraphState):
-    # Full set of sections
-    sections = state["sections"]
-    topic = state["topic"]
-
-    # Concat all sections together
-    formatted_str_sections = "\n\n".join([f"{section}" for section in sections])
+async def awrite_introduction(state: ResearchGraphState):
+    intro = await get_llm("write_introduction").ainvoke(
+        _intro_conclusion_messages(state, "Write the report introduction")
+    )
+    return {"introduction": intro.content}
 
-    # Summarize the sections into a final report
 
-    instructions = intro_conclusion_instructions.format(
-        topic=topic, formatted_str_sections=formatted_str_sections
+def write_conclusion(state: ResearchGraphState):
+    conclusion = get_llm("write_conclusion").invoke(
+        _intro_conclusion_messages(state, "Write the report conclusion")
     )
-    conclusion = llm.invoke(
-        [instructions] + [HumanMessage(content=f"Write the report conclusion")]
+    return {"conclusion": conclusion.content}
+
+
+async def awrite_conclusion(state: ResearchGraphState):
+    conclusion = await get_llm("write_conclusion").ainvoke(
+        _intro_conclusion_messages(state, "Write the report conclusion")
     )
     return {"conclusion": conclusion.content}
 
@@ -216,97 +368,369 @@ def finalize_report(state: ResearchGraphState):
     return {"final_report": final_report}
 
 
-interview_builder = build_interview_graph()
+async def afinalize_report(state: ResearchGraphState):
+    """Async twin of finalize_report"""
+    return finalize_report(state)
+
+
+def build_research_graph(
+    asynchronous: bool = False,
+    fused_queries: bool = False,
+    hierarchical_reduce: bool = False,
+    checkpointer=None,
+    incremental_reduce: bool = False,
+    incremental_analysts: bool = False,
+):
+    """Build the parent research graph.
+
+    Args:
+        asynchronous: use the async twin of every node, including the interview
+            sub-graph, so the ``Send`` fan-out runs on a single event loop.
+            The compiled graph must then be driven with ``ainvoke``/``astream``.
+        fused_queries: see ``build_interview_graph``.
+        hierarchical_reduce: merge the sections tree-style with
+            ``reduce_sections`` before writing the report, introduction and
+            conclusion, so that runs with dozens of analysts fit the context.
+        checkpointer: saver of the run state, by default ``get_checkpointer()``.
+            With a durable one (SQLite) a crashed run resumes where it stopped.
+        incremental_reduce: every interview also writes its passage of the
+            report as soon as it finishes (``summarize_section``); the report
+            body is then assembled without an LLM call and only the
+            introduction and conclusion are written after the last interview.
+        incremental_analysts: human feedback regenerates only the analysts it
+            adds or changes; the others keep their persona, so their interviews
+            replay the same prompts (served by the LLM cache).
+    """
+    if incremental_reduce and hierarchical_reduce:
+        raise ValueError("Use either incremental_reduce or hierarchical_reduce")
+
+    # The interview sub-graph saves its progress with the parent's checkpointer
+    interview_builder = build_interview_graph(
+        asynchronous=asynchronous,
+        fused_queries=fused_queries,
+        subgraph=True,
+        incremental=incremental_reduce,
+    )
 
+    # Add nodes and edges
+    builder = StateGraph(ResearchGraphState)
+    if asynchronous:
+        builder.add_node(
+            "create_analysts",
+            arevise_analysts if incremental_analysts else acreate_analysts,
+        )
+        builder.add_node("human_feedback", ahuman_feedback)
+        builder.add_node("conduct_interview", interview_builder)
+        builder.add_node(
+            "write_report", aassemble_report if incremental_reduce else awrite_report
+        )
+        builder.add_node("write_introduction", awrite_introduction)
+        builder.add_node("write_conclusion", awrite_conclusion)
+        builder.add_node("finalize_report", afinalize_report)
+        if hierarchical_reduce:
+            builder.add_node("reduce_sections", areduce_sections)
+    else:
+        builder.add_node(
+            "create_analysts",
+            revise_analysts if incremental_analysts else create_analysts,
+        )
+        builder.add_node("human_feedback", human_feedback)
+        builder.add_node("conduct_interview", interview_builder)
+        builder.add_node(
+            "write_report", assemble_report if incremental_reduce else write_report
+        )
+        builder.add_node("write_introduction", write_introduction)
+        builder.add_node("write_conclusion", write_conclusion)
+        builder.add_node("finalize_report", finalize_report)
+        if hierarchical_reduce:
+            builder.add_node("reduce_sections", reduce_sections)
+
+    # Logic
+    builder.add_edge(START, "create_analysts")
+    builder.add_edge("create_analysts", "human_feedback")
+    builder.add_conditional_edges(
+        "human_feedback",
+        ainitiate_all_interviews if asynchronous else initiate_all_interviews,
+        ["create_analysts", "conduct_interview"],
+    )
+    # Writers start from the interviews, or from their reduced sections
+    writers_source = "conduct_interview"
+    if hierarchical_reduce:
+        builder.add_edge("conduct_interview", "reduce_sections")
+        writers_source = "reduce_sections"
+    builder.add_edge(writers_source, "write_report")
+    builder.add_edge(writers_source, "write_introduction")
+    builder.add_edge(writers_source, "write_conclusion")
+    builder.add_edge(
+        ["write_conclusion", "write_report", "write_introduction"], "finalize_report"
+    )
+    builder.add_edge("finalize_report", END)
 
-# Add nodes and edges
-builder = StateGraph(ResearchGraphState)
-builder.add_node("create_analysts", create_analysts)
-builder.add_node("human_feedback", human_feedback)
-builder.add_node("conduct_interview", interview_builder)
-builder.add_node("write_report", write_report)
-builder.add_node("write_introduction", write_introduction)
-builder.add_node("write_conclusion", write_conclusion)
-builder.add_node("finalize_report", finalize_report)
+    # Compile
+    memory = checkpointer or get_checkpointer()
+    # Node timings to INSTRUMENTATION_LOG, see logger_config.py
+    return instrument(
+        builder.compile(interrupt_before=["human_feedback"], checkpointer=memory)
+    )
 
-# Logic
-builder.add_edge(START, "create_analysts")
-builder.add_edge("create_analysts", "human_feedback")
-builder.add_conditional_edges(
-    "human_feedback", initiate_all_interviews, ["create_analysts", "conduct_interview"]
-)
-builder.add_edge("conduct_interview", "write_report")
-builder.add_edge("conduct_interview", "write_introduction")
-builder.add_edge("conduct_interview", "write_conclusion")
-builder.add_edge(
-    ["write_conclusion", "write_report", "write_introduction"], "finalize_report"
-)
-builder.add_edge("finalize_report", END)
 
-# Compile
-memory = MemorySaver()
-graph = builder.compile(interrupt_before=["human_feedback"], checkpointer=memory)
+def _print_analysts(analysts):
+    for analyst in analysts:
+        print(f"Name: {analyst.name}")
+        print(f"Affiliation: {analyst.affiliation}")
+        print(f"Role: {analyst.role}")
+        print(f"Description: {analyst.description}")
+        print("-" * 50)
+
+
+def _awaiting_feedback(snapshot) -> bool:
+    return snapshot.next == ("human_feedback",)
+
+
+def _needs_regeneration(snapshot, human_analyst_feedback: Optional[str]) -> bool:
+    # The feedback is applied once: a resumed run that already regenerated the
+    # analysts with it goes straight to the approval
+    return bool(human_analyst_feedback) and (
+        snapshot.values.get("human_analyst_feedback") != human_analyst_feedback
+    )
+
 
-# Inputs
-max_analysts = 3
-topic = "Treatments using nanotechnology-based vaccines for the treatment of diseases in fish farms"
-thread = {"configurable": {"thread_id": "1"}}
+def run_research(
+    topic: str,
+    max_analysts: int,
+    thread: dict,
+    human_analyst_feedback: Optional[str] = None,
+    max_num_turns: int = 2,
+    graph=None,
+):
+    """Run the whole research pipeline with ``stream``.
+
+    The analysts are generated, optionally regenerated once with
+    ``human_analyst_feedback``, then approved and interviewed.
+
+    If ``thread`` already has checkpoints (a run that crashed or was killed),
+    the run resumes from its last completed superstep: finished interviews and
+    report sections are not executed again.
+
+    Returns:
+        str: The final report.
+    """
+    graph = graph or build_research_graph()
+
+    snapshot = graph.get_state(thread)
+    if not snapshot.values:
+        # Run the graph until the first interruption
+        print("-" * 25, "💡💡 First Analyst 💡💡", "-" * 25)
+        for event in graph.stream(
+            {
+                "topic": topic,
+                "max_analysts": max_analysts,
+                "max_interview_turns": max_num_turns,
+            },
+            thread,
+            stream_mode="values",
+        ):
+            _print_analysts(event.get("analysts", ""))
+        snapshot = graph.get_state(thread)
+    elif snapshot.next:
+        print(f"Resuming run {thread['configurable']['thread_id']} at {snapshot.next}")
+
+    while snapshot.next:
+        if _awaiting_feedback(snapshot) and _needs_regeneration(
+            snapshot, human_analyst_feedback
+        ):
+            # We now update the state as if we are the human_feedback node
+            graph.update_state(
+                thread,
+                {"human_analyst_feedback": human_analyst_feedback},
+                as_node="human_feedback",
+            )
 
-# Run the graph until the first interruption
-print("-" * 25, "💡💡 First Analyst 💡💡", "-" * 25)
-for event in graph.stream(
-    {"topic": topic, "max_analysts": max_analysts}, thread, stream_mode="values"
+            # Check
+            print("-" * 25, "🤖🤖 Analyst after HIL 🤖🤖", "-" * 25)
+            for event in graph.stream(None, thread, stream_mode="values"):
+                _print_analysts(event.get("analysts", ""))
+        else:
+            if _awaiting_feedback(snapshot):
+                # Confirm we are happy
+                graph.update_state(
+                    thread, {"human_analyst_feedback": None}, as_node="human_feedback"
+                )
+
+            # Continue
+            for event in graph.stream(None, thread, stream_mode="updates"):
+                print("--Node--")
+                print(next(iter(event.keys())))
+        snapshot = graph.get_state(thread)
+
+    return snapshot.values.get("final_report")
+
+
+async def arun_research(
+    topic: str,
+    max_analysts: int,
+    thread: dict,
+    human_analyst_feedback: Optional[str] = None,
+    max_num_turns: int = 2,
+    graph=None,
 ):
-    analysts = event.get("analysts", "")
-    if analysts:
-        for analyst in analysts:
-            print(f"Name: {analyst.name}")
-            print(f"Affiliation: {analyst.affiliation}")
-            print(f"Role: {analyst.role}")
-            print(f"Description: {analyst.description}")
-            print("-" * 50)
-
-# We now update the state as if we are the human_feedback node
-graph.update_state(
-    thread,
-    {"human_analyst_feedback": "Add an Animal science doctor and biology phd"},
-    as_node="human_feedback",
-)
+    """Async twin of run_research, driven with ``astream`` on one event loop."""
+    graph = graph or build_research_graph(asynchronous=True)
+
+    snapshot = await graph.aget_state(thread)
+    if not snapshot.values:
+        print("-" * 25, "💡💡 First Analyst 💡💡", "-" * 25)
+        async for event in graph.astream(
+            {
+                "topic": topic,
+                "max_analysts": max_analysts,
+                "max_interview_turns": max_num_turns,
+            },
+            thread,
+            stream_mode="values",
+        ):
+            _print_analysts(event.get("analysts", ""))
+        snapshot = await graph.aget_state(thread)
+    elif snapshot.next:
+        print(f"Resuming run {thread['configurable']['thread_id']} at {snapshot.next}")
+
+    while snapshot.next:
+        if _awaiting_feedback(snapshot) and _needs_regeneration(
+            snapshot, human_analyst_feedback
+        ):
+            await graph.aupdate_state(
+                thread,
+                {"human_analyst_feedback": human_analyst_feedback},
+                as_node="human_feedback",
+            )
+            print("-" * 25, "🤖🤖 Analyst after HIL 🤖🤖", "-" * 25)
+            async for event in graph.astream(None, thread, stream_mode="values"):
+                _print_analysts(event.get("analysts", ""))
+        else:
+            if _awaiting_feedback(snapshot):
+                await graph.aupdate_state(
+                    thread, {"human_analyst_feedback": None}, as_node="human_feedback"
+                )
+            async for event in graph.astream(None, thread, stream_mode="updates"):
+                print("--Node--")
+                print(next(iter(event.keys())))
+        snapshot = await graph.aget_state(thread)
+
+    return snapshot.values.get("final_report")
 
-# Check
-print("-" * 25, "🤖🤖 Analyst after HIL 🤖🤖", "-" * 25)
-for event in graph.stream(None, thread, stream_mode="values"):
-    analysts = event.get("analysts", "")
-    if analysts:
-        for analyst in analysts:
-            print(f"Name: {analyst.name}")
-            print(f"Affiliation: {analyst.affiliation}")
-            print(f"Role: {analyst.role}")
-            print(f"Description: {analyst.description}")
-            print("-" * 50)
-
-# Confirm we are happy
-graph.update_state(thread, {"human_analyst_feedback": None}, as_node="human_feedback")
-
-# Continue
-for event in graph.stream(None, thread, stream_mode="updates"):
-    print("--Node--")
-    node_name = next(iter(event.keys()))
-    print(node_name)
 
 # ===================== Create a image graph =====================
-graph_image = graph.get_graph(xray=True)
-png_bytes = graph_image.draw_mermaid_png()
-image = Image.open(io.BytesIO(png_bytes))
-image.save("ai_research_assistant.png")
-print("✅ Graph final agent image saved as graph.png")
+def draw_graph(graph, path: str):
+    # PIL is only needed here
+    from PIL import Image
+
+    graph_image = graph.get_graph(xray=True)
+    png_bytes = graph_image.draw_mermaid_png()
+    image = Image.open(io.BytesIO(png_bytes))
+    image.save(path)
+    print(f"✅ Graph final agent image saved as {path}")
+
+
+# Run state of the research command when CHECKPOINT_DB is not set
+DEFAULT_RUNS_DB = ".cache/research_runs.sqlite"
+
+
+def main(argv=None):
+    """Entry point of the ``research`` command."""
+    parser = argparse.ArgumentParser(
+        prog="research",
+        description="Research a topic with a team of AI analysts and write a report.",
+    )
+    parser.add_argument("topic", help="Research topic")
+    parser.add_argument("--max-analysts", type=int, default=3)
+    parser.add_argument("--max-num-turns", type=int, default=2)
+    parser.add_argument(
+        "--feedback", help="Human feedback used to regenerate the analysts once"
+    )
+    parser.add_argument(
+        "--run-id",
+        "--thread-id",
+        dest="thread_id",
+        help="Checkpoint thread (default: random). Run again with the same id "
+        "to resume a run that crashed",
+    )
+    parser.add_argument(
+        "--checkpoint-db",
+        default=None,
+        help=f"SQLite file with the run state (default: CHECKPOINT_DB or "
+        f"{DEFAULT_RUNS_DB})",
+    )
+    parser.add_argument("--output", default="final_report.md")
+    parser.add_argument("--draw-graph", metavar="PNG", help="Save the graph image")
+    parser.add_argument(
+        "--async",
+        dest="asynchronous",
+        action="store_true",
+        help="Run every node on a single asyncio event loop",
+    )
+    parser.add_argument(
+        "--fused-queries",
+        action="store_true",
+        help="Write each question and its search query in a single LLM call",
+    )
+    parser.add_argument(
+        "--hierarchical-reduce",
+        action="store_true",
+        help="Merge the sections in batches before writing the report "
+        "(for runs with many analysts)",
+    )
+    parser.add_argument(
+        "--incremental-reduce",
+        action="store_true",
+        help="Write each interview's passage of the report as soon as it "
+        "finishes, instead of the whole report after the last one",
+    )
+    parser.add_argument(
+        "--incremental-analysts",
+        action="store_true",
+        help="With --feedback, regenerate only the analysts the feedback adds "
+        "or changes and keep the others",
+    )
+    args = parser.parse_args(argv)
+
+    load_env()
+    thread = {"configurable": {"thread_id": args.thread_id or uuid.uuid4().hex}}
+    print(f"Run id: {thread['configurable']['thread_id']}")
+
+    # Durable run state, so that a crashed run can be resumed with its run id
+    checkpoint_db = args.checkpoint_db or os.environ.get(
+        "CHECKPOINT_DB", DEFAULT_RUNS_DB
+    )
+    graph = build_research_graph(
+        asynchronous=args.asynchronous,
+        fused_queries=args.fused_queries,
+        hierarchical_reduce=args.hierarchical_reduce,
+        checkpointer=get_checkpointer(checkpoint_db),
+        incremental_reduce=args.incremental_reduce,
+        incremental_analysts=args.incremental_analysts,
+    )
+    run_args = dict(
+        topic=args.topic,
+        max_analysts=args.max_analysts,
+        thread=thread,
+        human_analyst_feedback=args.feedback,
+        max_num_turns=args.max_num_turns,
+        graph=graph,
+    )
+    if args.asynchronous:
+        report = asyncio.run(arun_research(**run_args))
+    else:
+        report = run_research(**run_args)
+
+    # Guardar el informe en un archivo Markdown
+    with open(args.output, "w", encoding="utf-8") as f:
+        f.write(report)
+    print(f"Reporte guardado en {args.output}")
 
-final_state = graph.get_state(thread)
-report = final_state.values.get("final_report")
+    if args.draw_graph:
+        draw_graph(graph, args.draw_graph)
+    return 0
 
-# Guardar el informe en un archivo Markdown
-with open("final_report.md", "w", encoding="utf-8") as f:
-    f.write(report)
 
-print("Reporte guardado en final_report.md")
-print("^^^^^^^^^^ 🚩🚩 END PARENT AGENT 🚩🚩 ^^^^^^^^^^^^")
+if __name__ == "__main__":
+    sys.exit(main())
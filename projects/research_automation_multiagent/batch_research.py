@@ -0,0 +1,263 @@
+"""Research many topics in one process.
+
+Topics come from a JSONL file, one object per line::
+
+    {"topic": "Quantum error correction", "max_analysts": 3, "max_num_turns": 2}
+    {"id": "rag-2025", "topic": "RAG evaluation", "feedback": "Add a CFO"}
+
+Only ``topic`` is required. Every topic runs through the same compiled async
+graph on one event loop, so they all share the LLM connection pool, the LLM
+and retrieval caches and the adaptive concurrency limiters. One report is
+written per topic, plus ``summary.json`` with the timings of the batch.
+
+With CHECKPOINT_DB set the run state is durable: running the same file again
+with the same ``--run-id`` resumes the topics that were interrupted. A new
+run id (the default), or a topic whose settings changed, researches the
+topic again instead of returning the stored report.
+"""
+
+import argparse
+import asyncio
+import contextlib
+import hashlib
+import json
+import os
+import re
+import statistics
+import sys
+import time
+import uuid
+from typing import List, Optional
+
+from ai_agents_playground.llm_client import load_env
+from langgraph.checkpoint.memory import InMemorySaver
+from projects.research_automation_multiagent.ai_research_assistant import (
+    arun_research,
+    build_research_graph,
+)
+
+DEFAULT_MAX_ANALYSTS = 3
+DEFAULT_MAX_NUM_TURNS = 2
+
+
+def _slug(text: str) -> str:
+    slug = re.sub(r"[^a-z0-9]+", "-", text.lower()).strip("-")
+    return slug[:60] or "topic"
+
+
+def load_topics(path: str) -> List[dict]:
+    """Read the jobs of a JSONL file, filling in ids and default settings."""
+    jobs = []
+    seen = set()
+    with open(path, encoding="utf-8") as f:
+        for line_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            job = json.loads(line)
+            if not job.get("topic"):
+                raise ValueError(f"{path}:{line_number}: missing 'topic'")
+            job_id = str(job.get("id") or _slug(job["topic"]))
+            # Repeated topics get their own report
+            if job_id in seen:
+                job_id = f"{job_id}-{line_number}"
+            seen.add(job_id)
+            jobs.append(
+                {
+                    "id": job_id,
+                    "topic": job["topic"],
+                    "max_analysts": int(job.get("max_analysts", DEFAULT_MAX_ANALYSTS)),
+                    "max_num_turns": int(
+                        job.get("max_num_turns", DEFAULT_MAX_NUM_TURNS)
+                    ),
+                    "feedback": job.get("feedback"),
+                }
+            )
+    return jobs
+
+
+def job_thread_id(run_id: str, job: dict, settings: dict) -> str:
+    """Checkpoint thread of a job: its batch run, id and a hash of its settings.
+
+    Only the same run with the same topic settings (and graph modes) resumes;
+    anything else gets a new thread, so a stale report is never reused.
+    """
+    key = json.dumps(
+        {**settings, **{k: v for k, v in job.items() if k != "id"}}, sort_keys=True
+    )
+    digest = hashlib.blake2b(key.encode("utf-8"), digest_size=6).hexdigest()
+    return f"batch-{run_id}-{job['id']}-{digest}"
+
+
+async def research_topic(
+    graph,
+    job: dict,
+    semaphore: asyncio.Semaphore,
+    output_dir: str,
+    thread_id: str,
+) -> dict:
+    """Research one topic once a slot is free and write its report.
+
+    Returns:
+        dict: Summary of the run (status, timings, report path or error).
+    """
+    report_path = os.path.join(output_dir, f"{job['id']}.md")
+    result = {"id": job["id"], "topic": job["topic"], "thread_id": thread_id}
+
+    async with semaphore:
+        start = time.perf_counter()
+        try:
+            report = await arun_research(
+                topic=job["topic"],
+                max_analysts=job["max_analysts"],
+                thread={"configurable": {"thread_id": thread_id}},
+                human_analyst_feedback=job["feedback"],
+                max_num_turns=job["max_num_turns"],
+                graph=graph,
+            )
+            with open(report_path, "w", encoding="utf-8") as f:
+                f.write(report or "")
+            result.update(status="ok", report=report_path)
+        except Exception as e:
+            result.update(status="error", error=repr(e))
+        result["wall_s"] = round(time.perf_counter() - start, 3)
+
+    # In-memory checkpoints of finished topics only cost memory
+    if isinstance(graph.checkpointer, InMemorySaver):
+        await graph.checkpointer.adelete_thread(thread_id)
+    return result
+
+
+async def run_batch(
+    jobs: List[dict],
+    output_dir: str,
+    parallelism: int = 4,
+    fused_queries: bool = False,
+    hierarchical_reduce: bool = False,
+    incremental_reduce: bool = False,
+    incremental_analysts: bool = False,
+    run_id: Optional[str] = None,
+) -> dict:
+    """Research every job, ``parallelism`` topics at a time.
+
+    ``run_id`` names the batch run; with CHECKPOINT_DB set, the same run id
+    resumes its unfinished topics. A new one is generated by default.
+
+    Returns:
+        dict: The batch summary also written to ``summary.json``.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    graph = build_research_graph(
+        asynchronous=True,
+        fused_queries=fused_queries,
+        hierarchical_reduce=hierarchical_reduce,
+        incremental_reduce=incremental_reduce,
+        incremental_analysts=incremental_analysts,
+    )
+    semaphore = asyncio.Semaphore(parallelism)
+    run_id = run_id or uuid.uuid4().hex[:12]
+    # Graph modes change the report too
+    settings = {
+        "fused_queries": fused_queries,
+        "hierarchical_reduce": hierarchical_reduce,
+        "incremental_reduce": incremental_reduce,
+        "incremental_analysts": incremental_analysts,
+    }
+    print(f"Batch run id: {run_id}", file=sys.stderr)
+
+    start = time.perf_counter()
+    results = []
+    tasks = [
+        research_topic(
+            graph, job, semaphore, output_dir, job_thread_id(run_id, job, settings)
+        )
+        for job in jobs
+    ]
+    # The pipeline prints progress banners for every topic; keep stderr readable
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        for done, task in enumerate(asyncio.as_completed(tasks), 1):
+            result = await task
+            results.append(result)
+            outcome = (
+                f"ok in {result['wall_s']:.1f}s"
+                if result["status"] == "ok"
+                else f"failed: {result['error']}"
+            )
+            print(f"[{done}/{len(jobs)}] {result['id']}: {outcome}", file=sys.stderr)
+
+    times = [r["wall_s"] for r in results if r["status"] == "ok"]
+    summary = {
+        "run_id": run_id,
+        "topics": len(jobs),
+        "ok": len(times),
+        "failed": len(jobs) - len(times),
+        "parallelism": parallelism,
+        "wall_s": round(time.perf_counter() - start, 3),
+        "topic_s": {
+            "mean": round(statistics.mean(times), 3) if times else None,
+            "median": round(statistics.median(times), 3) if times else None,
+            "max": max(times) if times else None,
+        },
+        "results": sorted(results, key=lambda r: r["id"]),
+    }
+    with open(os.path.join(output_dir, "summary.json"), "w", encoding="utf-8") as f:
+        json.dump(summary, f, indent=2, ensure_ascii=False)
+    return summary
+
+
+def main(argv: Optional[list] = None):
+    """Entry point of the ``research-batch`` command."""
+    parser = argparse.ArgumentParser(
+        prog="research-batch",
+        description="Research every topic of a JSONL file and write one report per topic.",
+    )
+    parser.add_argument("topics", help="JSONL file, one {'topic': ...} per line")
+    parser.add_argument("--output-dir", default="reports")
+    parser.add_argument(
+        "--run-id",
+        help="Batch run (default: new). With CHECKPOINT_DB set, pass the id of "
+        "an interrupted run to resume its unfinished topics",
+    )
+    parser.add_argument(
+        "--parallelism", type=int, default=4, help="Topics researched at the same time"
+    )
+    parser.add_argument(
+        "--skip-existing",
+        action="store_true",
+        help="Skip the topics whose report is already in the output directory",
+    )
+    parser.add_argument("--fused-queries", action="store_true")
+    parser.add_argument("--hierarchical-reduce", action="store_true")
+    parser.add_argument("--incremental-reduce", action="store_true")
+    parser.add_argument("--incremental-analysts", action="store_true")
+    args = parser.parse_args(argv)
+
+    load_env()
+    jobs = load_topics(args.topics)
+    if args.skip_existing:
+        jobs = [
+            job
+            for job in jobs
+            if not os.path.exists(os.path.join(args.output_dir, f"{job['id']}.md"))
+        ]
+
+    summary = asyncio.run(
+        run_batch(
+            jobs,
+            args.output_dir,
+            parallelism=args.parallelism,
+            fused_queries=args.fused_queries,
+            hierarchical_reduce=args.hierarchical_reduce,
+            incremental_reduce=args.incremental_reduce,
+            incremental_analysts=args.incremental_analysts,
+            run_id=args.run_id,
+        )
+    )
+    print(
+        f"{summary['ok']}/{summary['topics']} reports in {args.output_dir} "
+        f"({summary['wall_s']:.1f}s, summary.json)"
+    )
+    return 1 if summary["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,126 @@
+import logging
+import os
+import re
+from functools import lru_cache
+from typing import Iterable, List
+
+logger = logging.getLogger(__name__)
+
+# Armado del contexto para los prompts.
+# `context` guarda los ids de los documentos (document_store.py); los nodos los
+# materializan con get_documents y aquí, en vez de meter la lista completa en
+# el prompt, se compactan y se eligen por relevancia y recencia hasta llenar un
+# presupuesto de tokens por nodo. Las entradas con varios documentos separados
+# por DOCUMENT_SEPARATOR (estados anteriores) también se aceptan.
+DOCUMENT_SEPARATOR = "\n\n---\n\n"
+
+# Tokens per node, override with CONTEXT_TOKEN_BUDGET_<NODE>
+DEFAULT_BUDGETS = {
+    "generate_answer": 6000,
+    "write_section": 8000,
+}
+
+# Score = RELEVANCE_WEIGHT * term overlap + RECENCY_WEIGHT * position
+RELEVANCE_WEIGHT = 0.7
+RECENCY_WEIGHT = 0.3
+
+_WORD = re.compile(r"\w{3,}")
+
+
+@lru_cache(maxsize=1)
+def _encoding():
+    """Local tiktoken encoding, or None when it cannot be loaded (offline)."""
+    try:
+        import tiktoken
+
+        return tiktoken.get_encoding(os.environ.get("CONTEXT_TOKENIZER", "o200k_base"))
+    except Exception as e:
+        logger.warning(f"tiktoken unavailable ({e}), estimating 4 chars per token")
+        return None
+
+
+def count_tokens(text: str) -> int:
+    encoding = _encoding()
+    if encoding is None:
+        return len(text) // 4 + 1
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def truncate_tokens(text: str, budget: int) -> str:
+    """Beginning of ``text`` that fits in ``budget`` tokens."""
+    encoding = _encoding()
+    if encoding is None:
+        return text[: max(budget - 1, 0) * 4]
+    return encoding.decode(encoding.encode(text, disallowed_special=())[:budget])
+
+
+def context_budget(node: str) -> int:
+    value = os.environ.get(f"CONTEXT_TOKEN_BUDGET_{node.upper()}")
+    return int(value) if value else DEFAULT_BUDGETS[node]
+
+
+def _compact(document: str) -> str:
+    # Collapse the blank lines and runs of spaces that scraped pages are full of
+    lines = (" ".join(line.split()) for line in document.strip().splitlines())
+    return "\n".join(line for line in lines if line)
+
+
+def split_documents(context: Iterable) -> List[str]:
+    """Flatten the ``context`` state key into unique documents, oldest first."""
+    documents = []
+    for entry in context:
+        content = getattr(entry, "content", entry)
+        for document in str(content).split(DOCUMENT_SEPARATOR):
+            document = _compact(document)
+            if not document:
+                continue
+            # Keep the most recent occurrence of repeated documents
+            if document in documents:
+                documents.remove(document)
+            documents.append(document)
+    return documents
+
+
+def assemble_context(context: Iterable, query: str, budget: int) -> str:
+    """Pick the documents that fit in ``budget`` tokens.
+
+    Args:
+        context: the ``context`` state key (messages or strings).
+        query: text the documents should be relevant to (last question,
+            analyst focus, ...).
+        budget: maximum number of tokens of the assembled context.
+
+    Returns:
+        str: The selected documents, in their original order.
+    """
+    documents = split_documents(context)
+    if not documents:
+        return ""
+
+    query_terms = set(_WORD.findall(query.lower()))
+    scored = []
+    for position, document in enumerate(documents):
+        relevance = 0.0
+        if query_terms:
+            terms = set(_WORD.findall(document.lower()))
+            relevance = len(query_terms & terms) / len(query_terms)
+        recency = (position + 1) / len(documents)
+        score = RELEVANCE_WEIGHT * relevance + RECENCY_WEIGHT * recency
+        scored.append((score, position, document))
+
+    selected = []
+    used = 0
+    separator_tokens = count_tokens(DOCUMENT_SEPARATOR)
+    for _, position, document in sorted(scored, reverse=True):
+        tokens = count_tokens(document) + separator_tokens
+        if used + tokens > budget:
+            continue
+        selected.append((position, document))
+        used += tokens
+
+    if not selected:
+        # Not even the best document fits: keep its beginning
+        _, position, document = max(scored)
+        selected.append((position, truncate_tokens(document, budget)))
+
+    return DOCUMENT_SEPARATOR.join(document for _, document in sorted(selected))
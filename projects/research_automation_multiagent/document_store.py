@@ -0,0 +1,91 @@
+import hashlib
+import logging
+import os
+from functools import lru_cache
+from typing import Iterable, List, Optional
+
+from ai_agents_playground.disk_cache import DiskCache
+
+logger = logging.getLogger(__name__)
+
+# Almacén de documentos fuera del estado.
+# Las páginas de Tavily y Wikipedia se guardan una sola vez, indexadas por el
+# hash de su contenido, y el estado de la entrevista solo lleva sus ids. Así
+# los checkpoints no copian los documentos completos en cada paso; el texto se
+# recupera (get_documents) únicamente al construir un prompt.
+DOCUMENT_ID_PREFIX = "doc-"
+
+
+def document_id(document: str) -> str:
+    """Content address of a document: the same text always gets the same id."""
+    digest = hashlib.blake2b(document.encode("utf-8"), digest_size=16).hexdigest()
+    return DOCUMENT_ID_PREFIX + digest
+
+
+def _env_int(name: str, default: int) -> Optional[int]:
+    value = int(os.environ.get(name) or default)
+    return value if value > 0 else None
+
+
+@lru_cache(maxsize=None)
+def get_document_store() -> DiskCache:
+    """Process-wide document store configured from the environment.
+
+    The store is the only copy of the documents that checkpoints refer to by
+    id, so it is unbounded by default: an evicted document is lost for every
+    thread that still references it, and a resumed run would answer without it.
+
+    Variables:
+        DOCUMENT_STORE_PATH: SQLite file (default .cache/documents.sqlite).
+        DOCUMENT_STORE_MAX_BYTES: opt-in LRU size limit, default 0 (unbounded).
+            Only for stores whose old threads are not resumed.
+    """
+    return DiskCache(
+        os.environ.get(
+            "DOCUMENT_STORE_PATH", os.path.join(".cache", "documents.sqlite")
+        ),
+        table="documents",
+        max_bytes=_env_int("DOCUMENT_STORE_MAX_BYTES", 0),
+    )
+
+
+def put_documents(documents: Iterable[str]) -> List[str]:
+    """Store the documents (once per content) and return their ids."""
+    store = get_document_store()
+    ids = []
+    for document in documents:
+        doc_id = document_id(document)
+        # The same page found by several analysts keeps a single row
+        store.set(doc_id, document.encode("utf-8"))
+        ids.append(doc_id)
+    return ids
+
+
+# Documents are immutable, recently used ones stay in memory
+@lru_cache(maxsize=1024)
+def _load(doc_id: str) -> str:
+    value = get_document_store().get(doc_id)
+    # Raising keeps misses out of the lru_cache
+    if value is None:
+        raise KeyError(doc_id)
+    return value.decode("utf-8")
+
+
+def get_documents(ids: Iterable[str]) -> List[str]:
+    """Materialize the documents of ``ids``, in order.
+
+    Missing ids (evicted from the store) are skipped with a warning. Entries
+    that are not ids (states saved before the store existed) are returned
+    as they are.
+    """
+    documents = []
+    for doc_id in ids:
+        content = getattr(doc_id, "content", doc_id)
+        if not (isinstance(content, str) and content.startswith(DOCUMENT_ID_PREFIX)):
+            documents.append(content)
+            continue
+        try:
+            documents.append(_load(content))
+        except KeyError:
+            logger.warning(f"Document {content} is no longer in the document store")
+    return documents
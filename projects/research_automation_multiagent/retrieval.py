@@ -0,0 +1,251 @@
+import asyncio
+import json
+import logging
+import os
+from functools import lru_cache
+from typing import Awaitable, Callable, List, Optional
+
+from ai_agents_playground.concurrency import acall_limited, call_limited
+from ai_agents_playground.disk_cache import DiskCache
+from langchain_core.documents import Document
+from logger_config import timed
+
+# langchain_community, tavily and aiohttp are imported on first use, so that
+# importing the research graphs stays cheap.
+
+logger = logging.getLogger(__name__)
+
+# ===================== Retrieval cache =====================
+# Los resultados de Tavily y Wikipedia se guardan en disco, indexados por
+# proveedor y consulta normalizada, para que los temas repetidos no vuelvan
+# a salir a la red.
+DEFAULT_TTLS = {
+    "tavily": 24 * 3600,  # Web results go stale quickly
+    "wikipedia": 30 * 24 * 3600,
+}
+
+
+def _env_int(name: str, default: int) -> Optional[int]:
+    value = int(os.environ.get(name) or default)
+    return value if value > 0 else None
+
+
+@lru_cache(maxsize=None)
+def get_retrieval_cache() -> Optional[DiskCache]:
+    """Process-wide retrieval cache configured from the environment.
+
+    Variables:
+        RETRIEVAL_CACHE: "off" disables the cache.
+        RETRIEVAL_CACHE_PATH: SQLite file (default .cache/retrieval_cache.sqlite).
+        RETRIEVAL_CACHE_MAX_BYTES: LRU size limit, default 256 MB, 0 for unbounded.
+        RETRIEVAL_CACHE_MAX_ENTRIES: default 0 (unbounded).
+        RETRIEVAL_TTL_TAVILY / RETRIEVAL_TTL_WIKIPEDIA: seconds, per provider.
+        RETRIEVAL_CACHE_ONLY: "1" never goes to the network; misses return
+            no documents.
+    """
+    if os.environ.get("RETRIEVAL_CACHE", "on").lower() in ("0", "off", "false"):
+        return None
+    return DiskCache(
+        os.environ.get(
+            "RETRIEVAL_CACHE_PATH", os.path.join(".cache", "retrieval_cache.sqlite")
+        ),
+        table="retrieval_results",
+        max_entries=_env_int("RETRIEVAL_CACHE_MAX_ENTRIES", 0),
+        max_bytes=_env_int("RETRIEVAL_CACHE_MAX_BYTES", 256 * 1024 * 1024),
+    )
+
+
+def _cache_only() -> bool:
+    return os.environ.get("RETRIEVAL_CACHE_ONLY", "").lower() in ("1", "on", "true")
+
+
+def _ttl(provider: str) -> Optional[int]:
+    return _env_int(f"RETRIEVAL_TTL_{provider.upper()}", DEFAULT_TTLS[provider])
+
+
+def _cache_key(provider: str, query: str, limit: int) -> str:
+    normalized = " ".join(query.lower().split())
+    return f"{provider}|{limit}|{normalized}"
+
+
+def _lookup(provider: str, query: str, limit: int) -> Optional[list]:
+    cache = get_retrieval_cache()
+    if cache is None:
+        return None
+    raw = cache.get(_cache_key(provider, query, limit), max_age=_ttl(provider))
+    return json.loads(raw) if raw is not None else None
+
+
+def _store(provider: str, query: str, limit: int, docs: list) -> None:
+    cache = get_retrieval_cache()
+    if cache is not None:
+        cache.set(_cache_key(provider, query, limit), json.dumps(docs).encode("utf-8"))
+
+
+def _offline_miss(provider: str, query: str) -> list:
+    logger.warning(f"Retrieval cache-only mode: no {provider} results for {query!r}")
+    return []
+
+
+def _cached(provider: str, query: str, limit: int, fetch: Callable[[], list]) -> list:
+    with timed("retrieval", provider=provider, query=query) as span:
+        docs = _lookup(provider, query, limit)
+        span["cached"] = docs is not None
+        if docs is not None:
+            return docs
+        if _cache_only():
+            return _offline_miss(provider, query)
+        # Adaptive concurrency per provider, see ai_agents_playground/concurrency.py
+        docs = call_limited(provider, fetch)
+        # Tavily returns an error string instead of raising
+        if isinstance(docs, list):
+            span["results"] = len(docs)
+            _store(provider, query, limit, docs)
+        return docs
+
+
+async def _acached(
+    provider: str, query: str, limit: int, fetch: Callable[[], Awaitable[list]]
+) -> list:
+    with timed("retrieval", provider=provider, query=query) as span:
+        docs = _lookup(provider, query, limit)
+        span["cached"] = docs is not None
+        if docs is not None:
+            return docs
+        if _cache_only():
+            return _offline_miss(provider, query)
+        docs = await acall_limited(provider, fetch)
+        if isinstance(docs, list):
+            span["results"] = len(docs)
+            _store(provider, query, limit, docs)
+        return docs
+
+
+def _to_documents(docs: list) -> List[Document]:
+    return [
+        Document(page_content=d["page_content"], metadata=d["metadata"]) for d in docs
+    ]
+
+
+def _from_documents(docs: List[Document]) -> list:
+    return [{"page_content": d.page_content, "metadata": d.metadata} for d in docs]
+
+
+# ===================== Search clients =====================
+TAVILY_MAX_RESULTS = 3
+
+
+@lru_cache(maxsize=None)
+def get_tavily_search():
+    """Tavily web search tool, built on first use (needs TAVILY_API_KEY)."""
+    from langchain_community.tools.tavily_search import TavilySearchResults
+
+    return TavilySearchResults(max_results=TAVILY_MAX_RESULTS)
+
+
+def search_web_docs(query: str) -> List[dict]:
+    """Tavily results for ``query`` as a list of {"url", "content", ...} dicts."""
+    return _cached(
+        "tavily", query, TAVILY_MAX_RESULTS, lambda: get_tavily_search().invoke(query)
+    )
+
+
+async def asearch_web_docs(query: str) -> List[dict]:
+    return await _acached(
+        "tavily",
+        query,
+        TAVILY_MAX_RESULTS,
+        lambda: get_tavily_search().ainvoke(query),
+    )
+
+
+def load_wikipedia(query: str, load_max_docs: int = 2) -> List[Document]:
+    def fetch():
+        from langchain_community.document_loaders import WikipediaLoader
+
+        pages = WikipediaLoader(query=query, load_max_docs=load_max_docs).load()
+        return _from_documents(pages)
+
+    return _to_documents(_cached("wikipedia", query, load_max_docs, fetch))
+
+
+async def aload_wikipedia(query: str, load_max_docs: int = 2) -> List[Document]:
+    async def fetch():
+        return _from_documents(await _afetch_wikipedia(query, load_max_docs))
+
+    return _to_documents(await _acached("wikipedia", query, load_max_docs, fetch))
+
+
+# Cliente asíncrono de Wikipedia.
+# WikipediaLoader (paquete `wikipedia`) solo es síncrono, así que en el camino
+# async hablamos directamente con la API de MediaWiki y devolvemos documentos
+# con la misma forma que WikipediaLoader.load().
+WIKIPEDIA_API_URL = "https://en.wikipedia.org/w/api.php"
+WIKIPEDIA_HEADERS = {"User-Agent": "ai-agents-playground/0.1 (research assistant)"}
+
+
+async def _wikipedia_page(
+    session: "aiohttp.ClientSession", title: str, doc_content_chars_max: int
+) -> Optional[Document]:
+    params = {
+        "action": "query",
+        "format": "json",
+        "formatversion": "2",
+        "prop": "extracts|info",
+        "inprop": "url",
+        "explaintext": "1",
+        "redirects": "1",
+        "titles": title,
+    }
+    async with session.get(WIKIPEDIA_API_URL, params=params) as response:
+        response.raise_for_status()
+        payload = await response.json()
+
+    pages = payload.get("query", {}).get("pages", [])
+    if not pages or pages[0].get("missing"):
+        return None
+    page = pages[0]
+    content = page.get("extract", "")
+    return Document(
+        page_content=content[:doc_content_chars_max],
+        metadata={
+            "title": page["title"],
+            "summary": content.split("\n\n", 1)[0],
+            "source": page.get("fullurl", ""),
+        },
+    )
+
+
+async def _afetch_wikipedia(
+    query: str, load_max_docs: int = 2, doc_content_chars_max: int = 4000
+) -> List[Document]:
+    """Async counterpart of ``WikipediaLoader(query, load_max_docs).load()``.
+
+    Args:
+        query: Search query.
+        load_max_docs: Number of pages to return.
+        doc_content_chars_max: Characters kept from every page.
+    """
+    import aiohttp
+
+    search_params = {
+        "action": "query",
+        "format": "json",
+        "list": "search",
+        "srsearch": query[:300],
+        "srlimit": str(load_max_docs),
+    }
+    async with aiohttp.ClientSession(headers=WIKIPEDIA_HEADERS) as session:
+        async with session.get(WIKIPEDIA_API_URL, params=search_params) as response:
+            response.raise_for_status()
+            payload = await response.json()
+        titles = [hit["title"] for hit in payload.get("query", {}).get("search", [])]
+
+        # Las páginas se descargan en paralelo sobre el mismo event loop
+        pages = await asyncio.gather(
+            *(
+                _wikipedia_page(session, title, doc_content_chars_max)
+                for title in titles
+            )
+        )
+    return [page for page in pages if page is not None]
@@ -0,0 +1,48 @@
+from projects.research_automation_multiagent.ai_analyst_generator import (
+    Analyst,
+    AnalystRevision,
+    merge_revision,
+)
+
+
+def analyst(name: str) -> Analyst:
+    return Analyst(
+        affiliation="Lab", name=name, role="Researcher", description=f"{name} focus"
+    )
+
+
+TEAM = [analyst("Ada"), analyst("Grace"), analyst("Linus")]
+
+
+def names(analysts):
+    return [a.name for a in analysts]
+
+
+def test_unchanged_analysts_keep_their_identity():
+    revision = AnalystRevision(keep=[1, 3], new_analysts=[analyst("CFO")])
+    merged = merge_revision(TEAM, revision, 3)
+    assert names(merged) == ["Ada", "Linus", "CFO"]
+    assert merged[0].persona_id == TEAM[0].persona_id
+
+
+def test_analysts_added_to_a_full_team_are_not_dropped():
+    # "Add an Animal science doctor and biology phd" with every analyst kept
+    revision = AnalystRevision(
+        keep=[1, 2, 3],
+        new_analysts=[analyst("Animal science doctor"), analyst("Biology PhD")],
+    )
+    merged = merge_revision(TEAM, revision, 3)
+    assert names(merged) == ["Ada", "Animal science doctor", "Biology PhD"]
+
+
+def test_new_analysts_are_capped_at_max_analysts():
+    revision = AnalystRevision(
+        keep=[1], new_analysts=[analyst(f"New {i}") for i in range(4)]
+    )
+    assert names(merge_revision(TEAM, revision, 3)) == ["New 0", "New 1", "New 2"]
+
+
+def test_invalid_and_repeated_keep_numbers_are_ignored():
+    revision = AnalystRevision(keep=[2, 2, 0, 9], new_analysts=[analyst("Grace")])
+    # A "new" analyst identical to a kept one is not added twice
+    assert names(merge_revision(TEAM, revision, 3)) == ["Grace"]
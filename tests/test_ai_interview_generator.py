@@ -0,0 +1,70 @@
+import os
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage
+
+from projects.research_automation_multiagent.ai_analyst_generator import Analyst
+from projects.research_automation_multiagent.ai_interview_generator import (
+    _answer_messages,
+    _question_messages,
+    _question_with_query_messages,
+)
+
+ANALYSTS = [
+    Analyst(
+        affiliation="Quantum Lab",
+        name="Ada",
+        role="Hardware researcher",
+        description="Focuses on qubit error rates.",
+    ),
+    Analyst(
+        affiliation="Policy Institute",
+        name="Grace",
+        role="Policy analyst",
+        description="Focuses on export controls.",
+    ),
+]
+
+
+def state(analyst: Analyst) -> dict:
+    return {
+        "analyst": analyst,
+        "context": [f"<Document>Notes for {analyst.name}.</Document>"],
+        "messages": [
+            HumanMessage(f"So you said you were writing an article on {analyst.role}?"),
+            AIMessage("Yes. What limits current systems?"),
+        ],
+    }
+
+
+def system_prompt(build, analyst: Analyst, layout: str, monkeypatch) -> str:
+    monkeypatch.setenv("PROMPT_LAYOUT", layout)
+    return build(state(analyst))[0].content
+
+
+def lines(text: str) -> list:
+    return sorted(line.strip() for line in text.splitlines() if line.strip())
+
+
+BUILDERS = [_question_messages, _question_with_query_messages, _answer_messages]
+
+
+@pytest.mark.parametrize("build", BUILDERS)
+def test_layouts_render_the_same_instructions(build, monkeypatch):
+    classic = system_prompt(build, ANALYSTS[0], "classic", monkeypatch)
+    prefix = system_prompt(build, ANALYSTS[0], "prefix", monkeypatch)
+    # Same text, only the order changes
+    assert lines(prefix) == lines(classic)
+    assert prefix != classic
+
+
+@pytest.mark.parametrize("build", BUILDERS)
+def test_prefix_layout_puts_the_instructions_first(build, monkeypatch):
+    prompts = [
+        system_prompt(build, analyst, "prefix", monkeypatch) for analyst in ANALYSTS
+    ]
+    shared = os.path.commonprefix(prompts)
+    # Every instruction comes before the persona, shared by all the analysts
+    assert shared.endswith("Name: ")
+    for prompt, analyst in zip(prompts, ANALYSTS):
+        assert prompt[len(shared) :].startswith(analyst.name)
@@ -0,0 +1,65 @@
+import re
+
+from projects.research_automation_multiagent.ai_research_assistant import (
+    finalize_report,
+    merge_report_fragments,
+)
+
+ALPHA = """Alpha finding [1], confirmed by [2].
+
+### Sources
+[1] https://alpha.example  
+[2] https://shared.example  """
+
+BETA = """Beta finding [1] and a shared one [2].
+
+## Sources
+[1] https://beta.example
+[2] https://shared.example"""
+
+
+def cited_sources(content: str) -> dict:
+    """First sentence of every passage -> the sources its citations point to."""
+    body, sources = content.split("\n## Sources\n")
+    numbers = dict(re.findall(r"^\[(\d+)\] (\S+)", sources, re.MULTILINE))
+    passages = body.removeprefix("## Insights\n\n").split("\n\n")
+    return {
+        passage.split()[0]: [numbers[n] for n in re.findall(r"\[(\d+)\]", passage)]
+        for passage in passages
+    }
+
+
+def test_citations_follow_their_passage_whatever_the_completion_order():
+    expected = {
+        "Alpha": ["https://alpha.example", "https://shared.example"],
+        "Beta": ["https://beta.example", "https://shared.example"],
+    }
+    assert cited_sources(merge_report_fragments([ALPHA, BETA])) == expected
+    assert cited_sources(merge_report_fragments([BETA, ALPHA])) == expected
+
+
+def test_duplicate_sources_get_a_single_number():
+    content = merge_report_fragments([ALPHA, BETA])
+    sources = content.split("\n## Sources\n")[1].splitlines()
+    assert sources == [
+        "[1] https://alpha.example  ",
+        "[2] https://shared.example  ",
+        "[3] https://beta.example  ",
+    ]
+    assert "Beta finding [3] and a shared one [2]." in content
+
+
+def test_passage_without_sources_is_kept_as_is():
+    content = merge_report_fragments(["Plain passage [7]."])
+    assert content == "## Insights\n\nPlain passage [7]."
+
+
+def test_merged_body_fits_finalize_report():
+    state = {
+        "content": merge_report_fragments([ALPHA, BETA]),
+        "introduction": "# Title\n\nIntro",
+        "conclusion": "## Conclusion\n\nEnd",
+    }
+    report = finalize_report(state)["final_report"]
+    assert report.count("## Sources") == 1
+    assert report.index("## Conclusion") < report.index("## Sources")
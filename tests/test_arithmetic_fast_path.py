@@ -0,0 +1,52 @@
+import pytest
+
+from agents.arithmetic_fast_path import solve
+
+
+def add(a, b):
+    return a + b
+
+
+def multiply(a, b):
+    return a * b
+
+
+def divide(a, b):
+    return a / b
+
+
+TOOLS = {tool.__name__: tool for tool in (add, multiply, divide)}
+
+
+@pytest.mark.parametrize(
+    "text, answer",
+    [
+        ("Add 3 and 4", "3 + 4 = 7"),
+        ("multiply 5 by 6.", "5 * 6 = 30"),
+        ("Divide 8 by 2?", "8 / 2 = 4"),
+        ("What is 3 + 4 * (2 - 1)?", "3 + 4 * (2 - 1) = 7"),
+        ("calculate 10/4", "10/4 = 2.5"),
+        ("3 + 4", "3 + 4 = 7"),
+        ("-3 * -2", "-3 * -2 = 6"),
+    ],
+)
+def test_plain_arithmetic_is_answered(text, answer):
+    assert solve(text, TOOLS) == answer
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "2024-10-18",
+        "555-1234",
+        "what is 2024-10-18",
+        "3+4",
+        "2024",
+        "2**100000",
+        "divide 1 by 0",
+        "what is the weather",
+        "Add 3 and 4 then multiply by 2",
+    ],
+)
+def test_ambiguous_input_goes_to_the_llm(text):
+    assert solve(text, TOOLS) is None
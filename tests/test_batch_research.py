@@ -0,0 +1,24 @@
+from projects.research_automation_multiagent.batch_research import job_thread_id
+
+JOB = {
+    "id": "rag",
+    "topic": "RAG evaluation",
+    "max_analysts": 3,
+    "max_num_turns": 2,
+    "feedback": None,
+}
+SETTINGS = {"fused_queries": False, "hierarchical_reduce": False}
+
+
+def test_same_run_and_settings_resume_the_same_thread():
+    assert job_thread_id("run1", JOB, SETTINGS) == job_thread_id(
+        "run1", dict(JOB), dict(SETTINGS)
+    )
+
+
+def test_changed_settings_or_new_run_get_a_new_thread():
+    thread = job_thread_id("run1", JOB, SETTINGS)
+    assert job_thread_id("run2", JOB, SETTINGS) != thread
+    assert job_thread_id("run1", {**JOB, "max_analysts": 4}, SETTINGS) != thread
+    assert job_thread_id("run1", {**JOB, "feedback": "Add a CFO"}, SETTINGS) != thread
+    assert job_thread_id("run1", JOB, {**SETTINGS, "fused_queries": True}) != thread
@@ -0,0 +1,38 @@
+import pytest
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+
+from ai_agents_playground.checkpoint_serde import CompressedSerializer
+
+LARGE = {"messages": ["a long and repetitive message"] * 100}
+
+
+def test_large_payloads_are_compressed_and_round_trip():
+    serde = CompressedSerializer(codec="zlib")
+    type_, data = serde.dumps_typed(LARGE)
+    assert type_ == "zlib+msgpack"
+    assert len(data) < len(JsonPlusSerializer().dumps_typed(LARGE)[1])
+    assert serde.loads_typed((type_, data)) == LARGE
+
+
+def test_small_payloads_are_stored_as_they_are():
+    serde = CompressedSerializer(codec="zlib")
+    assert serde.dumps_typed({"count": 1})[0] == "msgpack"
+
+
+def test_uncompressed_checkpoints_are_still_read():
+    stored = JsonPlusSerializer().dumps_typed(LARGE)
+    assert CompressedSerializer(codec="zlib").loads_typed(stored) == LARGE
+
+
+def test_compression_off():
+    assert CompressedSerializer(codec="off").dumps_typed(LARGE)[0] == "msgpack"
+
+
+def test_unknown_codec():
+    with pytest.raises(ValueError):
+        CompressedSerializer(codec="lz4")
+
+
+def test_unknown_codec_in_stored_data():
+    with pytest.raises(ValueError, match="'lz4'"):
+        CompressedSerializer(codec="zlib").loads_typed(("lz4+msgpack", b"data"))
@@ -0,0 +1,234 @@
+import asyncio
+import operator
+import sqlite3
+from typing import Annotated
+
+import pytest
+from langgraph.checkpoint.base import empty_checkpoint
+from langgraph.checkpoint.memory import MemorySaver
+from langgraph.constants import ERROR, TASKS, Send
+from langgraph.graph import END, START, StateGraph
+from typing_extensions import TypedDict
+
+from ai_agents_playground.checkpoint_serde import CompressedSerializer
+from ai_agents_playground.checkpointer import SqliteCheckpointSaver
+
+STEPS = 7
+
+
+@pytest.fixture
+def saver(tmp_path):
+    saver = SqliteCheckpointSaver(
+        str(tmp_path / "checkpoints.sqlite"),
+        keep_last=None,
+        batch_size=1000,
+        flush_interval=60,
+        compact_interval=None,
+        full_every=3,
+        serde=CompressedSerializer(),
+    )
+    yield saver
+    saver.close()
+
+
+# ===================== Graph history =====================
+class State(TypedDict):
+    items: Annotated[list, operator.add]
+    count: int
+
+
+def step(state: State):
+    return {"items": [f"step {state['count']}"], "count": state["count"] + 1}
+
+
+def fan_out(state: State):
+    if state["count"] < STEPS:
+        return "step"
+    return [Send("worker", {"items": [], "count": i}) for i in range(3)]
+
+
+def worker(state: State):
+    return {"items": [f"worker {state['count']}"]}
+
+
+def build_graph(checkpointer):
+    builder = StateGraph(State)
+    builder.add_node("step", step)
+    builder.add_node("worker", worker)
+    builder.add_node("finish", lambda state: {"count": -1})
+    builder.add_edge(START, "step")
+    builder.add_conditional_edges("step", fan_out, ["step", "worker"])
+    builder.add_edge("worker", "finish")
+    builder.add_edge("finish", END)
+    return builder.compile(checkpointer=checkpointer, interrupt_before=["finish"])
+
+
+def history(graph, config):
+    return [(s.values, s.next) for s in graph.get_state_history(config)]
+
+
+async def ahistory(graph, config):
+    return [(s.values, s.next) async for s in graph.aget_state_history(config)]
+
+
+def test_history_matches_memory_saver(saver):
+    config = {"configurable": {"thread_id": "t"}}
+    expected = build_graph(MemorySaver())
+    graph = build_graph(saver)
+    for g in (expected, graph):
+        g.invoke({"items": [], "count": 0}, config)
+        assert g.get_state(config).next == ("finish",)
+        g.invoke(None, config)
+
+    assert history(graph, config) == history(expected, config)
+    assert graph.get_state(config).values["count"] == -1
+    # Some list versions were stored as deltas
+    bases = saver._conn.execute("SELECT base FROM blobs WHERE channel = 'items'")
+    assert any(base for (base,) in bases)
+
+
+def test_async_history_matches_memory_saver(saver):
+    config = {"configurable": {"thread_id": "t"}}
+    expected = build_graph(MemorySaver())
+    graph = build_graph(saver)
+
+    async def run(g):
+        await g.ainvoke({"items": [], "count": 0}, config)
+        await g.ainvoke(None, config)
+        return await ahistory(g, config)
+
+    assert asyncio.run(run(graph)) == asyncio.run(run(expected))
+
+
+# ===================== Delta encoding =====================
+def put_versions(saver, values, thread_id="t"):
+    """Store one checkpoint per value of the "items" channel."""
+    config = {"configurable": {"thread_id": thread_id, "checkpoint_ns": ""}}
+    configs = []
+    version = None
+    for value in values:
+        version = saver.get_next_version(version, None)
+        checkpoint = empty_checkpoint()
+        checkpoint["channel_values"] = {"items": value}
+        checkpoint["channel_versions"] = {"items": version}
+        config = saver.put(config, checkpoint, {}, {"items": version})
+        configs.append(config)
+    return configs
+
+
+def stored_bases(saver):
+    rows = saver._conn.execute(
+        "SELECT version, base FROM blobs WHERE channel = 'items' ORDER BY version"
+    )
+    return [base for _, base in rows]
+
+
+def test_deltas_decode_across_full_copies(saver):
+    values = [list(range(n)) for n in range(1, 9)]
+    configs = put_versions(saver, values)
+
+    bases = stored_bases(saver)
+    # full_every=3: a full copy, two deltas, a full copy...
+    assert [base is None for base in bases] == [
+        True,
+        False,
+        False,
+        True,
+        False,
+        False,
+        True,
+        False,
+    ]
+    for config, value in zip(configs, values):
+        checkpoint = saver.get_tuple(config).checkpoint
+        assert checkpoint["channel_values"]["items"] == value
+
+
+def test_list_that_does_not_grow_gets_a_full_copy(saver):
+    values = [["a"], ["a", "b"], ["b"], ["b", "c"]]
+    configs = put_versions(saver, values)
+    assert [base is None for base in stored_bases(saver)] == [True, False, True, False]
+    for config, value in zip(configs, values):
+        assert saver.get_tuple(config).checkpoint["channel_values"]["items"] == value
+
+
+def test_compact_keeps_the_base_chain_of_retained_checkpoints(saver):
+    saver.keep_last = 2
+    values = [list(range(n)) for n in range(1, 7)]
+    configs = put_versions(saver, values)
+
+    deleted = saver.compact()
+    assert deleted["checkpoints"] == 4
+    # Version 6 is a delta over 5, itself a delta over the full copy 4
+    remaining = saver._conn.execute(
+        "SELECT version FROM blobs WHERE channel = 'items' ORDER BY version"
+    ).fetchall()
+    assert len(remaining) == 3
+    assert [t.config for t in saver.list({"configurable": {"thread_id": "t"}})] == [
+        configs[-1],
+        configs[-2],
+    ]
+    for config, value in zip(configs[-2:], values[-2:]):
+        assert saver.get_tuple(config).checkpoint["channel_values"]["items"] == value
+
+
+# ===================== put_writes =====================
+def test_put_writes_matches_memory_saver(saver):
+    memory = MemorySaver()
+    for s in (memory, saver):
+        config = s.put(
+            {"configurable": {"thread_id": "t", "checkpoint_ns": ""}},
+            empty_checkpoint(),
+            {},
+            {},
+        )
+        s.put_writes(config, [("items", "first"), ("count", 1)], "task-b")
+        # Regular writes are kept once, a retry does not replace them
+        s.put_writes(config, [("items", "retry")], "task-b")
+        # Special writes (errors, interrupts) are replaced
+        s.put_writes(config, [(ERROR, "boom")], "task-a")
+        s.put_writes(config, [(ERROR, "boom again")], "task-a")
+        s.put_writes(config, [(TASKS, Send("worker", {"count": 0}))], "task-c")
+
+    def pending(s):
+        config = {"configurable": {"thread_id": "t", "checkpoint_ns": ""}}
+        return sorted(s.get_tuple(config).pending_writes)
+
+    assert pending(saver) == pending(memory)
+    assert ("task-b", "items", "first") in pending(saver)
+    assert ("task-a", ERROR, "boom again") in pending(saver)
+
+
+def test_pending_sends_come_from_the_parent_writes(saver):
+    parent, child = put_versions(saver, [["a"], ["a", "b"]])
+    send = Send("worker", {"count": 0})
+    saver.put_writes(parent, [(TASKS, send)], "task")
+    assert saver.get_tuple(child).checkpoint["pending_sends"] == [send]
+
+
+def test_root_writes_are_committed_right_away(saver):
+    (config,) = put_versions(saver, [["a"]])
+    saver.flush()
+    reader = sqlite3.connect(saver.path)
+
+    def committed():
+        return reader.execute("SELECT COUNT(*) FROM writes").fetchone()[0]
+
+    subgraph = {"configurable": {**config["configurable"], "checkpoint_ns": "sub:1"}}
+    saver.put_writes(subgraph, [("items", "sub")], "task-sub")
+    assert committed() == 0  # sub-graph steps stay batched
+    saver.put_writes(config, [("items", "root")], "task-root")
+    assert committed() == 2
+    reader.close()
+
+
+def test_delete_thread_forgets_delta_bases(saver):
+    put_versions(saver, [["a"], ["a", "b"]])
+    saver.delete_thread("t")
+    (config,) = put_versions(saver, [["a", "b", "c"]])
+    assert stored_bases(saver) == [None]
+    assert saver.get_tuple(config).checkpoint["channel_values"]["items"] == [
+        "a",
+        "b",
+        "c",
+    ]
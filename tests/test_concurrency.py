@@ -0,0 +1,151 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from ai_agents_playground.concurrency import AdaptiveLimiter, _retry_after
+
+
+class RateLimited(Exception):
+    status_code = 429
+
+    def __init__(self, retry_after="0"):
+        super().__init__("429")
+        self.headers = {"retry-after": retry_after}
+
+
+def test_slow_start_then_additive_increase():
+    limiter = AdaptiveLimiter("test", initial=2, max_limit=64)
+    limiter.release(limiter.acquire())
+    assert limiter.limit == 3  # +1 per success until the first congestion
+
+    limiter.release(limiter.acquire(), congested=True)
+    assert limiter.limit == 1.5
+    limiter.release(limiter.acquire())
+    assert limiter.limit == pytest.approx(1.5 + 1 / 1.5)
+
+
+def test_congestion_of_calls_started_before_a_decrease_counts_once():
+    limiter = AdaptiveLimiter("test", initial=8)
+    started = [limiter.acquire() for _ in range(4)]
+    for start in started:
+        limiter.release(start, congested=True)
+    assert limiter.limit == 4
+
+
+def test_limit_is_bounded():
+    limiter = AdaptiveLimiter("test", initial=2, min_limit=1, max_limit=3)
+    for _ in range(5):
+        limiter.release(limiter.acquire())
+    assert limiter.limit == 3
+    for _ in range(5):
+        limiter.release(time.monotonic(), congested=True)
+    assert limiter.limit == 1
+
+
+def test_call_retries_429_and_returns_the_result():
+    limiter = AdaptiveLimiter("test", initial=4)
+    answers = iter([RateLimited(), RateLimited(), "ok"])
+
+    def fn():
+        answer = next(answers)
+        if isinstance(answer, Exception):
+            raise answer
+        return answer
+
+    assert limiter.call(fn) == "ok"
+    metrics = limiter.metrics()
+    assert (metrics["throttled"], metrics["retries"], metrics["completed"]) == (2, 2, 1)
+    assert metrics["in_flight"] == 0
+
+
+def test_call_gives_up_after_max_retries():
+    limiter = AdaptiveLimiter("test", max_retries=1)
+
+    def fn():
+        raise RateLimited()
+
+    with pytest.raises(RateLimited):
+        limiter.call(fn)
+    assert limiter.in_flight == 0
+
+
+def test_other_errors_are_not_retried():
+    limiter = AdaptiveLimiter("test", initial=4)
+    calls = []
+
+    def fn():
+        calls.append(1)
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError):
+        limiter.call(fn)
+    assert calls == [1]
+    assert limiter.in_flight == 0 and limiter.limit == 5
+
+
+def test_threads_never_exceed_the_limit():
+    limiter = AdaptiveLimiter("test", initial=2, max_limit=2)
+    in_flight = []
+    lock = threading.Lock()
+    active = [0]
+
+    def fn():
+        with lock:
+            active[0] += 1
+            in_flight.append(active[0])
+        time.sleep(0.01)
+        with lock:
+            active[0] -= 1
+
+    threads = [threading.Thread(target=limiter.call, args=(fn,)) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert max(in_flight) == 2
+    assert limiter.metrics()["max_waiting"] > 0
+
+
+def test_async_calls_never_exceed_the_limit():
+    limiter = AdaptiveLimiter("test", initial=3, max_limit=3)
+    active = [0]
+    peak = [0]
+
+    async def fn():
+        active[0] += 1
+        peak[0] = max(peak[0], active[0])
+        await asyncio.sleep(0.01)
+        active[0] -= 1
+        return True
+
+    async def run():
+        return await asyncio.gather(*(limiter.acall(fn) for _ in range(10)))
+
+    assert all(asyncio.run(run()))
+    assert peak[0] == 3
+    assert limiter.in_flight == 0 and limiter.waiting == 0
+
+
+def test_retry_after_blocks_new_calls():
+    limiter = AdaptiveLimiter("test", initial=4)
+    limiter.release(limiter.acquire(), congested=True, retry_after=0.2)
+    start = time.monotonic()
+    limiter.release(limiter.acquire())
+    assert time.monotonic() - start >= 0.15
+
+
+@pytest.mark.parametrize(
+    "headers, seconds",
+    [
+        ({"retry-after-ms": "250"}, 0.25),
+        ({"retry-after": "2"}, 2.0),
+        ({}, None),
+        ({"retry-after": "soon"}, None),
+    ],
+)
+def test_retry_after_header(headers, seconds):
+    error = RateLimited()
+    error.headers = headers
+    assert _retry_after(error) == seconds
@@ -0,0 +1,118 @@
+import logging
+import sys
+import types
+
+import pytest
+from langchain_core.messages import HumanMessage
+
+from projects.research_automation_multiagent import context_assembly
+from projects.research_automation_multiagent.context_assembly import (
+    DOCUMENT_SEPARATOR,
+    assemble_context,
+    context_budget,
+    count_tokens,
+    split_documents,
+    truncate_tokens,
+)
+
+
+class WordEncoding:
+    """One token per word, so budgets are easy to count."""
+
+    def encode(self, text, disallowed_special=()):
+        return text.split()
+
+    def decode(self, tokens):
+        return " ".join(tokens)
+
+
+@pytest.fixture
+def encoding(monkeypatch):
+    def use(module):
+        monkeypatch.setitem(sys.modules, "tiktoken", module)
+        context_assembly._encoding.cache_clear()
+
+    yield use
+    context_assembly._encoding.cache_clear()
+
+
+@pytest.fixture
+def words(encoding):
+    tiktoken = types.SimpleNamespace(get_encoding=lambda name: WordEncoding())
+    encoding(tiktoken)
+
+
+def document(topic: str, size: int = 10) -> str:
+    return " ".join([topic] + [f"filler{i}" for i in range(size - 1)])
+
+
+# ===================== Token counting =====================
+def test_tiktoken_counts_the_tokens(words):
+    assert count_tokens("three small words") == 3
+
+
+def test_four_chars_per_token_without_tiktoken(encoding, caplog):
+    # A None entry in sys.modules makes the import fail
+    encoding(None)
+    with caplog.at_level(logging.WARNING):
+        assert count_tokens("x" * 40) == 11
+    assert "4 chars per token" in caplog.text
+    assert count_tokens("") == 1
+    assert count_tokens(truncate_tokens("x" * 100, 10)) == 10
+
+
+def test_budget_per_node(monkeypatch):
+    assert context_budget("generate_answer") == 6000
+    monkeypatch.setenv("CONTEXT_TOKEN_BUDGET_GENERATE_ANSWER", "1500")
+    assert context_budget("generate_answer") == 1500
+
+
+# ===================== Documents =====================
+def test_split_documents_flattens_and_deduplicates():
+    context = [
+        HumanMessage(f"first{DOCUMENT_SEPARATOR}second   with    spaces\n\n\nend"),
+        "third",
+        f"first{DOCUMENT_SEPARATOR}{DOCUMENT_SEPARATOR}",
+    ]
+    # The repeated document keeps its most recent position
+    assert split_documents(context) == ["second with spaces\nend", "third", "first"]
+
+
+# ===================== Budget =====================
+def test_everything_fits(words):
+    documents = [document("alpha"), document("beta"), document("gamma")]
+    assert assemble_context(documents, "alpha", budget=100) == DOCUMENT_SEPARATOR.join(
+        documents
+    )
+
+
+def test_the_least_relevant_and_oldest_documents_are_dropped(words):
+    relevant, old, recent = document("quantum"), document("old"), document("recent")
+    # 10 words plus one for the separator: room for two documents
+    context = assemble_context([relevant, old, recent], "quantum", budget=22)
+    assert context == relevant + DOCUMENT_SEPARATOR + recent
+
+
+def test_a_document_that_does_not_fit_is_skipped_for_smaller_ones(words):
+    large, small = document("quantum", 30), document("small", 5)
+    context = assemble_context([small, large], "quantum", budget=20)
+    assert context == small
+
+
+def test_the_best_document_is_truncated_when_none_fits(words):
+    best, other = document("quantum", 30), document("other", 30)
+    context = assemble_context([best, other], "quantum", budget=5)
+    assert context == " ".join(best.split()[:5])
+
+
+@pytest.mark.parametrize("budget", [10, 50, 120, 300])
+def test_context_stays_within_the_budget(encoding, budget):
+    encoding(None)
+    documents = [document(f"topic{i}", size=i * 5 + 5) for i in range(8)]
+    context = assemble_context(documents, "topic3 topic6", budget)
+    assert context
+    assert count_tokens(context) <= budget
+
+
+def test_empty_context(words):
+    assert assemble_context([], "quantum", budget=100) == ""
@@ -0,0 +1,110 @@
+import logging
+import operator
+from typing import Annotated
+
+import pytest
+from langgraph.graph import END, START, StateGraph
+from typing_extensions import TypedDict
+
+from ai_agents_playground.checkpointer import SqliteCheckpointSaver
+from projects.research_automation_multiagent import document_store
+from projects.research_automation_multiagent.document_store import (
+    document_id,
+    get_document_store,
+    get_documents,
+    put_documents,
+)
+
+PAGES = ["Page about quantum computing.", "Page about error correction."]
+
+
+def restart():
+    """Forget the in-process store and its cache, as a new process would."""
+    get_document_store().close()
+    get_document_store.cache_clear()
+    document_store._load.cache_clear()
+
+
+@pytest.fixture(autouse=True)
+def store_path(monkeypatch, tmp_path):
+    monkeypatch.setenv("DOCUMENT_STORE_PATH", str(tmp_path / "documents.sqlite"))
+    monkeypatch.delenv("DOCUMENT_STORE_MAX_BYTES", raising=False)
+    get_document_store.cache_clear()
+    document_store._load.cache_clear()
+    yield
+    restart()
+
+
+class State(TypedDict):
+    context: Annotated[list, operator.add]
+    answer: str
+
+
+def build_graph(checkpointer):
+    builder = StateGraph(State)
+    builder.add_node("search", lambda state: {"context": put_documents(PAGES)})
+    builder.add_node(
+        "generate_answer",
+        lambda state: {"answer": "\n".join(get_documents(state["context"]))},
+    )
+    builder.add_edge(START, "search")
+    builder.add_edge("search", "generate_answer")
+    builder.add_edge("generate_answer", END)
+    return builder.compile(
+        checkpointer=checkpointer, interrupt_before=["generate_answer"]
+    )
+
+
+def run_then_resume(tmp_path, other_documents: int) -> str:
+    """Stop before the answer, store other research, resume in a new process."""
+    config = {"configurable": {"thread_id": "t"}}
+    path = str(tmp_path / "checkpoints.sqlite")
+    saver = SqliteCheckpointSaver(path)
+    build_graph(saver).invoke({"context": []}, config)
+    saver.close()
+
+    put_documents(
+        f"Other research {i}. " + "x" * 10_000 for i in range(other_documents)
+    )
+    restart()
+
+    saver = SqliteCheckpointSaver(path)
+    answer = build_graph(saver).invoke(None, config)["answer"]
+    saver.close()
+    return answer
+
+
+def test_documents_are_stored_once_by_content():
+    ids = put_documents(PAGES + PAGES[:1])
+    assert ids == [document_id(PAGES[0]), document_id(PAGES[1]), ids[0]]
+    assert get_document_store().stats()["entries"] == 2
+    assert get_documents(ids) == PAGES + PAGES[:1]
+
+
+def test_entries_that_are_not_ids_are_returned_as_they_are():
+    assert get_documents(["legacy document", *put_documents(PAGES[:1])]) == [
+        "legacy document",
+        PAGES[0],
+    ]
+
+
+def test_the_store_is_unbounded_by_default():
+    assert get_document_store().max_bytes is None
+    assert get_document_store().max_entries is None
+
+
+def test_resume_after_more_research_keeps_the_context(tmp_path, caplog):
+    with caplog.at_level(logging.WARNING):
+        answer = run_then_resume(tmp_path, other_documents=100)
+    assert answer == "\n".join(PAGES)
+    assert "no longer in the document store" not in caplog.text
+
+
+def test_a_size_limit_can_evict_referenced_documents(tmp_path, monkeypatch, caplog):
+    # Opt-in: the limit is only safe for stores whose threads are not resumed
+    monkeypatch.setenv("DOCUMENT_STORE_MAX_BYTES", "50000")
+    restart()
+    with caplog.at_level(logging.WARNING):
+        answer = run_then_resume(tmp_path, other_documents=10)
+    assert answer == ""
+    assert "no longer in the document store" in caplog.text
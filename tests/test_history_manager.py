@@ -0,0 +1,160 @@
+import pytest
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import (
+    AIMessage,
+    HumanMessage,
+    SystemMessage,
+    ToolMessage,
+)
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langgraph.graph.message import add_messages
+
+from agents.history_manager import consumed_tool_exchanges, make_history_node
+
+
+class FakeSummarizer(BaseChatModel):
+    """Chat model that records its prompts and answers "summary <n>"."""
+
+    prompts: list = []
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-summarizer"
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        self.prompts.append(messages)
+        message = AIMessage(f"summary {len(self.prompts)}")
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+
+@pytest.fixture
+def model():
+    return FakeSummarizer()
+
+
+@pytest.fixture
+def limits(monkeypatch):
+    def set_limits(max_tokens, keep_turns):
+        monkeypatch.setenv("HISTORY_MAX_TOKENS", str(max_tokens))
+        monkeypatch.setenv("HISTORY_KEEP_TURNS", str(keep_turns))
+
+    return set_limits
+
+
+def turn(n: int, tools: bool = False) -> list:
+    """Question, optional tool call and result, and final answer of turn ``n``."""
+    messages = [HumanMessage(f"question {n}", id=f"human-{n}")]
+    if tools:
+        call = {"name": "add", "args": {"a": n, "b": 1}, "id": f"call-{n}"}
+        messages += [
+            AIMessage("", tool_calls=[call], id=f"call-{n}"),
+            ToolMessage(str(n + 1), tool_call_id=f"call-{n}", id=f"result-{n}"),
+        ]
+    return messages + [AIMessage(f"answer {n}", id=f"answer-{n}")]
+
+
+def apply(messages: list, update: dict) -> list:
+    return add_messages(messages, update.get("messages", []))
+
+
+def assert_no_orphans(messages: list):
+    calls = {
+        c["id"] for m in messages if isinstance(m, AIMessage) for c in m.tool_calls
+    }
+    results = {m.tool_call_id for m in messages if isinstance(m, ToolMessage)}
+    assert calls == results
+
+
+def test_short_history_is_left_alone(model, limits):
+    limits(max_tokens=2000, keep_turns=2)
+    messages = turn(1) + turn(2) + turn(3) + [HumanMessage("question 4", id="human-4")]
+    assert make_history_node(model)({"messages": messages}) == {}
+    assert model.prompts == []
+
+
+def test_old_turns_are_summarized_and_the_last_ones_kept(model, limits):
+    limits(max_tokens=10, keep_turns=2)
+    messages = turn(1) + turn(2) + turn(3) + [HumanMessage("question 4", id="human-4")]
+    update = make_history_node(model)({"messages": messages})
+
+    assert update["summary"] == "summary 1"
+    remaining = apply(messages, update)
+    # The last two turns: the answered turn 3 and the current question
+    assert [m.id for m in remaining] == ["human-3", "answer-3", "human-4"]
+    (prompt,) = model.prompts
+    assert isinstance(prompt[0], SystemMessage)
+    assert [m.id for m in prompt[1:]] == ["human-1", "answer-1", "human-2", "answer-2"]
+
+
+def test_keep_turns_is_the_boundary(model, limits):
+    limits(max_tokens=10, keep_turns=3)
+    messages = turn(1) + turn(2) + [HumanMessage("question 3", id="human-3")]
+    # Three turns, all of them kept even over the token limit
+    assert make_history_node(model)({"messages": messages}) == {}
+
+    messages = turn(1) + turn(2) + turn(3) + [HumanMessage("question 4", id="human-4")]
+    update = make_history_node(model)({"messages": messages})
+    assert [m.id for m in apply(messages, update)] == [
+        "human-2",
+        "answer-2",
+        "human-3",
+        "answer-3",
+        "human-4",
+    ]
+
+
+def test_summary_is_folded_into_the_previous_one(model, limits):
+    limits(max_tokens=10, keep_turns=1)
+    messages = turn(1) + [HumanMessage("question 2", id="human-2")]
+    update = make_history_node(model)(
+        {"messages": messages, "summary": "The user is called Ada."}
+    )
+
+    (prompt,) = model.prompts
+    assert "The user is called Ada." in prompt[0].content
+    assert update["summary"] == "summary 1"
+    assert [m.id for m in apply(messages, update)] == ["human-2"]
+
+
+def test_consumed_tool_exchanges_are_removed_in_pairs(model, limits):
+    limits(max_tokens=2000, keep_turns=2)
+    messages = turn(1, tools=True) + turn(2, tools=True)
+    # The current turn is still running its tools
+    messages += turn(3, tools=True)[:3]
+
+    assert [m.id for m in consumed_tool_exchanges(messages)] == [
+        "call-1",
+        "result-1",
+        "call-2",
+        "result-2",
+    ]
+    remaining = apply(messages, make_history_node(model)({"messages": messages}))
+    assert [m.id for m in remaining] == [
+        "human-1",
+        "answer-1",
+        "human-2",
+        "answer-2",
+        "human-3",
+        "call-3",
+        "result-3",
+    ]
+    assert_no_orphans(remaining)
+    assert model.prompts == []
+
+
+def test_summary_prompt_has_no_tool_messages(model, limits):
+    limits(max_tokens=10, keep_turns=1)
+    messages = turn(1, tools=True) + turn(2, tools=True)
+    messages += [HumanMessage("question 3", id="human-3")]
+    update = make_history_node(model)({"messages": messages})
+
+    (prompt,) = model.prompts
+    assert [m.id for m in prompt[1:]] == ["human-1", "answer-1", "human-2", "answer-2"]
+    remaining = apply(messages, update)
+    assert [m.id for m in remaining] == ["human-3"]
+    assert_no_orphans(remaining)
+
+
+def test_no_history():
+    assert consumed_tool_exchanges([]) == []
+    assert consumed_tool_exchanges(turn(1, tools=True)[1:]) == []
@@ -0,0 +1,216 @@
+import contextvars
+import threading
+
+import pytest
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage, HumanMessage
+from langchain_openai import ChatOpenAI
+from pydantic import BaseModel
+
+from ai_agents_playground import disk_cache
+from ai_agents_playground.disk_cache import DiskCache
+from ai_agents_playground.llm_cache import (
+    PersistentLLMCache,
+    bypass_llm_cache,
+    cache_key,
+)
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(disk_cache.time, "time", clock)
+    return clock
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = DiskCache(str(tmp_path / "cache.sqlite"))
+    yield store
+    store.close()
+
+
+def fake_model(cache, answers):
+    return GenericFakeChatModel(
+        messages=iter([AIMessage(answer) for answer in answers]), cache=cache
+    )
+
+
+# ===================== Cache keys =====================
+def test_message_ids_and_usage_do_not_change_the_key(store):
+    model = fake_model(PersistentLLMCache(store), ["first", "second"])
+
+    def conversation(run):
+        return [
+            HumanMessage("What is 3 + 4?", id=f"human-{run}"),
+            AIMessage(
+                "7",
+                id=f"ai-{run}",
+                response_metadata={"model_name": "m", "run": run},
+                usage_metadata={
+                    "input_tokens": run,
+                    "output_tokens": 1,
+                    "total_tokens": run + 1,
+                },
+            ),
+            HumanMessage("And times 2?", id=f"follow-up-{run}"),
+        ]
+
+    assert model.invoke(conversation(1)).content == "first"
+    # Served from the cache, the model is not called again
+    assert model.invoke(conversation(2)).content == "first"
+    assert store.stats()["entries"] == 1
+
+
+def test_different_content_gives_different_keys(store):
+    model = fake_model(PersistentLLMCache(store), ["first", "second"])
+    assert model.invoke("What is 3 + 4?").content == "first"
+    assert model.invoke("What is 3 + 5?").content == "second"
+
+
+class Weather(BaseModel):
+    city: str
+
+
+class Sum(BaseModel):
+    total: int
+
+
+def test_llm_string_and_output_schema_are_part_of_the_key():
+    prompt = '[{"lc": 1, "type": "constructor", "id": ["HumanMessage"]}]'
+    model = ChatOpenAI(model="model-a", api_key="test")
+    warmer = ChatOpenAI(model="model-a", api_key="test", temperature=0.5)
+    other = ChatOpenAI(model="model-b", api_key="test")
+
+    def llm_string(llm, schema):
+        bound = llm.with_structured_output(schema).first
+        return llm._get_llm_string(**bound.kwargs)
+
+    keys = {
+        cache_key(prompt, llm_string(model, Weather)),
+        cache_key(prompt, llm_string(model, Sum)),
+        cache_key(prompt, llm_string(warmer, Sum)),
+        cache_key(prompt, llm_string(other, Sum)),
+    }
+    assert len(keys) == 4
+
+
+def test_prompts_that_are_not_json_are_hashed_as_they_are():
+    assert cache_key("plain prompt", "llm") == cache_key("plain prompt", "llm")
+    assert cache_key("plain prompt", "llm") != cache_key("other prompt", "llm")
+
+
+# ===================== Eviction =====================
+def test_least_recently_used_entries_are_evicted_by_size(tmp_path, clock):
+    store = DiskCache(str(tmp_path / "cache.sqlite"), max_bytes=30)
+    store.set("a", b"x" * 10)
+    clock.now += 1
+    store.set("b", b"x" * 10)
+    clock.now += 1
+    store.set("c", b"x" * 10)
+    clock.now += 1
+    # Reading "a" makes "b" the least recently used entry
+    assert store.get("a") is not None
+    clock.now += 1
+    store.set("d", b"x" * 10)
+
+    assert store.get("b") is None
+    assert all(store.get(key) is not None for key in ("a", "c", "d"))
+    assert store.stats()["bytes"] == 30
+    store.close()
+
+
+def test_entry_limit(tmp_path, clock):
+    store = DiskCache(str(tmp_path / "cache.sqlite"), max_entries=2)
+    for key in ("a", "b", "c"):
+        store.set(key, b"value")
+        clock.now += 1
+    assert store.get("a") is None
+    assert store.stats()["entries"] == 2
+    store.close()
+
+
+def test_old_entries_expire(tmp_path, clock):
+    store = DiskCache(str(tmp_path / "cache.sqlite"), max_age=60)
+    store.set("old", b"value")
+    clock.now += 30
+    store.set("recent", b"value")
+    clock.now += 31
+
+    assert store.get("old") is None
+    assert store.get("recent") == b"value"
+    # A lookup can ask for fresher entries than the default
+    assert store.get("recent", max_age=10) is None
+    store.close()
+
+
+def test_writes_remove_expired_entries(tmp_path, clock):
+    store = DiskCache(str(tmp_path / "cache.sqlite"), max_age=60)
+    store.set("old", b"value")
+    clock.now += 61
+    store.set("new", b"value")
+    assert store.stats()["entries"] == 1
+    store.close()
+
+
+# ===================== Counters =====================
+def test_hit_and_miss_counters(store):
+    cache = PersistentLLMCache(store)
+    model = fake_model(cache, ["first", "second"])
+    model.invoke("What is 3 + 4?")
+    model.invoke("What is 3 + 4?")
+    model.invoke("What is 3 + 5?")
+
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["bypassed"]) == (1, 2, 0)
+    assert stats["entries"] == 2
+
+
+# ===================== Bypass =====================
+def test_bypass_refreshes_the_stored_answer(store):
+    cache = PersistentLLMCache(store)
+    model = fake_model(cache, ["first", "second", "third"])
+    assert model.invoke("What is 3 + 4?").content == "first"
+    with bypass_llm_cache():
+        assert model.invoke("What is 3 + 4?").content == "second"
+    assert model.invoke("What is 3 + 4?").content == "second"
+    assert cache.bypassed == 1
+
+
+def test_bypass_follows_the_context(store):
+    cache = PersistentLLMCache(store)
+    cache.update("prompt", "llm", [])
+    results = {}
+
+    def lookup(name):
+        results[name] = cache.lookup("prompt", "llm")
+
+    with bypass_llm_cache():
+        # Copied into threads the way LangGraph runs sync nodes
+        context = contextvars.copy_context()
+        thread = threading.Thread(target=context.run, args=(lookup, "copied"))
+        thread.start()
+        thread.join()
+    lookup("after")
+    thread = threading.Thread(target=lookup, args=("other thread",))
+    thread.start()
+    thread.join()
+
+    assert results == {"copied": None, "after": [], "other thread": []}
+    assert cache.bypassed == 1
+
+
+def test_cache_wide_bypass(store):
+    cache = PersistentLLMCache(store, bypass=True)
+    cache.update("prompt", "llm", [])
+    assert cache.lookup("prompt", "llm") is None
+    with bypass_llm_cache(False):
+        assert cache.lookup("prompt", "llm") is None
@@ -0,0 +1,137 @@
+import asyncio
+import json
+
+import pytest
+
+from ai_agents_playground import llm_client
+from ai_agents_playground.llm_cache import PersistentLLMCache, get_llm_cache
+from ai_agents_playground.llm_client import get_chat_model, get_llm, model_profile
+from benchmarks.research_pipeline import FakeOpenAIServer
+
+
+@pytest.fixture
+def server(monkeypatch):
+    with FakeOpenAIServer(latency=0.01, completion_words=5) as server:
+        monkeypatch.setenv("OPENAI_API_KEY", "test")
+        monkeypatch.setenv("ORCHESTATOR_BASE_URL", server.base_url)
+        monkeypatch.setenv("ORCHESTATOR_MODEL", "test")
+        yield server
+
+
+def test_async_calls_work_from_successive_event_loops(server):
+    llm = get_chat_model()
+
+    async def calls():
+        # Concurrent calls leave several keep-alive connections in the pool
+        return await asyncio.gather(*(llm.ainvoke("hi") for _ in range(4)))
+
+    for _ in range(3):
+        assert len(asyncio.run(calls())) == 4
+    assert server.calls == 12
+
+
+@pytest.fixture
+def fresh_llms(monkeypatch, tmp_path):
+    monkeypatch.setenv("LLM_CACHE_PATH", str(tmp_path / "llm_cache.sqlite"))
+    get_llm_cache.cache_clear()
+    llm_client._get_llm.cache_clear()
+    yield
+    get_llm_cache.cache_clear()
+    llm_client._get_llm.cache_clear()
+
+
+def test_get_llm_is_built_once_per_node_and_overrides(server, fresh_llms, monkeypatch):
+    monkeypatch.setenv("LLM_MODEL_WRITE_REPORT", "large")
+
+    llm = get_llm("write_report")
+    assert get_llm("write_report") is llm
+    assert isinstance(llm.cache, PersistentLLMCache)
+    assert llm.model_name == "large"
+
+    limited = get_llm("write_report", max_retries=0)
+    assert limited is not llm
+    assert get_llm("write_report", max_retries=0) is limited
+    assert limited.max_retries == 0
+    assert limited.model_name == "large"
+    assert get_llm("ask_question").model_name == "test"
+
+
+# ===================== Model profiles =====================
+@pytest.fixture
+def profiles(monkeypatch, tmp_path):
+    def write(content):
+        path = tmp_path / f"profiles-{len(list(tmp_path.iterdir()))}.json"
+        path.write_text(json.dumps(content))
+        monkeypatch.setenv("LLM_PROFILES_FILE", str(path))
+
+    return write
+
+
+def test_profile_precedence(profiles, monkeypatch):
+    profiles(
+        {
+            "default": {"model": "small", "temperature": 0, "max_tokens": 500},
+            "write_report": {"model": "large", "max_tokens": 4000},
+        }
+    )
+    monkeypatch.setenv("LLM_MAX_TOKENS_WRITE_REPORT", "8000")
+
+    # File default < file node < LLM_<KEY>_<NODE>
+    assert model_profile() == {"model": "small", "temperature": 0.0, "max_tokens": 500}
+    assert model_profile("ask_question") == model_profile()
+    assert model_profile("write_report") == {
+        "model": "large",
+        "temperature": 0.0,
+        "max_tokens": 8000,
+    }
+
+
+def test_keywords_win_over_the_profile(profiles, monkeypatch):
+    monkeypatch.setenv("ORCHESTATOR_BASE_URL", "http://localhost:1/v1")
+    monkeypatch.setenv("ORCHESTATOR_MODEL", "fallback")
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+    profiles({"write_report": {"model": "large", "max_tokens": 4000}})
+    monkeypatch.setenv("LLM_MODEL_WRITE_REPORT", "larger")
+
+    llm = get_chat_model(node="write_report", model="explicit")
+    assert (llm.model_name, llm.max_tokens) == ("explicit", 4000)
+    assert get_chat_model(node="write_report").model_name == "larger"
+    assert get_chat_model().model_name == "fallback"
+
+
+def test_file_values_are_cast_like_variables(profiles, monkeypatch):
+    profiles({"default": {"max_tokens": "64", "temperature": 1, "timeout": "2.5"}})
+    monkeypatch.setenv("LLM_TEMPERATURE_WRITE_REPORT", "0.3")
+    profile = model_profile("write_report")
+    assert profile == {"max_tokens": 64, "temperature": 0.3, "timeout": 2.5}
+    assert type(profile["max_tokens"]) is int
+    assert type(model_profile()["temperature"]) is float
+
+
+@pytest.mark.parametrize(
+    "profile",
+    [
+        {"max_tokens": 64.5},
+        {"max_tokens": "many"},
+        {"max_tokens": True},
+        {"temperature": None},
+        {"timeout": [10]},
+    ],
+)
+def test_invalid_file_values(profiles, profile):
+    profiles({"write_report": profile})
+    with pytest.raises(ValueError, match=r"\(write_report\)"):
+        model_profile("write_report")
+
+
+def test_invalid_variable(monkeypatch):
+    monkeypatch.delenv("LLM_PROFILES_FILE", raising=False)
+    monkeypatch.setenv("LLM_MAX_TOKENS_WRITE_REPORT", "4k")
+    with pytest.raises(ValueError, match="LLM_MAX_TOKENS_WRITE_REPORT"):
+        model_profile("write_report")
+
+
+def test_unknown_keys(profiles):
+    profiles({"write_report": {"max_token": 64}})
+    with pytest.raises(ValueError, match="unknown keys"):
+        model_profile("write_report")
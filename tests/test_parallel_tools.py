@@ -0,0 +1,120 @@
+import threading
+import time
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage
+from langgraph.prebuilt import ToolNode
+
+from agents.parallel_tools import ParallelToolNode, make_tool_node
+
+release = threading.Event()
+
+
+@pytest.fixture(autouse=True)
+def release_hanging_tools():
+    release.clear()
+    yield
+    release.set()
+
+
+def add(a: int, b: int) -> int:
+    """Adds a and b."""
+    return a + b
+
+
+def slow_add(a: int, b: int) -> int:
+    """Adds a and b, slowly."""
+    time.sleep(0.2)
+    return a + b
+
+
+def divide(a: int, b: int) -> float:
+    """Divide a and b."""
+    return a / b
+
+
+def hang(a: int) -> int:
+    """Never answers in time."""
+    release.wait(5)
+    return a
+
+
+def tool_calls(*calls) -> dict:
+    message = AIMessage(
+        "",
+        tool_calls=[
+            {"name": name, "args": args, "id": f"call-{i}"}
+            for i, (name, args) in enumerate(calls)
+        ],
+    )
+    return {"messages": [HumanMessage("question"), message]}
+
+
+@pytest.fixture
+def node():
+    return ParallelToolNode([add, slow_add, divide, hang], timeout=0.5)
+
+
+def test_results_keep_the_order_of_the_calls(node):
+    state = tool_calls(
+        ("slow_add", {"a": 1, "b": 1}),
+        ("hang", {"a": 2}),
+        ("divide", {"a": 1, "b": 0}),
+        ("unknown", {}),
+        ("add", {"a": 3, "b": 4}),
+    )
+    messages = node(state)["messages"]
+
+    assert [m.tool_call_id for m in messages] == [f"call-{i}" for i in range(5)]
+    assert [m.status for m in messages] == [
+        "success",
+        "error",
+        "error",
+        "error",
+        "success",
+    ]
+    assert messages[0].content == "2"
+    assert "timed out after 0.5s" in messages[1].content
+    assert "ZeroDivisionError" in messages[2].content
+    assert "unknown is not a valid tool" in messages[3].content
+    assert messages[4].content == "7"
+    assert [m.name for m in messages] == [
+        "slow_add",
+        "hang",
+        "divide",
+        "unknown",
+        "add",
+    ]
+
+
+def test_calls_run_concurrently(node):
+    state = tool_calls(*[("slow_add", {"a": i, "b": 1}) for i in range(4)])
+    start = time.perf_counter()
+    messages = node(state)["messages"]
+    assert time.perf_counter() - start < 0.6
+    assert [m.content for m in messages] == ["1", "2", "3", "4"]
+
+
+def test_a_timeout_does_not_hold_back_the_other_results(node):
+    state = tool_calls(("hang", {"a": 1}), ("add", {"a": 1, "b": 2}))
+    start = time.perf_counter()
+    messages = node(state)["messages"]
+    assert time.perf_counter() - start < 1
+    assert [m.status for m in messages] == ["error", "success"]
+
+
+def test_nothing_to_run(node):
+    assert node({"messages": [HumanMessage("question")]}) == {"messages": []}
+    assert node({"messages": [AIMessage("answer")]}) == {"messages": []}
+
+
+def test_timeout_from_the_environment(monkeypatch):
+    monkeypatch.setenv("TOOL_CALL_TIMEOUT", "2.5")
+    assert ParallelToolNode([add]).timeout == 2.5
+
+
+def test_make_tool_node(monkeypatch):
+    monkeypatch.setenv("PARALLEL_TOOL_CALLS", "0")
+    assert isinstance(make_tool_node([add]), ToolNode)
+    monkeypatch.setenv("PARALLEL_TOOL_CALLS", "1")
+    assert isinstance(make_tool_node([add]), ParallelToolNode)